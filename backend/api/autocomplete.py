@@ -0,0 +1,90 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from recipes.models import Ingredient
+
+
+class IngredientTrie:
+    """
+    Индекс названий ингредиентов для поиска по префиксу.
+
+    Названия приводятся к нижнему регистру через casefold(), ингредиенты
+    хранятся в одном списке, отсортированном по приведенному названию.
+    Ингредиенты с общим префиксом идут в нем подряд, поэтому диапазон
+    находится двоичным поиском за O(log n) и не требует сортировки
+    результата. В отличие от дерева с узлом на каждый символ, память растет
+    только с количеством ингредиентов.
+    """
+
+    def __init__(self, ingredients):
+        self.ingredients = sorted(
+            ingredients, key=lambda item: (item.name.casefold(), item.name)
+        )
+        self.names = [
+            ingredient.name.casefold() for ingredient in self.ingredients
+        ]
+
+    def search(self, query, limit):
+        """
+        Возвращает ингредиенты, название которых содержит query.
+
+        Сначала идут ингредиенты, название которых начинается с query, затем
+        ингредиенты, в названии которых query встречается в другом месте.
+        """
+        query = query.casefold()
+        if not query:
+            return self.ingredients[:limit]
+        start = bisect_left(self.names, query)
+        end = start
+        while (
+            end < len(self.names) and end - start < limit
+            and self.names[end].startswith(query)
+        ):
+            end += 1
+        result = self.ingredients[start:end]
+        if len(result) >= limit:
+            return result
+        for ingredient, name in zip(self.ingredients, self.names):
+            if query in name and not name.startswith(query):
+                result.append(ingredient)
+                if len(result) >= limit:
+                    break
+        return result
+
+
+_trie = None
+_built_at = 0
+_lock = threading.Lock()
+
+
+def get_ingredient_trie():
+    """
+    Возвращает индекс названий ингредиентов текущего процесса.
+
+    Индекс строится при первом обращении и перестраивается после
+    invalidate_ingredient_trie() или по истечении
+    INGREDIENT_AUTOCOMPLETE_TTL секунд: сигналы не доходят до других
+    процессов, например после выполнения load_ingredients.
+    """
+    global _trie, _built_at
+    with _lock:
+        if (
+            _trie is None
+            or time.monotonic() - _built_at
+            > settings.INGREDIENT_AUTOCOMPLETE_TTL
+        ):
+            _trie = IngredientTrie(
+                Ingredient.objects.only('id', 'name', 'measurement_unit')
+            )
+            _built_at = time.monotonic()
+        return _trie
+
+
+def invalidate_ingredient_trie():
+    """Сбрасывает индекс названий ингредиентов текущего процесса."""
+    global _trie
+    with _lock:
+        _trie = None
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipes.models import CacheVersion
+
+
+async def aget_cache_version(prefix):
+    """
+    Возвращает текущую версию кэша для префикса.
+
+    Версия читается из БД одним запросом по первичному ключу, поэтому
+    сброс кэша в одном процессе сразу видят все остальные.
+    """
+    version = await CacheVersion.objects.filter(name=prefix).values_list(
+        'version', flat=True
+    ).afirst()
+    return version or 0
+
+
+def invalidate_cache(prefix):
+    """
+    Сбрасывает кэш для префикса.
+
+    Записи не удаляются, а становятся недоступны: версия в БД входит в ключ
+    каждой записи, а старые записи удаляются по истечении таймаута. Версия
+    меняется в текущей транзакции и становится видна после ее коммита.
+    """
+    # Версия - время сброса, а не счетчик: после отката транзакции номер
+    # версии не повторится и старые записи не станут снова доступны.
+    version = time.time_ns()
+    updated = CacheVersion.objects.filter(name=prefix).update(version=version)
+    if not updated:
+        CacheVersion.objects.bulk_create(
+            [CacheVersion(name=prefix, version=version)],
+            ignore_conflicts=True
+        )
+
+
+class CachedReadOnlyMixin:
+    """
+    Миксин для ViewSet справочников, которые почти не меняются.
+
+    Используется с асинхронными ViewSet из adrf. Сериализованные ответы list
+    и retrieve хранятся в кэше Django с ключом из действия, аргументов URL и
+    query-параметров. К ответу добавляется строгий ETag, по заголовку
+    If-None-Match возвращается 304 Not Modified. Кэш сбрасывается через
+    invalidate_cache(cache_prefix).
+    """
+
+    cache_prefix = None
+
+    async def list(self, request, *args, **kwargs):
+        return await self._get_cached_response(
+            super().alist, request, *args, **kwargs
+        )
+
+    async def retrieve(self, request, *args, **kwargs):
+        return await self._get_cached_response(
+            super().aretrieve, request, *args, **kwargs
+        )
+
+    async def _get_cached_response(
+        self, get_response, request, *args, **kwargs
+    ):
+        """Возвращает ответ из кэша или формирует и сохраняет его."""
+        query = '&'.join(
+            f'{key}={value}'
+            for key, values in sorted(request.query_params.lists())
+            for value in values
+        )
+        params = '&'.join(f'{key}={kwargs[key]}' for key in sorted(kwargs))
+        cache_key = hashlib.md5(
+            f'{self.action}:{params}:{query}'.encode()
+        ).hexdigest()
+        cache_key = (
+            f'{self.cache_prefix}:'
+            f'{await aget_cache_version(self.cache_prefix)}:{cache_key}'
+        )
+        cached = await cache.aget(cache_key)
+        if cached is None:
+            response = await get_response(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            content = json.dumps(
+                response.data, ensure_ascii=False, sort_keys=True
+            )
+            cached = (
+                quote_etag(hashlib.md5(content.encode()).hexdigest()),
+                response.data
+            )
+            await cache.aset(
+                cache_key, cached, settings.REFERENCE_DATA_CACHE_TIMEOUT
+            )
+        etag, data = cached
+        response = Response(data)
+        response['ETag'] = etag
+        return get_conditional_response(
+            request, etag=etag, response=response
+        )
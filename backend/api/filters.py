@@ -1,23 +1,34 @@
 import django_filters
+from django.db.models import Case, Exists, IntegerField, OuterRef, Value, When
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.search import search_recipes
 
 
 class IngredientFilter(django_filters.FilterSet):
     """
     Фильтр для модели ингредиента (Ingredient).
 
-    Позволяет фильтровать ингредиенты по началу названия.
+    Позволяет искать ингредиенты по названию: сначала идут ингредиенты,
+    название которых начинается с переданной строки, затем ингредиенты, в
+    названии которых она встречается в другом месте.
     """
 
-    name = django_filters.CharFilter(
-        field_name='name', lookup_expr='istartswith'
-    )
+    name = django_filters.CharFilter(method='filter_name')
 
     class Meta:
         model = Ingredient
         fields = ['name']
 
+    def filter_name(self, queryset, name, value):
+        return queryset.filter(name__icontains=value).annotate(
+            is_prefix_match=Case(
+                When(name__istartswith=value, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField()
+            )
+        ).order_by('is_prefix_match', 'name')
+
 
 class RecipeFilter(django_filters.FilterSet):
     """
@@ -27,13 +38,19 @@ class RecipeFilter(django_filters.FilterSet):
     - тегам (tags),
     - автору (author),
     - наличию в избранном (is_favorited),
-    - наличию в списке покупок (is_in_shopping_cart).
+    - наличию в списке покупок (is_in_shopping_cart),
+    - тексту в названии, описании и ингредиентах (search).
+
+    Фильтры по связанным таблицам выполняются подзапросами EXISTS, поэтому
+    рецепт не дублируется при совпадении нескольких тегов и выборке не нужен
+    DISTINCT.
     """
 
     tags = django_filters.ModelMultipleChoiceFilter(
         field_name='tags__slug',
         to_field_name='slug',
-        queryset=Tag.objects.all()
+        queryset=Tag.objects.all(),
+        method='filter_tags'
     )
     author = django_filters.NumberFilter(
         field_name='author__id'
@@ -44,19 +61,42 @@ class RecipeFilter(django_filters.FilterSet):
     is_in_shopping_cart = django_filters.NumberFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = django_filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
-        fields = ['tags', 'author', 'is_favorited', 'is_in_shopping_cart']
+        fields = [
+            'tags', 'author', 'is_favorited', 'is_in_shopping_cart', 'search'
+        ]
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe=OuterRef('pk'),
+                    tag__in=value
+                )
+            )
+        )
 
     def filter_is_favorited(self, queryset, name, value):
-        user = self.request.user
-        if value and user.is_authenticated:
-            return queryset.filter(favorites__user=user)
-        return queryset
+        return self._filter_user_recipes(queryset, Favorite, value)
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
+        return self._filter_user_recipes(queryset, ShoppingCart, value)
+
+    def filter_search(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+        return search_recipes(queryset, value)
+
+    def _filter_user_recipes(self, queryset, model, value):
+        """Оставляет рецепты, связанные с пользователем в модели model."""
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(shopping_cart__user=user)
+            return queryset.filter(
+                Exists(model.objects.filter(user=user, recipe=OuterRef('pk')))
+            )
         return queryset
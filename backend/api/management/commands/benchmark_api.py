@@ -0,0 +1,378 @@
+import base64
+import io
+import json
+import time
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test import TestCase, override_settings
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.images import delete_renditions
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Subscription,
+    Tag,
+)
+
+
+User = get_user_model()
+
+
+class RollbackBenchmark(Exception):
+    """Исключение для отката транзакции с тестовыми данными."""
+
+
+class Command(BaseCommand):
+    """
+    Команда для замера количества запросов, времени ответа и размера ответа
+    каждого эндпоинта API на сгенерированном наборе данных.
+
+    Списочные эндпоинты запрашиваются с разным размером страницы: если
+    количество запросов к БД растет вместе с размером страницы, команда
+    завершается с ошибкой. Данные создаются командой seed_load. По
+    умолчанию все данные создаются в транзакции, которая откатывается после
+    замеров. Действия, отложенные до коммита (ленты подписок, копии
+    изображений, поисковые векторы), выполняются сразу после запроса в
+    текущем потоке и входят в замер.
+    """
+
+    help = 'Замер запросов к БД для всех эндпоинтов API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=2000,
+            help='Количество пользователей'
+        )
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            default=20000,
+            help='Количество рецептов'
+        )
+        parser.add_argument(
+            '--ingredients-path',
+            type=str,
+            default=str(settings.BASE_DIR / 'data' / 'ingredients.json'),
+            help='Путь к файлу с ингредиентами'
+        )
+        parser.add_argument(
+            '--page-sizes',
+            type=int,
+            nargs=2,
+            default=[6, 24],
+            help='Два размера страницы для сравнения количества запросов'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Начальное значение генератора случайных чисел'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Путь к JSON файлу для сохранения результатов'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Не откатывать созданные данные'
+        )
+
+    @override_settings(FEED_FANOUT_WORKERS=0, IMAGE_PROCESSING_WORKERS=0)
+    def handle(self, *args, **options):
+        try:
+            setup_test_environment()
+        except RuntimeError:
+            # Окружение уже подготовлено, например при запуске из тестов.
+            teardown = False
+        else:
+            teardown = True
+        self.results = []
+        self.failures = []
+        try:
+            # Без --keep данные создаются в транзакции, которая не
+            # фиксируется, поэтому отложенные до коммита действия
+            # выполняются после каждого запроса (см. _measure).
+            with nullcontext() if options['keep'] else transaction.atomic():
+                self._seed(options)
+                self._run(options['page_sizes'])
+                if not options['keep']:
+                    raise RollbackBenchmark
+        except RollbackBenchmark:
+            pass
+        finally:
+            if teardown:
+                teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(self.results, file, ensure_ascii=False, indent=2)
+        if self.failures:
+            raise CommandError('\n'.join(self.failures))
+        self.stdout.write(self.style.SUCCESS('Регрессий не обнаружено'))
+
+    def _seed(self, options):
+        """
+        Создает данные командой seed_load и дополняет списки клиента.
+
+        У пользователя, от имени которого выполняются запросы, должно быть
+        по несколько страниц подписок, избранного и списка покупок, поэтому
+        его связи добавляются отдельно.
+        """
+        first_user_id = self._max_pk(User) + 1
+        first_recipe_id = self._max_pk(Recipe) + 1
+        call_command(
+            'seed_load',
+            users=options['users'],
+            recipes=options['recipes'],
+            subscriptions=10,
+            favorites=10,
+            carts=10,
+            ingredients_path=options['ingredients_path'],
+            seed=options['seed'],
+            stdout=io.StringIO()
+        )
+        user_ids = list(
+            User.objects.filter(pk__gte=first_user_id).order_by(
+                'pk'
+            ).values_list('pk', flat=True)
+        )
+        recipe_ids = list(
+            Recipe.objects.filter(pk__gte=first_recipe_id).order_by(
+                'pk'
+            ).values_list('pk', flat=True)
+        )
+        self.user = User.objects.get(pk=user_ids[0])
+        # Связи клиента добавляются и удаляются с сигналами, которые
+        # обновляют счетчики и ленту клиента, поэтому пересчитывать все
+        # счетчики и ленты повторно не нужно.
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.create_missing(
+                [
+                    Subscription(
+                        subscriber=self.user, subscribing_id=author_id
+                    )
+                    for author_id in user_ids[1:60]
+                ]
+            )
+            for model in (Favorite, ShoppingCart):
+                model.objects.create_missing(
+                    [
+                        model(user=self.user, recipe_id=recipe_id)
+                        for recipe_id in recipe_ids[:60]
+                    ]
+                )
+            # Рецепты для массовых действий, которых нет в списках клиента.
+            self.bulk_recipe_ids = recipe_ids[-11:-1]
+            for model in (Favorite, ShoppingCart):
+                model.objects.filter(
+                    user=self.user, recipe_id__in=self.bulk_recipe_ids
+                ).delete()
+        self.recipe_id = recipe_ids[-1]
+        self.author_id = Recipe.objects.get(pk=self.recipe_id).author_id
+        self.tag_slugs = list(Tag.objects.values_list('slug', flat=True))
+
+    @staticmethod
+    def _max_pk(model):
+        """Возвращает наибольший идентификатор записей модели."""
+        return model.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+
+    def _run(self, page_sizes):
+        """Выполняет запросы ко всем эндпоинтам и сравнивает результаты."""
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        anonymous = APIClient()
+        other_id = User.objects.exclude(
+            subscribers__subscriber=self.user
+        ).exclude(pk=self.user.pk).values_list('id', flat=True).first()
+        tags = '&'.join(f'tags={slug}' for slug in self.tag_slugs[:2])
+        ingredients = '&'.join(
+            f'ingredients={ingredient_id}'
+            for ingredient_id in RecipeIngredient.objects.filter(
+                recipe_id=self.recipe_id
+            ).values_list('ingredient_id', flat=True)
+        )
+
+        paginated = [
+            ('users-list', '/api/users/?{}'),
+            ('users-subscriptions',
+             '/api/users/subscriptions/?recipes_limit=3&{}'),
+            ('users-subscriptions-cursor',
+             '/api/users/subscriptions/?recipes_limit=3&pagination=cursor&{}'),
+            ('recipes-list', '/api/recipes/?{}'),
+            ('recipes-list-cursor', '/api/recipes/?pagination=cursor&{}'),
+            ('recipes-list-tags', f'/api/recipes/?{tags}&{{}}'),
+            ('recipes-list-author',
+             f'/api/recipes/?author={self.author_id}&{{}}'),
+            ('recipes-list-favorited', '/api/recipes/?is_favorited=1&{}'),
+            ('recipes-list-shopping-cart',
+             '/api/recipes/?is_in_shopping_cart=1&{}'),
+            ('recipes-feed', '/api/recipes/feed/?{}'),
+            ('recipes-match', f'/api/recipes/match/?{ingredients}&{{}}'),
+        ]
+        for name, url in paginated:
+            counts = [
+                self._measure('get', url.format(f'limit={size}'), name)
+                for size in page_sizes
+            ]
+            if counts[-1] > counts[0]:
+                self.failures.append(
+                    f'{name}: количество запросов зависит от размера '
+                    f'страницы {page_sizes}: {counts}'
+                )
+        self._measure(
+            'get', f'/api/recipes/?limit={page_sizes[-1]}',
+            'recipes-list-anonymous', client=anonymous
+        )
+
+        recipe_url = f'/api/recipes/{self.recipe_id}/'
+        self._measure('get', f'/api/users/{self.author_id}/', 'users-detail')
+        self._measure('get', '/api/users/me/', 'users-me')
+        self._measure(
+            'post', f'/api/users/{other_id}/subscribe/', 'users-subscribe',
+            status=201
+        )
+        self._measure(
+            'delete', f'/api/users/{other_id}/subscribe/',
+            'users-unsubscribe', status=204
+        )
+        self._measure('get', '/api/tags/', 'tags-list')
+        self._measure(
+            'get', f'/api/tags/{Tag.objects.first().pk}/', 'tags-detail'
+        )
+        self._measure('get', '/api/ingredients/?name=а', 'ingredients-list')
+        self._measure(
+            'get', f'/api/ingredients/{Ingredient.objects.first().pk}/',
+            'ingredients-detail'
+        )
+        self._measure('get', recipe_url, 'recipes-detail')
+        response = self._measure(
+            'get', f'{recipe_url}get-link/', 'recipes-get-link',
+            return_response=True
+        )
+        self._measure(
+            'get', urlsplit(response.data['short-link']).path,
+            'short-link-redirect', status=302, client=anonymous
+        )
+        for action in ('favorite', 'shopping_cart'):
+            Favorite.objects.filter(
+                user=self.user, recipe_id=self.recipe_id
+            ).delete()
+            ShoppingCart.objects.filter(
+                user=self.user, recipe_id=self.recipe_id
+            ).delete()
+            self._measure(
+                'post', f'{recipe_url}{action}/', f'recipes-{action}-add',
+                status=201
+            )
+            self._measure(
+                'delete', f'{recipe_url}{action}/',
+                f'recipes-{action}-remove', status=204
+            )
+        bulk_ids = {'recipes': self.bulk_recipe_ids}
+        for action in ('favorite', 'shopping_cart'):
+            self._measure(
+                'post', f'/api/recipes/{action}/',
+                f'recipes-{action}-bulk-add', bulk_ids, status=201
+            )
+            self._measure(
+                'delete', f'/api/recipes/{action}/',
+                f'recipes-{action}-bulk-remove', bulk_ids, status=204
+            )
+        self._measure(
+            'get', '/api/recipes/download_shopping_cart/',
+            'recipes-download-shopping-cart'
+        )
+        self._measure(
+            'delete', '/api/recipes/shopping_cart/clear/',
+            'recipes-shopping-cart-clear', status=204
+        )
+
+        payload = self._recipe_payload()
+        response = self._measure(
+            'post', '/api/recipes/', 'recipes-create', payload, status=201,
+            return_response=True
+        )
+        created_url = f'/api/recipes/{response.data["id"]}/'
+        payload.pop('image')
+        self._measure(
+            'patch', created_url, 'recipes-update', payload, status=200
+        )
+        recipe = Recipe.objects.get(pk=response.data['id'])
+        recipe.image.delete(save=False)
+        delete_renditions(recipe.image_renditions)
+        self._measure('delete', created_url, 'recipes-delete', status=204)
+
+    def _measure(self, method, url, name, data=None, status=200,
+                 client=None, return_response=False):
+        """Выполняет запрос и сохраняет количество запросов, время и размер."""
+        client = client or self.client
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            with TestCase.captureOnCommitCallbacks(execute=True):
+                response = getattr(client, method)(url, data, format='json')
+            elapsed = (time.perf_counter() - start) * 1000
+        content = b''.join(response) if response.streaming else (
+            response.content
+        )
+        result = {
+            'name': name,
+            'method': method.upper(),
+            'url': url,
+            'status': response.status_code,
+            'queries': len(context),
+            'time_ms': round(elapsed, 2),
+            'size': len(content),
+        }
+        self.results.append(result)
+        self.stdout.write(
+            '{method:6} {name:32} {status:3} {queries:4} запросов '
+            '{time_ms:9.2f} мс {size:8} байт'.format(**result)
+        )
+        if response.status_code != status:
+            self.failures.append(
+                f'{name}: ожидался статус {status}, получен '
+                f'{response.status_code}'
+            )
+        if return_response:
+            return response
+        return len(context)
+
+    def _recipe_payload(self):
+        """Возвращает данные для создания рецепта."""
+        buffer = io.BytesIO()
+        Image.new('RGB', (1, 1)).save(buffer, format='PNG')
+        image = base64.b64encode(buffer.getvalue()).decode()
+        return {
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 10}
+                for ingredient_id in Ingredient.objects.values_list(
+                    'id', flat=True
+                )[:10]
+            ],
+            'tags': list(Tag.objects.values_list('id', flat=True)[:2]),
+            'image': f'data:image/png;base64,{image}',
+            'name': 'Тестовый рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+        }
@@ -0,0 +1,234 @@
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, Subscription
+
+
+SERVERS = {
+    'WSGI (sync)': ['foodgram.wsgi'],
+    'ASGI (uvicorn)': [
+        'foodgram.asgi', '--worker-class', 'uvicorn_worker.UvicornWorker'
+    ],
+}
+
+
+class Command(BaseCommand):
+    """
+    Команда для нагрузочного сравнения синхронного (WSGI) и асинхронного
+    (ASGI) запуска приложения на одном и том же железе.
+
+    Для каждого варианта запускается gunicorn с одинаковым количеством
+    воркеров, после чего эндпоинты чтения рецептов, тегов, ингредиентов и
+    подписок опрашиваются заданным количеством параллельных клиентов.
+    Медленные клиенты держат соединения открытыми, отправляя заголовки
+    запроса по частям, как клиенты на плохой мобильной сети.
+    """
+
+    help = 'Нагрузочное сравнение запуска через WSGI и ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Количество воркеров gunicorn'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Количество параллельных клиентов'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='Длительность замера для каждого варианта, секунд'
+        )
+        parser.add_argument(
+            '--slow-clients',
+            type=int,
+            default=0,
+            help='Количество медленных клиентов'
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8765,
+            help='Порт для запуска gunicorn'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Путь к JSON-файлу для сохранения результатов'
+        )
+
+    def handle(self, *args, **options):
+        paths = self._get_paths()
+        headers = self._get_headers()
+        results = {}
+        for name, server_args in SERVERS.items():
+            self.stdout.write(f'{name}: запуск gunicorn')
+            server = self._start_server(server_args, options)
+            try:
+                results[name] = self._load(paths, headers, options)
+            finally:
+                server.terminate()
+                server.wait()
+        self._report(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+
+    def _get_paths(self):
+        """Возвращает адреса эндпоинтов чтения для замеров."""
+        recipe = Recipe.objects.order_by('-pub_date').first()
+        ingredient = Ingredient.objects.order_by('id').first()
+        if recipe is None or ingredient is None:
+            raise CommandError(
+                'Нет рецептов, выполните команду benchmark_api с --keep'
+            )
+        return [
+            '/api/recipes/',
+            f'/api/recipes/{recipe.id}/',
+            '/api/tags/',
+            f'/api/ingredients/?name={ingredient.name[:2]}',
+            '/api/users/subscriptions/?recipes_limit=3',
+        ]
+
+    def _get_headers(self):
+        """Возвращает заголовок авторизации пользователя с подписками."""
+        subscription = Subscription.objects.select_related(
+            'subscriber'
+        ).first()
+        if subscription is None:
+            raise CommandError(
+                'Нет подписок, выполните команду benchmark_api с --keep'
+            )
+        token, _ = Token.objects.get_or_create(user=subscription.subscriber)
+        return {'Authorization': f'Token {token.key}'}
+
+    def _start_server(self, server_args, options):
+        """Запускает gunicorn и ждет, пока он начнет отвечать."""
+        bind = f'127.0.0.1:{options["port"]}'
+        with socket.socket() as probe:
+            if probe.connect_ex(('127.0.0.1', options['port'])) == 0:
+                raise CommandError(f'Порт {options["port"]} уже занят')
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', *server_args,
+                '--bind', bind,
+                '--workers', str(options['workers']),
+                '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('Не удалось запустить gunicorn')
+            try:
+                requests.get(f'http://{bind}/api/tags/', timeout=5)
+                return server
+            except requests.RequestException:
+                time.sleep(0.2)
+        server.terminate()
+        server.wait()
+        raise CommandError('gunicorn не ответил за 30 секунд')
+
+    def _load(self, paths, headers, options):
+        """Опрашивает эндпоинты и возвращает статистику замера."""
+        base_url = f'http://127.0.0.1:{options["port"]}'
+        stop = threading.Event()
+        timings = []
+        errors = []
+
+        def client(number):
+            session = requests.Session()
+            session.headers.update(headers)
+            index = number
+            while not stop.is_set():
+                path = paths[index % len(paths)]
+                index += 1
+                start = time.perf_counter()
+                try:
+                    response = session.get(base_url + path, timeout=30)
+                    if response.status_code != 200:
+                        errors.append(path)
+                        continue
+                except requests.RequestException:
+                    errors.append(path)
+                    continue
+                timings.append((time.perf_counter() - start) * 1000)
+
+        def slow_client():
+            with socket.create_connection(
+                ('127.0.0.1', options['port']), timeout=60
+            ) as connection:
+                connection.sendall(
+                    b'GET /api/tags/ HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+                )
+                while not stop.wait(1):
+                    try:
+                        connection.sendall(b'X-Slow: 1\r\n')
+                    except OSError:
+                        return
+
+        threads = [
+            threading.Thread(target=slow_client, daemon=True)
+            for _ in range(options['slow_clients'])
+        ]
+        for thread in threads:
+            thread.start()
+        # Медленные клиенты должны успеть занять соединения.
+        time.sleep(1 if threads else 0)
+        clients = [
+            threading.Thread(target=client, args=(number,), daemon=True)
+            for number in range(options['concurrency'])
+        ]
+        start = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in clients:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        timings.sort()
+        return {
+            'requests': len(timings),
+            'errors': len(errors),
+            'rps': len(timings) / elapsed,
+            'mean_ms': statistics.mean(timings) if timings else None,
+            'p50_ms': timings[len(timings) // 2] if timings else None,
+            'p95_ms': timings[int(len(timings) * 0.95)] if timings else None,
+        }
+
+    def _report(self, results):
+        """Выводит таблицу результатов."""
+        self.stdout.write(
+            f'{"Сервер":<16} {"Запросы":>8} {"Ошибки":>7} {"RPS":>8} '
+            f'{"Среднее":>9} {"p50":>9} {"p95":>9}'
+        )
+        for name, result in results.items():
+            timings = ' '.join(
+                f'{result[key]:>7.1f}мс' if result[key] is not None
+                else f'{"-":>9}'
+                for key in ['mean_ms', 'p50_ms', 'p95_ms']
+            )
+            self.stdout.write(
+                f'{name:<16} {result["requests"]:>8} {result["errors"]:>7} '
+                f'{result["rps"]:>8.1f} {timings}'
+            )
@@ -0,0 +1,96 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.autocomplete import IngredientTrie
+from api.filters import IngredientFilter
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    """
+    Команда, которая сравнивает скорость поиска ингредиентов по названию
+    через БД и через индекс названий в памяти.
+
+    Запросы строятся из начала и середины названий существующих
+    ингредиентов, как при наборе названия в редакторе рецепта.
+    """
+
+    help = 'Сравнение поиска ингредиентов через БД и индекс в памяти'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=500,
+            help='Количество поисковых запросов'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=settings.INGREDIENT_AUTOCOMPLETE_LIMIT,
+            help='Ограничение количества результатов'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Начальное значение генератора случайных чисел'
+        )
+
+    def handle(self, *args, **options):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            raise CommandError(
+                'Нет ингредиентов, выполните команду load_ingredients'
+            )
+        generator = random.Random(options['seed'])
+        queries = []
+        for _ in range(options['queries']):
+            name = generator.choice(names)
+            start = generator.choice([0, 0, 0, generator.randrange(len(name))])
+            queries.append(name[start:start + generator.randint(1, 4)])
+        limit = options['limit']
+
+        start = time.perf_counter()
+        trie = IngredientTrie(
+            Ingredient.objects.only('id', 'name', 'measurement_unit')
+        )
+        build_time = (time.perf_counter() - start) * 1000
+        self.stdout.write(
+            f'Построение индекса из {len(names)} ингредиентов: '
+            f'{build_time:.2f} мс'
+        )
+
+        queryset = Ingredient.objects.all()
+        self._report(
+            'БД',
+            queries,
+            lambda query: list(
+                IngredientFilter(
+                    {'name': query}, queryset=queryset
+                ).qs[:limit]
+            )
+        )
+        self._report(
+            'Индекс в памяти',
+            queries,
+            lambda query: trie.search(query, limit)
+        )
+
+    def _report(self, title, queries, search):
+        """Выполняет поиск по всем запросам и выводит статистику времени."""
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f'{title}: среднее {statistics.mean(timings):.3f} мс, '
+            f'медиана {statistics.median(timings):.3f} мс, '
+            f'p95 {timings[int(len(timings) * 0.95)]:.3f} мс'
+        )
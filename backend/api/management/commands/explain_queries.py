@@ -0,0 +1,216 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Ingredient, Recipe, Tag
+
+
+User = get_user_model()
+
+# Полный просмотр таблицы в плане PostgreSQL и SQLite.
+POSTGRES_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+SQLITE_SCAN = re.compile(r'\bSCAN (\w+)(?! USING)')
+# Сортировка в плане EXPLAIN ANALYZE PostgreSQL с фактическим числом строк.
+POSTGRES_SORT_ROWS = re.compile(r'Sort .*actual time=\S+ rows=(\d+)')
+POSTGRES_EXECUTION_TIME = re.compile(r'Execution Time: ([\d.]+) ms')
+# Таблицы и их псевдонимы в SQL, который генерирует Django.
+TABLE_ALIAS = re.compile(r'(?:FROM|JOIN) "(\w+)"(?: ([A-Z]\d+)\b)?')
+# Таблицы, которые просматриваются полностью намеренно: небольшой
+# справочник ингредиентов соединяется с рецептами через hash join.
+SCANNED_TABLES = [Ingredient._meta.db_table]
+
+
+class Command(BaseCommand):
+    """
+    Команда, которая выполняет EXPLAIN для запросов к БД эндпоинтов чтения
+    API и отмечает полные просмотры больших таблиц.
+
+    Запросы не описываются отдельно: команда выполняет запросы к API на
+    текущих данных, перехватывает SQL, который формируют views и фильтры, и
+    получает для каждого запроса план выполнения. В PostgreSQL используется
+    EXPLAIN (ANALYZE), и дополнительно отмечаются сортировки большого числа
+    строк, в SQLite - EXPLAIN QUERY PLAN. Для наполнения БД используйте
+    команду seed_load.
+    """
+
+    help = 'Аудит планов запросов API и поиск полных просмотров таблиц'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Минимальный размер таблицы или сортировки для предупреждения'
+        )
+        parser.add_argument(
+            '--ignore-table',
+            action='append',
+            default=[],
+            help=(
+                'Таблица, полный просмотр которой не считается проблемой; '
+                f'можно указать несколько раз, всегда: {SCANNED_TABLES}'
+            )
+        )
+
+    def handle(self, *args, **options):
+        try:
+            setup_test_environment()
+        except RuntimeError:
+            # Окружение уже подготовлено, например при запуске из тестов.
+            teardown = False
+        else:
+            teardown = True
+        try:
+            self._handle(options)
+        finally:
+            if teardown:
+                teardown_test_environment()
+
+    def _handle(self, options):
+        """Выполняет запросы к API и проверяет их планы."""
+        self.verbosity = options['verbosity']
+        self.min_rows = options['min_rows']
+        self.ignored_tables = {*SCANNED_TABLES, *options['ignore_table']}
+        self.table_sizes = {}
+        user_id = Favorite.objects.values('user').annotate(
+            count=Count('pk')
+        ).order_by('-count').values_list('user', flat=True).first()
+        recipe = Recipe.objects.order_by('-favorites_count').first()
+        if user_id is None or recipe is None:
+            raise CommandError('Нет данных, выполните команду seed_load')
+        author_id = User.objects.order_by(
+            '-recipes_count'
+        ).values_list('pk', flat=True).first()
+        tags = '&'.join(
+            f'tags={slug}'
+            for slug in Tag.objects.values_list('slug', flat=True)[:2]
+        )
+        ingredient = Ingredient.objects.order_by('pk').first()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(pk=user_id))
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        urls = [
+            '/api/recipes/',
+            '/api/recipes/?pagination=cursor',
+            f'/api/recipes/?{tags}',
+            f'/api/recipes/?author={author_id}',
+            '/api/recipes/?is_favorited=1',
+            '/api/recipes/?is_in_shopping_cart=1',
+            '/api/recipes/feed/',
+            f'/api/recipes/{recipe.pk}/',
+            '/api/recipes/download_shopping_cart/',
+            '/api/users/',
+            f'/api/users/{author_id}/',
+            '/api/users/subscriptions/?recipes_limit=3',
+            '/api/users/subscriptions/?recipes_limit=3&pagination=cursor',
+            f'/api/ingredients/?name={ingredient.name[:2]}',
+            '/api/tags/',
+        ]
+        issues = []
+        # Кэш и индекс названий отключаются, чтобы запросы доходили до БД.
+        with override_settings(
+            CACHES={
+                'default': {
+                    'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+                }
+            },
+            INGREDIENT_AUTOCOMPLETE_TRIE=False,
+        ):
+            for url in urls:
+                issues.extend(self._audit(url))
+        if issues:
+            raise CommandError('\n'.join(issues))
+        self.stdout.write(self.style.SUCCESS('Проблем в планах не найдено'))
+
+    def _audit(self, url):
+        """Выполняет запрос к API и проверяет планы всех его SELECT."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+            if response.streaming:
+                # Файл формируется при чтении ответа.
+                b''.join(response.streaming_content)
+        if response.status_code != 200:
+            raise CommandError(f'{url}: статус ответа {response.status_code}')
+        issues = []
+        self.stdout.write(url)
+        for number, query in enumerate(context.captured_queries, start=1):
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            plan = self._explain(sql)
+            problems = self._find_problems(sql, plan)
+            duration = POSTGRES_EXECUTION_TIME.search(plan)
+            self.stdout.write(
+                f'  #{number}: '
+                + (f'{duration.group(1)} мс' if duration else 'план получен')
+                + (f', {"; ".join(problems)}' if problems else '')
+            )
+            if self.verbosity > 1 or problems:
+                self.stdout.write(f'    {sql}')
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+            issues.extend(
+                f'{url} #{number}: {problem}' for problem in problems
+            )
+        return issues
+
+    def _explain(self, sql):
+        """Возвращает план выполнения запроса."""
+        prefix = (
+            'EXPLAIN (ANALYZE)' if connection.vendor == 'postgresql'
+            else 'EXPLAIN QUERY PLAN'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}')
+            return '\n'.join(
+                ' '.join(str(value) for value in row)
+                for row in cursor.fetchall()
+            )
+
+    def _find_problems(self, sql, plan):
+        """Возвращает описания полных просмотров и больших сортировок."""
+        if connection.vendor == 'postgresql':
+            tables = POSTGRES_SEQ_SCAN.findall(plan)
+        else:
+            aliases = {}
+            for table, alias in TABLE_ALIAS.findall(sql):
+                aliases[alias or table] = table
+            tables = [
+                aliases[name] for name in SQLITE_SCAN.findall(plan)
+                if name in aliases
+            ]
+        problems = [
+            f'полный просмотр {table} ({self._table_size(table)} строк)'
+            for table in dict.fromkeys(tables)
+            if table not in self.ignored_tables
+            and self._table_size(table) >= self.min_rows
+        ]
+        problems.extend(
+            f'сортировка {rows} строк'
+            for rows in POSTGRES_SORT_ROWS.findall(plan)
+            if int(rows) >= self.min_rows
+        )
+        return problems
+
+    def _table_size(self, table):
+        """Возвращает количество строк в таблице."""
+        if table not in self.table_sizes:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+                )
+                self.table_sizes[table] = cursor.fetchone()[0]
+        return self.table_sizes[table]
@@ -0,0 +1,233 @@
+import heapq
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+from recipes.models import RecipeIngredient
+
+
+logger = logging.getLogger(__name__)
+
+
+class RecipeMatches:
+    """
+    Рецепты, подходящие под набор ингредиентов, в порядке ранжирования.
+
+    Элементы - кортежи (id рецепта, доля имеющихся ингредиентов, количество
+    недостающих). Поддерживает len() и срезы, поэтому передается в
+    пагинацию как список. Для страницы сортируются только первые элементы
+    через heapq, а не все найденные рецепты.
+    """
+
+    def __init__(self, candidates):
+        # Кортежи (-доля имеющихся ингредиентов, недостает, -id рецепта).
+        self.candidates = candidates
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop, _ = index.indices(len(self.candidates))
+        return [
+            (-negative_id, -negative_coverage, missing)
+            for negative_coverage, missing, negative_id in heapq.nsmallest(
+                stop, self.candidates
+            )[start:]
+        ]
+
+
+class RecipeIngredientIndex:
+    """
+    Инвертированный индекс ингредиентов рецептов.
+
+    Для каждого ингредиента хранится множество рецептов, в которые он
+    входит, а для каждого рецепта - его ингредиенты. Подбор рецептов по
+    набору ингредиентов пользователя складывает множества только этих
+    ингредиентов и не обращается к БД.
+    """
+
+    def __init__(self, pairs=()):
+        self.recipes = defaultdict(set)
+        self.ingredients = {}
+        for recipe_id, ingredient_id in pairs:
+            self.recipes[ingredient_id].add(recipe_id)
+            self.ingredients.setdefault(recipe_id, set()).add(ingredient_id)
+
+    def update(self, recipe_id, ingredient_ids):
+        """Заменяет ингредиенты рецепта."""
+        self.remove(recipe_id)
+        if not ingredient_ids:
+            return
+        self.ingredients[recipe_id] = set(ingredient_ids)
+        for ingredient_id in ingredient_ids:
+            self.recipes[ingredient_id].add(recipe_id)
+
+    def remove(self, recipe_id):
+        """Удаляет рецепт из индекса."""
+        for ingredient_id in self.ingredients.pop(recipe_id, ()):
+            self.recipes[ingredient_id].discard(recipe_id)
+
+    def match(self, ingredient_ids, max_missing=None):
+        """
+        Возвращает рецепты, в которые входит хотя бы один из ингредиентов.
+
+        Рецепты упорядочены по доле имеющихся ингредиентов, затем по
+        количеству недостающих, затем от новых к старым. Если задан
+        max_missing, рецепты, в которых недостает больше ингредиентов,
+        пропускаются.
+        """
+        matched = Counter()
+        for ingredient_id in set(ingredient_ids):
+            matched.update(self.recipes.get(ingredient_id, ()))
+        candidates = []
+        for recipe_id, count in matched.items():
+            missing = len(self.ingredients[recipe_id]) - count
+            if max_missing is not None and missing > max_missing:
+                continue
+            candidates.append(
+                (-count / (count + missing), missing, -recipe_id)
+            )
+        return RecipeMatches(candidates)
+
+
+_index = None
+_built_at = 0
+# Увеличивается при сбросе индекса, чтобы не заменить сброшенный индекс
+# построенным до сброса.
+_generation = 0
+# Рецепты, измененные во время построения индекса, или None.
+_pending = None
+_rebuilding = False
+_executor = None
+_lock = threading.Lock()
+# Не дает строить несколько индексов одновременно.
+_build_lock = threading.Lock()
+
+
+def _is_fresh():
+    return (
+        _index is not None
+        and time.monotonic() - _built_at <= settings.RECIPE_MATCHING_TTL
+    )
+
+
+def _read_ingredients(recipe_ids):
+    """Возвращает ингредиенты рецептов из БД: {id рецепта: [id]}."""
+    ingredients = defaultdict(list)
+    for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'ingredient_id'):
+        ingredients[recipe_id].append(ingredient_id)
+    return ingredients
+
+
+def _rebuild():
+    """
+    Строит индекс и заменяет им текущий, вызывается под _build_lock.
+
+    Индекс строится без _lock: подбор в это время идет по прежнему
+    индексу. Рецепты, измененные во время построения, перечитываются перед
+    заменой, потому что построение могло прочитать их до изменения.
+    """
+    global _index, _built_at, _pending
+    with _lock:
+        generation = _generation
+        _pending = set()
+    try:
+        index = RecipeIngredientIndex(
+            RecipeIngredient.objects.values_list(
+                'recipe_id', 'ingredient_id'
+            ).iterator(chunk_size=10000)
+        )
+        with _lock:
+            if generation == _generation:
+                ingredients = _read_ingredients(_pending)
+                for recipe_id in _pending:
+                    index.update(recipe_id, ingredients.get(recipe_id))
+                _index = index
+                _built_at = time.monotonic()
+            return _index
+    finally:
+        with _lock:
+            _pending = None
+
+
+def _rebuild_in_background():
+    """Перестраивает устаревший индекс в фоновом потоке."""
+    global _rebuilding
+    try:
+        with _build_lock:
+            _rebuild()
+    except Exception:
+        logger.exception('Не удалось перестроить индекс подбора рецептов')
+    finally:
+        with _lock:
+            _rebuilding = False
+        connections.close_all()
+
+
+def get_recipe_ingredient_index():
+    """
+    Возвращает индекс ингредиентов рецептов текущего процесса.
+
+    Индекс строится при первом обращении, остальные запросы ждут
+    окончания этого построения. По истечении RECIPE_MATCHING_TTL секунд
+    (изменения рецептов в других процессах доходят до индекса только при
+    перестроении) индекс перестраивается в фоновом потоке, а запросы до
+    окончания перестроения получают прежний индекс.
+    """
+    global _executor, _rebuilding
+    with _lock:
+        if _index is not None:
+            if not _is_fresh() and not _rebuilding:
+                _rebuilding = True
+                if _executor is None:
+                    _executor = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix='matching'
+                    )
+                _executor.submit(_rebuild_in_background)
+            return _index
+    with _build_lock:
+        with _lock:
+            if _index is not None:
+                return _index
+        return _rebuild()
+
+
+def match_recipes(ingredient_ids, max_missing=None):
+    """Подбирает рецепты по индексу ингредиентов текущего процесса."""
+    return get_recipe_ingredient_index().match(ingredient_ids, max_missing)
+
+
+def refresh_recipe(recipe_id):
+    """Обновляет ингредиенты рецепта в индексе, если он построен."""
+    with _lock:
+        if _pending is not None:
+            _pending.add(recipe_id)
+        if _index is None:
+            return
+        _index.update(recipe_id, _read_ingredients([recipe_id])[recipe_id])
+
+
+def remove_recipe(recipe_id):
+    """Удаляет рецепт из индекса, если он построен."""
+    with _lock:
+        if _pending is not None:
+            _pending.add(recipe_id)
+        if _index is not None:
+            _index.remove(recipe_id)
+
+
+def invalidate_recipe_ingredient_index():
+    """Сбрасывает индекс ингредиентов рецептов текущего процесса."""
+    global _index, _generation
+    with _lock:
+        _index = None
+        _generation += 1
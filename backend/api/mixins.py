@@ -0,0 +1,16 @@
+class AsyncReadMixin:
+    """
+    Миксин для ViewSet из adrf, который выполняет list и retrieve асинхронно.
+
+    Роутер DRF направляет GET-запросы в list и retrieve, поэтому они
+    переопределяются асинхронными alist и aretrieve из adrf. Запросы к БД
+    выполняются через асинхронный интерфейс ORM Django, и пока они ждут
+    ответа, воркер ASGI продолжает обслуживать другие соединения.
+    Остальные действия остаются синхронными и выполняются в потоке.
+    """
+
+    async def list(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def retrieve(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
@@ -0,0 +1,228 @@
+import hashlib
+from datetime import datetime
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+)
+
+
+class LimitPageNumberPagination(PageNumberPagination):
+    """
+    Пагинация по номеру страницы.
+
+    Размер страницы можно изменить query-параметром limit.
+    """
+
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class LimitCursorPagination(CursorPagination):
+    """
+    Пагинация по курсору (keyset).
+
+    Не выполняет COUNT(*) и не использует OFFSET, поэтому время ответа не
+    зависит от глубины страницы. Размер страницы можно изменить
+    query-параметром limit.
+    """
+
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class RecipeCursorPagination(LimitCursorPagination):
+    """Пагинация по курсору для ленты рецептов."""
+
+    ordering = ['-pub_date', 'id']
+
+
+class IdCursorPagination(LimitCursorPagination):
+    """Пагинация по курсору в порядке идентификаторов."""
+
+    ordering = ['id']
+
+
+class FeedCursorPagination(LimitCursorPagination):
+    """
+    Пагинация по курсору для ленты подписок.
+
+    Лента собирается из нескольких источников, поэтому вместо QuerySet
+    страница запрашивается у функции get_page(position, limit). Позиция -
+    дата публикации и id последнего рецепта страницы. Лента листается
+    только вперед.
+    """
+
+    def paginate_feed(self, get_page, request):
+        """Возвращает записи ленты (дата публикации, id рецепта)."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        position = None
+        if cursor is not None:
+            try:
+                pub_date, recipe_id = cursor.position.rsplit('|', 1)
+                position = (datetime.fromisoformat(pub_date), int(recipe_id))
+            except (AttributeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        entries = get_page(position, self.page_size + 1)
+        self.has_next = len(entries) > self.page_size
+        self.has_previous = False
+        self.page = entries[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        pub_date, recipe_id = self.page[-1]
+        return self.encode_cursor(
+            Cursor(
+                offset=0,
+                reverse=False,
+                position=f'{pub_date.isoformat()}|{recipe_id}'
+            )
+        )
+
+    def get_previous_link(self):
+        return None
+
+
+class SelectablePagination(LimitPageNumberPagination):
+    """
+    Пагинация по номеру страницы с переключением на пагинацию по курсору.
+
+    Пагинация по курсору включается query-параметром pagination=cursor или
+    наличием параметра cursor, поэтому существующие клиенты продолжают
+    получать страницы с номерами и общим количеством.
+    """
+
+    cursor_pagination_class = None
+    pagination_query_param = 'pagination'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if (
+            request.query_params.get(self.pagination_query_param) == 'cursor'
+            or 'cursor' in request.query_params
+        ):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class CountPaginator(Paginator):
+    """Paginator, который получает общее количество через count_getter."""
+
+    def __init__(self, object_list, per_page, count_getter, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_getter = count_getter
+
+    @cached_property
+    def count(self):
+        return self.count_getter(self.object_list)
+
+
+class CachedCountPagination(SelectablePagination):
+    """
+    Пагинация по номеру страницы с кэшированием общего количества.
+
+    Количество объектов кэшируется на COUNT_CACHE_TIMEOUT секунд для
+    каждого набора фильтров, кроме фильтров из user_filter_params. Для
+    списка без фильтров в PostgreSQL используется оценка планировщика из
+    pg_class, если она превышает COUNT_ESTIMATE_THRESHOLD. Поле
+    count_is_exact в ответе показывает, было ли количество посчитано точно в
+    рамках этого запроса.
+    """
+
+    count_cache_prefix = None
+    # Фильтры, результат которых зависит от текущего пользователя.
+    user_filter_params = []
+    ignored_query_params = ['page', 'limit', 'pagination', 'cursor']
+
+    @property
+    def django_paginator_class(self):
+        return partial(CountPaginator, count_getter=self.get_count)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count_is_exact = True
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        """Возвращает оценку, кэшированное или точное количество."""
+        filters = sorted(
+            (key, value)
+            for key, values in self.request.query_params.lists()
+            if key not in self.ignored_query_params
+            for value in values
+        )
+        if not filters:
+            estimate = self._get_estimate(queryset.model)
+            if estimate >= settings.COUNT_ESTIMATE_THRESHOLD:
+                self.count_is_exact = False
+                return estimate
+        if any(key in self.user_filter_params for key, _ in filters):
+            # Личные списки пользователя меняются сразу после его действий,
+            # поэтому их количество не кэшируется.
+            return queryset.count()
+        cache_key = '{}:count:{}'.format(
+            self.count_cache_prefix,
+            hashlib.md5(str(filters).encode()).hexdigest()
+        )
+        count = cache.get(cache_key)
+        if count is not None:
+            self.count_is_exact = False
+            return count
+        count = queryset.count()
+        cache.set(cache_key, count, settings.COUNT_CACHE_TIMEOUT)
+        return count
+
+    @staticmethod
+    def _get_estimate(model):
+        """Возвращает оценку количества строк таблицы из pg_class."""
+        if connection.vendor != 'postgresql':
+            return -1
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else -1
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.cursor_paginator is None:
+            response.data['count_is_exact'] = self.count_is_exact
+        return response
+
+
+class RecipePagination(CachedCountPagination):
+    """Пагинация ленты рецептов."""
+
+    cursor_pagination_class = RecipeCursorPagination
+    count_cache_prefix = 'recipes'
+    user_filter_params = ['is_favorited', 'is_in_shopping_cart']
+
+
+class IdPagination(SelectablePagination):
+    """Пагинация списков в порядке идентификаторов."""
+
+    cursor_pagination_class = IdCursorPagination
@@ -0,0 +1,132 @@
+import csv
+import io
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework import status
+from rest_framework.renderers import BaseRenderer
+
+
+class ShoppingCartRenderer(BaseRenderer, ABC):
+    """
+    Базовый рендерер списка покупок.
+
+    Наследники реализуют метод stream(), который построчно формирует файл
+    из итератора ингредиентов со словарями name, measurement_unit и
+    amount. Метод render() используется
+    DRF только для ответов без файла (ошибки, пустой список) и возвращает
+    текст сообщения в формате text/plain.
+    """
+
+    charset = 'utf-8'
+    filename = 'shopping_cart'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if not data or (
+            response is not None
+            and response.status_code == status.HTTP_204_NO_CONTENT
+        ):
+            return b''
+        if response is not None:
+            response['Content-Type'] = (
+                'text/plain; charset=utf-8'
+            )
+        if isinstance(data, dict) and 'detail' in data:
+            data = data['detail']
+        return str(data).encode('utf-8')
+
+    @abstractmethod
+    def stream(self, ingredients):
+        """Возвращает генератор частей файла в байтах."""
+
+    def get_filename(self):
+        return f'{self.filename}.{self.format}'
+
+
+class ShoppingCartTextRenderer(ShoppingCartRenderer):
+    """Рендерер списка покупок в текстовый файл."""
+
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, ingredients):
+        for i, ingredient in enumerate(ingredients, start=1):
+            yield (
+                f'{i}. {ingredient["name"]} - {ingredient["amount"]} '
+                f'({ingredient["measurement_unit"]})\n'
+            ).encode(self.charset)
+
+
+class ShoppingCartCSVRenderer(ShoppingCartRenderer):
+    """Рендерер списка покупок в CSV файл."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+    header = ['Название', 'Количество', 'Единица измерения']
+
+    def stream(self, ingredients):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.header)
+        for ingredient in ingredients:
+            writer.writerow([
+                ingredient['name'],
+                ingredient['amount'],
+                ingredient['measurement_unit']
+            ])
+            yield self._flush(buffer)
+
+    def _flush(self, buffer):
+        """Возвращает накопленные в буфере строки и очищает его."""
+        value = buffer.getvalue().encode(self.charset)
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+
+class ShoppingCartPDFRenderer(ShoppingCartRenderer):
+    """
+    Рендерер списка покупок в PDF файл.
+
+    PDF нельзя отдавать по частям до завершения документа, поэтому файл
+    формируется целиком и возвращается одной частью.
+    """
+
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    font_name = 'ShoppingCartFont'
+    font_size = 12
+    line_height = 7 * mm
+    margin = 20 * mm
+
+    def stream(self, ingredients):
+        if self.font_name not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(
+                TTFont(self.font_name, settings.SHOPPING_CART_PDF_FONT)
+            )
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        _, height = A4
+        y = height - self.margin
+        pdf.setFont(self.font_name, self.font_size)
+        for i, ingredient in enumerate(ingredients, start=1):
+            if y < self.margin:
+                pdf.showPage()
+                pdf.setFont(self.font_name, self.font_size)
+                y = height - self.margin
+            pdf.drawString(
+                self.margin,
+                y,
+                f'{i}. {ingredient["name"]} - {ingredient["amount"]} '
+                f'({ingredient["measurement_unit"]})'
+            )
+            y -= self.line_height
+        pdf.save()
+        yield buffer.getvalue()
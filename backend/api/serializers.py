@@ -1,8 +1,21 @@
 import base64
+import binascii
+import io
+import re
+import uuid
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import (
+    InMemoryUploadedFile,
+    TemporaryUploadedFile,
+)
+from django.db import transaction
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+from rest_framework.settings import api_settings
 
 from recipes.models import (
     Favorite,
@@ -13,25 +26,227 @@ from recipes.models import (
     Subscription,
     Tag,
 )
+from recipes.search import render_snippet
 
 
 User = get_user_model()
 
 
+# Сигнатуры поддерживаемых форматов: (смещение, байты, расширение).
+IMAGE_SIGNATURES = [
+    (0, b'\xff\xd8\xff', 'jpg'),
+    (0, b'\x89PNG\r\n\x1a\n', 'png'),
+    (0, b'GIF87a', 'gif'),
+    (0, b'GIF89a', 'gif'),
+    (8, b'WEBP', 'webp'),
+]
+IMAGE_CONTENT_TYPES = {
+    'jpg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+}
+# Размер части строки Base64 при декодировании, кратен 4.
+BASE64_CHUNK_SIZE = 256 * 1024
+WHITESPACE = re.compile(r'\s+')
+
+
 class Base64ImageField(serializers.ImageField):
     """
     Поле сериализатора для обработки изображений в формате Base64.
 
     Если на вход подается строка вида 'data:image/...;base64,...',
-    поле декодирует её и преобразует в ContentFile.
+    поле декодирует её по частям во временный файл: в памяти, если файл
+    не больше FILE_UPLOAD_MAX_MEMORY_SIZE, иначе на диске. Размер файла
+    проверяется по длине строки до декодирования, а формат определяется
+    по первым байтам файла, а не по заголовку строки. Строки с переносами
+    и без дополнения '=' принимаются.
     """
 
+    default_error_messages = {
+        'invalid_base64': 'Некорректное изображение в формате Base64.',
+        'too_large': 'Размер изображения не должен превышать {max_size} МБ.',
+        'unsupported_format': (
+            'Поддерживаются изображения в форматах JPEG, PNG, GIF и WebP.'
+        ),
+        'too_many_pixels': 'Слишком большое разрешение изображения.',
+    }
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
-        return super().to_internal_value(data)
+            data = self._decode(data)
+        file = super().to_internal_value(data)
+        # Размеры читаются из заголовка файла без декодирования пикселей.
+        width, height = file.image.size
+        if width * height > settings.IMAGE_MAX_PIXELS:
+            self.fail('too_many_pixels')
+        return file
+
+    def _decode(self, data):
+        """Декодирует строку Base64 во временный файл."""
+        # Заголовок ищется только в начале строки, чтобы не копировать ее.
+        header_end = data.find(';base64,', 0, 100)
+        if header_end == -1:
+            self.fail('invalid_base64')
+        start = header_end + len(';base64,')
+        # Строку с переносами строк копируем без пробельных символов.
+        if WHITESPACE.search(data, start):
+            data = WHITESPACE.sub('', data[start:])
+            start = 0
+        length = len(data) - start
+        # Строка без дополнения '=' дополняется при декодировании последней
+        # части, остаток 1 невозможен в корректной строке.
+        if not length or length % 4 == 1:
+            self.fail('invalid_base64')
+        padding = data.count('=', len(data) - 2)
+        size = (length - padding) * 3 // 4
+        if size > settings.IMAGE_MAX_UPLOAD_SIZE:
+            self.fail(
+                'too_large',
+                max_size=settings.IMAGE_MAX_UPLOAD_SIZE // (1024 * 1024)
+            )
+        head = self._decode_chunk(data, start)
+        extension = self._get_extension(head)
+        name = f'{uuid.uuid4().hex}.{extension}'
+        content_type = IMAGE_CONTENT_TYPES[extension]
+        if size > settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+            file = TemporaryUploadedFile(name, content_type, size, None)
+        else:
+            file = InMemoryUploadedFile(
+                io.BytesIO(), None, name, content_type, size, None
+            )
+        file.write(head)
+        for position in range(
+            start + BASE64_CHUNK_SIZE, len(data), BASE64_CHUNK_SIZE
+        ):
+            file.write(self._decode_chunk(data, position))
+        file.seek(0)
+        return file
+
+    def _decode_chunk(self, data, position):
+        """Декодирует часть строки Base64, начиная с position."""
+        chunk = data[position:position + BASE64_CHUNK_SIZE]
+        try:
+            return base64.b64decode(
+                chunk + '=' * (-len(chunk) % 4), validate=True
+            )
+        except binascii.Error:
+            self.fail('invalid_base64')
+
+    def _get_extension(self, head):
+        """Определяет расширение файла по сигнатуре формата."""
+        for offset, signature, extension in IMAGE_SIGNATURES:
+            if head[offset:offset + len(signature)] == signature:
+                return extension
+        self.fail('unsupported_format')
+
+
+class ImageSrcsetField(serializers.Field):
+    """
+    Поле только для чтения с уменьшенными копиями изображения.
+
+    Возвращает словарь с атрибутом srcset для каждого формата, например
+    {'webp': '.../image_thumbnail.webp 200w, .../image_card.webp 600w'},
+    или None, пока копии текущего изображения не созданы.
+    """
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        image = getattr(instance, self.image_field)
+        renditions = getattr(instance, f'{self.image_field}_renditions')
+        if not image or renditions.get('source') != image.name:
+            return None
+        request = self.context.get('request')
+        srcset = {}
+        sizes = {size['width']: size for size in renditions['sizes'].values()}
+        for width, size in sorted(sizes.items()):
+            for extension, name in size['files'].items():
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                srcset.setdefault(extension, []).append(
+                    f'{url} {width}w'
+                )
+        return {
+            extension: ', '.join(urls) for extension, urls in srcset.items()
+        }
+
+
+def get_objects_in_bulk(queryset, ids):
+    """
+    Загружает объекты по списку первичных ключей одним запросом in_bulk.
+
+    Возвращает список объектов в порядке ids (повторяющиеся ключи дают
+    один и тот же объект) и отсортированный список ключей, для которых
+    объекты не найдены.
+    """
+    objects = queryset.order_by().in_bulk(ids)
+    missing_ids = sorted(set(ids) - objects.keys())
+    return [objects.get(pk) for pk in ids], missing_ids
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """
+    Список первичных ключей, объекты которого загружаются одним запросом.
+
+    В отличие от ManyRelatedField, который выполняет отдельный запрос для
+    каждого ключа, все ключи проверяются одним запросом in_bulk, а обо всех
+    несуществующих ключах сообщается одной ошибкой.
+    """
+
+    default_error_messages = {
+        'does_not_exist': 'Объекты не найдены: {pk_values}.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        queryset = self.child_relation.get_queryset()
+        pk_field = queryset.model._meta.pk
+        ids = []
+        for item in data:
+            try:
+                pk = pk_field.to_python(item)
+            except DjangoValidationError:
+                pk = None
+            # to_python() отбрасывает дробную часть, а 1.9 - не ключ 1.
+            if (
+                pk is None or isinstance(item, bool)
+                or isinstance(item, float) and not item.is_integer()
+            ):
+                self.child_relation.fail(
+                    'incorrect_type', data_type=type(item).__name__
+                )
+            ids.append(pk)
+        objects, missing_ids = get_objects_in_bulk(queryset, ids)
+        if missing_ids:
+            self.fail(
+                'does_not_exist',
+                pk_values=', '.join(map(str, missing_ids))
+            )
+        return objects
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Поле первичного ключа, которое при many=True проверяет все ключи одним
+    запросом (BulkManyRelatedField).
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
 
 
 class BaseUserSerializer(serializers.ModelSerializer):
@@ -63,11 +278,16 @@ class UserSerializer(BaseUserSerializer):
 
     is_subscribed = serializers.SerializerMethodField()
     avatar = serializers.ImageField(read_only=True)
+    avatar_srcset = ImageSrcsetField('avatar')
 
     class Meta(BaseUserSerializer.Meta):
-        fields = BaseUserSerializer.Meta.fields + ['is_subscribed', 'avatar']
+        fields = BaseUserSerializer.Meta.fields + [
+            'is_subscribed', 'avatar', 'avatar_srcset'
+        ]
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context['request']
         return (
             request.user.is_authenticated
@@ -116,15 +336,42 @@ class RecipeIngredientReadSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'measurement_unit', 'amount']
 
 
+class RecipeIngredientListSerializer(serializers.ListSerializer):
+    """
+    Список ингредиентов рецепта для записи.
+
+    Ингредиенты всех элементов загружаются одним запросом in_bulk, обо всех
+    несуществующих ингредиентах сообщается одной ошибкой.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        ingredients, missing_ids = get_objects_in_bulk(
+            Ingredient.objects.all(), [item['id'] for item in items]
+        )
+        if missing_ids:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Ингредиенты не найдены: '
+                    f'{", ".join(map(str, missing_ids))}.'
+                ]
+            })
+        for item, ingredient in zip(items, ingredients):
+            item['id'] = ingredient
+        return items
+
+
 class RecipeIngredientWriteSerializer(serializers.ModelSerializer):
     """"Сериализатор для записи ингредиентов рецепта."""
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    # Ингредиент по id загружает RecipeIngredientListSerializer.
+    id = serializers.IntegerField()
     amount = serializers.IntegerField()
 
     class Meta:
         model = RecipeIngredient
         fields = ['id', 'amount']
+        list_serializer_class = RecipeIngredientListSerializer
 
     def validate_amount(self, value):
         if value < 0.1:
@@ -146,6 +393,8 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = Base64ImageField()
+    image_srcset = ImageSrcsetField('image')
+    search_snippet = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -158,17 +407,23 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_srcset',
             'text',
-            'cooking_time'
+            'cooking_time',
+            'search_snippet'
         ]
 
     def get_is_favorited(self, obj):
         """
         Проверяет, добавил ли пользователь рецепт в избранное.
 
+        Использует аннотацию is_favorited, если она есть у рецепта.
+
         Возвращает:
             bool: True, если рецепт в избранном, иначе False.
         """
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context['request']
         return (
             request.user.is_authenticated
@@ -179,15 +434,37 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         """
         Проверяет, добавил ли пользователь рецепт в список покупок.
 
+        Использует аннотацию is_in_shopping_cart, если она есть у рецепта.
+
         Возвращает:
             bool: True, если рецепт в списке попкупок, иначе False.
         """
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context['request']
         return (
             request.user.is_authenticated
             and request.user.shopping_cart.filter(recipe=obj).exists()
         )
 
+    def get_search_snippet(self, obj):
+        """
+        Возвращает фрагмент описания с найденными словами при поиске по
+        параметру search.
+
+        Возвращает:
+            str | None: HTML с найденными словами в тегах <mark> или None,
+            если поиск не выполнялся или СУБД не поддерживает фрагменты.
+        """
+        snippet = getattr(obj, 'search_snippet', None)
+        return render_snippet(snippet) if snippet else None
+
+    def to_representation(self, instance):
+        # Передаем автору флаг подписки, вычисленный для всей страницы.
+        if hasattr(instance, 'is_author_subscribed'):
+            instance.author.is_subscribed = instance.is_author_subscribed
+        return super().to_representation(instance)
+
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
     """Сериализатор для записи рецепта."""
@@ -196,9 +473,10 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         source='recipe_ingredients',
         many=True,
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         many=True,
+        error_messages={'does_not_exist': 'Теги не найдены: {pk_values}.'}
     )
     image = Base64ImageField()
 
@@ -234,6 +512,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             )
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('recipe_ingredients')
         tags = validated_data.pop('tags')
@@ -245,16 +524,23 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         recipe.tags.set(tags)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('recipe_ingredients')
         tags = validated_data.pop('tags')
         instance = super().update(instance, validated_data)
-        instance.recipe_ingredients.all().delete()
-        self._create_recipe_ingredients(instance, ingredients)
+        if self._update_recipe_ingredients(instance, ingredients):
+            ShoppingCart.bump_version(
+                User.objects.filter(shopping_cart__recipe=instance)
+            )
         instance.tags.set(tags)
         return instance
 
     def to_representation(self, instance):
+        # Перечитываем рецепт с теми же подгрузками, что и при чтении.
+        instance = Recipe.objects.with_related().with_user_flags(
+            self.context['request'].user
+        ).get(pk=instance.pk)
         return RecipeReadSerializer(instance, context=self.context).data
 
     @staticmethod
@@ -264,7 +550,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         Параметры:
         - recipe: рецепт, к которому будут привязаны ингредиенты
         - ingredients: список словарей, каждый с ключами:
-            - 'id': идентификатор ингредиента
+            - 'id': ингредиент, уже загруженный при валидации
             - 'amount': количество ингредиента
         """
         ingredient_objects = [
@@ -277,13 +563,91 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         ]
         RecipeIngredient.objects.bulk_create(ingredient_objects)
 
+    @staticmethod
+    def _update_recipe_ingredients(recipe, ingredients):
+        """Приводит ингредиенты рецепта к переданным.
+
+        Переданные ингредиенты сравниваются с сохраненными: новые
+        добавляются одним bulk_create, измененные количества обновляются
+        одним bulk_update, лишние удаляются одним запросом. Неизмененные
+        строки не перезаписываются, поэтому при том же составе запросы на
+        запись не выполняются.
+
+        Параметры:
+        - recipe: рецепт, ингредиенты которого обновляются
+        - ingredients: список словарей в формате _create_recipe_ingredients
+
+        Возвращает:
+            bool: True, если состав или количества изменились.
+        """
+        existing = {
+            item.ingredient_id: item
+            for item in RecipeIngredient.objects.filter(
+                recipe=recipe
+            ).order_by().only('id', 'ingredient_id', 'amount')
+        }
+        created = []
+        changed = []
+        for ingredient in ingredients:
+            item = existing.pop(ingredient['id'].pk, None)
+            if item is None:
+                created.append(
+                    RecipeIngredient(
+                        recipe=recipe,
+                        ingredient=ingredient['id'],
+                        amount=ingredient['amount']
+                    )
+                )
+            elif item.amount != ingredient['amount']:
+                item.amount = ingredient['amount']
+                changed.append(item)
+        if existing:
+            RecipeIngredient.objects.filter(
+                pk__in=[item.pk for item in existing.values()]
+            ).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        if created:
+            RecipeIngredient.objects.bulk_create(created)
+        return bool(existing or changed or created)
+
 
 class RecipeShortSerializer(serializers.ModelSerializer):
     """Сериализатор для сокращенного рецепта."""
 
+    image_srcset = ImageSrcsetField('image')
+
     class Meta:
         model = Recipe
-        fields = ['id', 'name', 'image', 'cooking_time']
+        fields = ['id', 'name', 'image', 'image_srcset', 'cooking_time']
+
+
+class RecipeMatchQuerySerializer(serializers.Serializer):
+    """Сериализатор параметров подбора рецептов по ингредиентам."""
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.RECIPE_MATCHING_MAX_INGREDIENTS
+    )
+    max_missing = serializers.IntegerField(min_value=0, required=False)
+
+
+class RecipeMatchSerializer(RecipeShortSerializer):
+    """
+    Сериализатор рецепта, подобранного по ингредиентам.
+
+    coverage - доля ингредиентов рецепта, которые есть у пользователя,
+    missing_count - количество недостающих ингредиентов.
+    """
+
+    coverage = serializers.FloatField()
+    missing_count = serializers.IntegerField()
+
+    class Meta(RecipeShortSerializer.Meta):
+        fields = RecipeShortSerializer.Meta.fields + [
+            'coverage', 'missing_count'
+        ]
 
 
 class SubscribedUserWithRecipesSerializer(UserSerializer):
@@ -303,7 +667,8 @@ class SubscribedUserWithRecipesSerializer(UserSerializer):
             'is_subscribed',
             'recipes',
             'recipes_count',
-            'avatar'
+            'avatar',
+            'avatar_srcset'
         ]
 
     def get_recipes(self, obj):
@@ -311,12 +676,16 @@ class SubscribedUserWithRecipesSerializer(UserSerializer):
         Возвращает список рецептов.
 
         Если в query-параметрах передан recipes_limit и он является числом,
-        возвращается только указанное количество рецептов.
+        возвращается только указанное количество рецептов. Если рецепты уже
+        загружены в атрибут short_recipes с учетом recipes_limit, они
+        используются без запроса к БД.
 
         Возвращает:
             list: Список рецептов, сериализованных с помощью
             RecipeShortSerializer.
         """
+        if hasattr(obj, 'short_recipes'):
+            return RecipeShortSerializer(obj.short_recipes, many=True).data
         request = self.context.get('request')
         recipes_limit = (
             request.query_params.get('recipes_limit') if request else None
@@ -327,80 +696,89 @@ class SubscribedUserWithRecipesSerializer(UserSerializer):
         return RecipeShortSerializer(recipes_queryset, many=True).data
 
 
-class SubscribeSerializer(serializers.ModelSerializer):
-    """Сериализатор для подписки на пользователя."""
-
-    subscribing = (
-        serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
-    )
+class SubscribeSerializer(serializers.Serializer):
+    """
+    Сериализатор для подписки на пользователя.
 
-    class Meta:
-        model = Subscription
-        fields = ['subscribing']
+    Пользователь, на которого оформляется подписка, передается в
+    context['subscribing'] уже загруженным. Подписка добавляется одним
+    запросом без предварительной проверки: повторная подписка, в том числе
+    одновременная, определяется по количеству добавленных строк.
+    """
 
     def validate(self, data):
-        subscriber = self.context['request'].user
-        subscribing = data['subscribing']
-
-        if subscriber == subscribing:
+        if self.context['request'].user == self.context['subscribing']:
             raise serializers.ValidationError(
                 'Нельзя подписаться на самого себя.'
             )
-        if Subscription.objects.filter(
-            subscriber=subscriber, subscribing=subscribing
-        ).exists():
-            raise serializers.ValidationError(
-                'Вы уже подписаны на этого пользователя.'
-            )
         return data
 
     def save(self):
-        subscription = Subscription.objects.create(
-            subscriber=self.context['request'].user,
-            subscribing=self.validated_data['subscribing']
-        )
-        return subscription
+        created = Subscription.objects.create_missing([
+            Subscription(
+                subscriber=self.context['request'].user,
+                subscribing=self.context['subscribing']
+            )
+        ])
+        if not created:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже подписаны на этого пользователя.'
+                ]
+            })
+        self.instance = created[0]
+        return self.instance
+
+
+class UserRecipeSerializer(serializers.Serializer):
+    """
+    Базовый сериализатор для добавления рецепта в список пользователя.
 
+    Рецепт передается в context['recipe'] уже загруженным. Запись
+    добавляется одним запросом без предварительной проверки: повторное
+    добавление, в том числе одновременное, определяется по количеству
+    добавленных строк.
+    """
 
-class FavoriteSerializer(serializers.ModelSerializer):
-    """Сериализатор для добавления рецепта в избранное."""
+    model = None
 
-    class Meta:
-        model = Favorite
-        fields = ['user', 'recipe']
+    def save(self):
+        created = self.model.objects.create_missing([
+            self.model(
+                user=self.context['request'].user,
+                recipe=self.context['recipe']
+            )
+        ])
+        if not created:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: ['Рецепт уже добавлен.']
+            })
+        self.instance = created[0]
+        return self.instance
 
-    def validate(self, attrs):
-        user_id = attrs.get('user')
-        recipe_id = attrs.get('recipe')
+    def to_representation(self, instance):
+        return RecipeShortSerializer(
+            instance.recipe, context=self.context
+        ).data
 
-        if Favorite.objects.filter(
-            user=user_id,
-            recipe=recipe_id
-        ).exists():
-            raise serializers.ValidationError('Рецепт уже добавлен.')
-        return attrs
 
-    def to_representation(self, instance):
-        return RecipeShortSerializer(instance, context=self.context).data
+class RecipeIdsSerializer(serializers.Serializer):
+    """Сериализатор идентификаторов рецептов для массовых действий."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.RECIPE_BULK_MAX_IDS
+    )
 
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
-    """Сериализатор для добавления рецепта в список покупок."""
+class FavoriteSerializer(UserRecipeSerializer):
+    """Сериализатор для добавления рецепта в избранное."""
 
-    class Meta:
-        model = ShoppingCart
-        fields = ['user', 'recipe']
+    model = Favorite
 
-    def validate(self, attrs):
-        user_id = attrs.get('user')
-        recipe_id = attrs.get('recipe')
 
-        if ShoppingCart.objects.filter(
-            user=user_id,
-            recipe=recipe_id
-        ).exists():
-            raise serializers.ValidationError('Рецепт уже добавлен.')
-        return attrs
+class ShoppingCartSerializer(UserRecipeSerializer):
+    """Сериализатор для добавления рецепта в список покупок."""
 
-    def to_representation(self, instance):
-        return RecipeShortSerializer(instance, context=self.context).data
+    model = ShoppingCart
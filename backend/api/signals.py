@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.autocomplete import invalidate_ingredient_trie
+from api.cache import invalidate_cache
+from api.matching import (
+    invalidate_recipe_ingredient_index,
+    refresh_recipe,
+    remove_recipe,
+)
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.signals import ingredients_loaded
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def tag_changed(sender, **kwargs):
+    """Сбрасывает кэш тегов при их изменении."""
+    invalidate_cache('tags')
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+@receiver(ingredients_loaded)
+def ingredient_changed(sender, **kwargs):
+    """
+    Сбрасывает кэш и индекс названий ингредиентов при их изменении.
+    """
+    invalidate_cache('ingredients')
+    invalidate_ingredient_trie()
+
+
+@receiver(post_delete, sender=Ingredient)
+def ingredient_deleted(sender, **kwargs):
+    """
+    Сбрасывает индекс подбора рецептов: ингредиент удаляется из рецептов
+    каскадно.
+    """
+    invalidate_recipe_ingredient_index()
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, update_fields, **kwargs):
+    """
+    Обновляет рецепт в индексе подбора после коммита транзакции, в которой
+    записаны и его ингредиенты.
+
+    Сохранение отдельных полей (update_fields) ингредиенты не меняет.
+    """
+    if update_fields is not None:
+        return
+    recipe_id = instance.pk
+    transaction.on_commit(lambda: refresh_recipe(recipe_id))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """Удаляет рецепт из индекса подбора после коммита транзакции."""
+    recipe_id = instance.pk
+    transaction.on_commit(lambda: remove_recipe(recipe_id))
@@ -0,0 +1,67 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient
+from rest_framework.authtoken.models import Token
+
+from api.tests.utils import APITestCase
+from recipes.models import ShoppingCart
+from recipes.tests.utils import create_recipe
+
+
+class AsgiTests(APITestCase):
+    """Асинхронные действия чтения и выгрузка списка покупок под ASGI."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = create_recipe(
+            cls.author,
+            ingredients=[(cls.ingredients[0], 100), (cls.ingredients[1], 5)],
+            tags=cls.tags[:1]
+        )
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipe)
+
+    def setUp(self):
+        super().setUp()
+        self.async_client = AsyncClient()
+        self.token = Token.objects.get(user=self.user)
+
+    def async_get(self, url):
+        return async_to_sync(self.async_client.get)(
+            url, headers={'Authorization': f'Token {self.token.key}'}
+        )
+
+    def test_read_actions_match_wsgi(self):
+        for url in (
+            '/api/recipes/',
+            f'/api/recipes/{self.recipe.pk}/',
+            '/api/users/',
+            '/api/users/me/',
+            '/api/users/subscriptions/',
+            '/api/tags/',
+            '/api/ingredients/?name=Мол',
+        ):
+            with self.subTest(url=url):
+                cache.clear()
+                response = self.async_get(url)
+                self.assertEqual(response.status_code, 200)
+                cache.clear()
+                self.assertEqual(response.json(), self.client.get(url).json())
+
+    def test_shopping_cart_is_streamed_asynchronously(self):
+        url = '/api/recipes/download_shopping_cart/?format=txt'
+        response = self.async_get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = async_to_sync(self._read)(response)
+        self.assertEqual(content, '1. Молоко - 100 (мл)\n2. Мука - 5 (г)\n')
+        # Файл, отданный по частям, сохранен в кэш целиком.
+        response = self.client.get(url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.content.decode(), content)
+
+    @staticmethod
+    async def _read(response):
+        return b''.join(
+            [chunk async for chunk in response.streaming_content]
+        ).decode()
@@ -0,0 +1,91 @@
+import base64
+import textwrap
+from unittest import mock
+
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import ValidationError
+
+from api.serializers import Base64ImageField
+from recipes.tests.utils import make_image
+
+
+class Base64ImageFieldTests(SimpleTestCase):
+    """Декодирование изображений в формате Base64."""
+
+    def setUp(self):
+        self.field = Base64ImageField()
+        self.content = make_image((50, 40), 'PNG')
+        self.encoded = base64.b64encode(self.content).decode()
+
+    def decode(self, encoded, header='data:image/png;base64,'):
+        file = self.field.to_internal_value(header + encoded)
+        file.seek(0)
+        return file
+
+    def assertInvalid(self, encoded, message, **kwargs):
+        with self.assertRaisesMessage(ValidationError, message):
+            self.decode(encoded, **kwargs)
+
+    def test_round_trip(self):
+        file = self.decode(self.encoded)
+        self.assertEqual(file.read(), self.content)
+        self.assertTrue(file.name.endswith('.png'))
+        self.assertEqual(file.content_type, 'image/png')
+
+    def test_line_wrapped_and_unpadded_strings(self):
+        for length in range(len(self.content) - 2, len(self.content) + 1):
+            content = self.content + b'\0' * (length - len(self.content))
+            encoded = base64.b64encode(content).decode()
+            for value in (
+                '\n'.join(textwrap.wrap(encoded, 76)),
+                encoded.rstrip('='),
+                '\r\n'.join(textwrap.wrap(encoded.rstrip('='), 64)),
+            ):
+                with self.subTest(length=length, value=value[-10:]):
+                    self.assertEqual(self.decode(value).read(), content)
+
+    def test_string_is_decoded_in_chunks(self):
+        for encoded in (self.encoded, self.encoded.rstrip('=')):
+            with mock.patch('api.serializers.BASE64_CHUNK_SIZE', 16):
+                self.assertEqual(self.decode(encoded).read(), self.content)
+
+    def test_format_is_detected_by_content(self):
+        content = make_image(image_format='JPEG')
+        file = self.decode(base64.b64encode(content).decode())
+        self.assertTrue(file.name.endswith('.jpg'))
+        self.assertEqual(file.content_type, 'image/jpeg')
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=10)
+    def test_large_file_is_written_to_disk(self):
+        file = self.decode(self.encoded)
+        self.assertIsInstance(file, TemporaryUploadedFile)
+        self.assertEqual(file.read(), self.content)
+
+    def test_invalid_strings(self):
+        message = 'Некорректное изображение в формате Base64.'
+        self.assertInvalid(self.encoded, message, header='data:image/png,')
+        self.assertInvalid('', message)
+        self.assertInvalid(self.encoded[:-1] + '!', message)
+        self.assertInvalid(self.encoded[:4 * 10 + 1], message)
+
+    @override_settings(IMAGE_MAX_UPLOAD_SIZE=1024 * 1024)
+    def test_size_is_checked_before_decoding(self):
+        encoded = 'A' * (1024 * 1024 // 3 * 4 + 4)
+        with mock.patch.object(Base64ImageField, '_decode_chunk') as decode:
+            self.assertInvalid(
+                encoded, 'Размер изображения не должен превышать 1 МБ.'
+            )
+        decode.assert_not_called()
+
+    def test_unsupported_format(self):
+        self.assertInvalid(
+            base64.b64encode(b'<svg></svg>').decode(),
+            'Поддерживаются изображения в форматах JPEG, PNG, GIF и WebP.'
+        )
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels(self):
+        self.assertInvalid(
+            self.encoded, 'Слишком большое разрешение изображения.'
+        )
@@ -0,0 +1,35 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+
+from api.tests.utils import APITestCase
+from recipes.models import Recipe
+
+
+class BenchmarkApiCommandTests(APITestCase):
+    """Команда benchmark_api проходит на небольшом наборе данных."""
+
+    def test_benchmark_reports_every_endpoint_and_rolls_back(self):
+        recipes = Recipe.objects.count()
+        stdout = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command(
+                'benchmark_api', users=20, recipes=40, output=output,
+                stdout=stdout
+            )
+            with open(output, encoding='utf-8') as file:
+                results = json.load(file)
+        self.assertIn('Регрессий не обнаружено', stdout.getvalue())
+        names = {result['name'] for result in results}
+        self.assertTrue(
+            {
+                'recipes-list', 'recipes-feed', 'recipes-create',
+                'short-link-redirect', 'recipes-download-shopping-cart',
+            } <= names
+        )
+        self.assertTrue(all(result['queries'] > 0 for result in results))
+        self.assertEqual(Recipe.objects.count(), recipes)
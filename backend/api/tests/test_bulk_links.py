@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.utils import APITestCase
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.tests.utils import create_recipe
+
+
+class BulkLinkTests(APITestCase):
+    """Массовое добавление рецептов в избранное и список покупок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = [
+            create_recipe(cls.author, name=f'Рецепт {index}')
+            for index in range(4)
+        ]
+        cls.ids = [recipe.pk for recipe in cls.recipes]
+
+    def post(self, name, ids):
+        return self.client.post(
+            f'/api/recipes/{name}/', {'recipes': ids}, format='json'
+        )
+
+    def delete(self, name, ids):
+        return self.client.delete(
+            f'/api/recipes/{name}/', {'recipes': ids}, format='json'
+        )
+
+    def counts(self, field):
+        return list(
+            Recipe.objects.filter(pk__in=self.ids).order_by('pk').values_list(
+                field, flat=True
+            )
+        )
+
+    def test_add_and_remove(self):
+        for name, model, field in [
+            ('favorite', Favorite, 'favorites_count'),
+            ('shopping_cart', ShoppingCart, 'in_carts_count'),
+        ]:
+            with self.subTest(name=name):
+                response = self.post(name, self.ids[:3] + self.ids[:1])
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(
+                    [recipe['id'] for recipe in response.data],
+                    self.ids[:3]
+                )
+                self.assertEqual(self.counts(field), [1, 1, 1, 0])
+                # Уже добавленные рецепты пропускаются.
+                response = self.post(name, self.ids[2:])
+                self.assertEqual(
+                    [recipe['id'] for recipe in response.data],
+                    self.ids[3:]
+                )
+                response = self.post(name, self.ids[:2])
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(
+                    response.data,
+                    {'non_field_errors': ['Рецепты уже добавлены.']}
+                )
+                response = self.delete(name, self.ids[1:])
+                self.assertEqual(response.status_code, 204)
+                self.assertEqual(
+                    list(model.objects.values_list('recipe_id', flat=True)),
+                    self.ids[:1]
+                )
+                self.assertEqual(self.counts(field), [1, 0, 0, 0])
+                response = self.delete(name, self.ids[1:])
+                self.assertEqual(response.status_code, 400)
+
+    def test_queries_do_not_depend_on_number_of_recipes(self):
+        query_counts = []
+        for ids in [self.ids[:1], self.ids[1:]]:
+            with CaptureQueriesContext(connection) as context:
+                response = self.post('shopping_cart', ids)
+            self.assertEqual(response.status_code, 201)
+            query_counts.append(len(context))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_shopping_cart_version_changes_once(self):
+        self.user.refresh_from_db(fields=['shopping_cart_version'])
+        version = self.user.shopping_cart_version
+        self.post('shopping_cart', self.ids)
+        self.user.refresh_from_db(fields=['shopping_cart_version'])
+        self.assertEqual(self.user.shopping_cart_version, version + 1)
+        self.delete('shopping_cart', self.ids)
+        self.user.refresh_from_db(fields=['shopping_cart_version'])
+        self.assertEqual(self.user.shopping_cart_version, version + 2)
+
+    def test_clear_shopping_cart(self):
+        self.post('shopping_cart', self.ids)
+        ShoppingCart.objects.create(user=self.author, recipe=self.recipes[0])
+        response = self.client.delete('/api/recipes/shopping_cart/clear/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            list(ShoppingCart.objects.values_list('user', flat=True)),
+            [self.author.pk]
+        )
+        self.assertEqual(self.counts('in_carts_count'), [1, 0, 0, 0])
+        response = self.client.delete('/api/recipes/shopping_cart/clear/')
+        self.assertEqual(response.status_code, 204)
+
+    def test_invalid_ids(self):
+        for ids in [
+            [], ['abc'], [0], list(range(1, settings.RECIPE_BULK_MAX_IDS + 2))
+        ]:
+            with self.subTest(ids=ids[:3]):
+                response = self.post('favorite', ids)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('recipes', response.data)
+        response = self.post('favorite', [self.ids[0], 10**6, 10**6 + 1])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data,
+            {'recipes': [f'Рецепты не найдены: {10**6}, {10**6 + 1}.']}
+        )
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_anonymous(self):
+        for method in [self.anonymous.post, self.anonymous.delete]:
+            response = method(
+                '/api/recipes/favorite/', {'recipes': self.ids},
+                format='json'
+            )
+            self.assertEqual(response.status_code, 401)
+        self.assertEqual(
+            self.anonymous.delete(
+                '/api/recipes/shopping_cart/clear/'
+            ).status_code,
+            401
+        )
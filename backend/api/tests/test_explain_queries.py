@@ -0,0 +1,28 @@
+import io
+
+from django.core.management import CommandError, call_command
+
+from api.tests.utils import APITestCase
+
+
+class ExplainQueriesCommandTests(APITestCase):
+    """Аудит планов запросов API командой explain_queries."""
+
+    def explain(self, **options):
+        stdout = io.StringIO()
+        call_command('explain_queries', stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_requires_data(self):
+        with self.assertRaisesMessage(CommandError, 'seed_load'):
+            self.explain()
+
+    def test_reports_plans_and_full_scans(self):
+        call_command(
+            'seed_load', users=20, recipes=40, stdout=io.StringIO()
+        )
+        output = self.explain(min_rows=10 ** 6, verbosity=2)
+        for url in ('/api/recipes/feed/', '/api/users/subscriptions/'):
+            self.assertIn(url, output)
+        self.assertIn('SELECT', output)
+        self.assertIn('Проблем в планах не найдено', output)
@@ -0,0 +1,59 @@
+from api.tests.utils import APITestCase
+from recipes.models import Subscription
+from recipes.tests.utils import create_recipe, create_user
+
+
+class FeedAPITests(APITestCase):
+    """Эндпоинт ленты подписок /api/recipes/feed/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = [create_recipe(cls.author) for _ in range(5)]
+        create_recipe(create_user('stranger'))
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.create(
+                subscriber=self.user, subscribing=self.author
+            )
+
+    def test_pages_by_cursor(self):
+        ids, url = [], '/api/recipes/feed/?limit=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            self.assertIsNone(response.data['previous'])
+            ids.extend(recipe['id'] for recipe in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(ids, [recipe.pk for recipe in reversed(self.recipes)])
+
+    def test_recipe_fields(self):
+        response = self.client.get('/api/recipes/feed/?limit=1')
+        recipe = response.data['results'][0]
+        self.assertEqual(recipe['author']['id'], self.author.pk)
+        self.assertTrue(recipe['author']['is_subscribed'])
+
+    def test_deleted_recipe_skipped(self):
+        self.recipes[-1].delete()
+        response = self.client.get('/api/recipes/feed/?limit=1')
+        self.assertEqual(
+            response.data['results'][0]['id'], self.recipes[-2].pk
+        )
+
+    def test_empty_feed(self):
+        self.authenticate(self.author)
+        response = self.client.get('/api/recipes/feed/')
+        self.assertEqual(response.data['results'], [])
+        self.assertIsNone(response.data['next'])
+
+    def test_errors(self):
+        self.assertEqual(
+            self.anonymous.get('/api/recipes/feed/').status_code, 401
+        )
+        self.assertEqual(
+            self.client.get('/api/recipes/feed/?cursor=invalid').status_code,
+            404
+        )
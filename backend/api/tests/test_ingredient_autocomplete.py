@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import override_settings
+
+from api.tests.utils import APITestCase
+from recipes.models import Ingredient
+
+
+INGREDIENTS_URL = '/api/ingredients/'
+
+
+class IngredientAutocompleteTests(APITestCase):
+    """Поиск ингредиентов по названию."""
+
+    def search(self, **params):
+        response = self.anonymous.get(INGREDIENTS_URL, params)
+        self.assertEqual(response.status_code, 200)
+        return [ingredient['name'] for ingredient in response.data]
+
+    def test_empty_name_returns_all_ingredients(self):
+        expected = sorted(ingredient.name for ingredient in self.ingredients)
+        self.assertEqual(sorted(self.search()), expected)
+        self.assertEqual(sorted(self.search(name='')), expected)
+
+    def test_prefix_matches_go_first(self):
+        Ingredient.objects.create(name='Олива', measurement_unit='г')
+        self.assertEqual(
+            self.search(name='ол'), ['Олива', 'Молоко', 'Соль']
+        )
+
+    def test_search_is_case_insensitive(self):
+        self.assertEqual(self.search(name='МОЛ'), ['Молоко'])
+
+    def test_limit(self):
+        self.assertEqual(
+            self.search(name='о', limit=2), ['Масло сливочное', 'Молоко']
+        )
+        with override_settings(INGREDIENT_AUTOCOMPLETE_MAX_LIMIT=1):
+            self.assertEqual(
+                self.search(name='о', limit=50), ['Масло сливочное']
+            )
+        with override_settings(INGREDIENT_AUTOCOMPLETE_LIMIT=1):
+            self.assertEqual(
+                self.search(name='о', limit='x'), ['Масло сливочное']
+            )
+
+    def test_database_search_matches_index(self):
+        expected = self.search(name='о')
+        self.assertEqual(expected, ['Масло сливочное', 'Молоко', 'Соль'])
+        # Ответы кэшируются по query-параметрам.
+        cache.clear()
+        with override_settings(INGREDIENT_AUTOCOMPLETE_TRIE=False):
+            self.assertEqual(self.search(name='о'), expected)
+
+    def test_new_ingredient_is_found(self):
+        self.assertEqual(self.search(name='Мак'), [])
+        Ingredient.objects.create(name='Мак', measurement_unit='г')
+        self.assertEqual(self.search(name='Мак'), ['Мак'])
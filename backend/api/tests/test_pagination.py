@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from api.tests.utils import APITestCase
+from recipes.models import Recipe, Subscription
+from recipes.tests.utils import create_recipe, create_user
+
+
+class CursorPaginationTests(APITestCase):
+    """Пагинация по курсору для рецептов и подписок."""
+
+    def walk(self, url):
+        """Проходит все страницы по ссылкам next и возвращает id объектов."""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_recipes_in_publication_order(self):
+        recipes = [create_recipe(self.author) for _ in range(7)]
+        # Рецепты с одинаковой датой публикации упорядочены по id.
+        now = timezone.now()
+        for index, recipe in enumerate(recipes):
+            Recipe.objects.filter(pk=recipe.pk).update(
+                pub_date=now - timedelta(days=index // 3)
+            )
+        expected = list(
+            Recipe.objects.order_by('-pub_date', 'id').values_list(
+                'id', flat=True
+            )
+        )
+        self.assertEqual(
+            self.walk('/api/recipes/?pagination=cursor&limit=2'), expected
+        )
+
+    def test_page_number_pagination_is_default(self):
+        create_recipe(self.author)
+        response = self.client.get('/api/recipes/?limit=1')
+        self.assertEqual(response.data['count'], 1)
+        self.assertIsNone(response.data['next'])
+
+    def test_subscriptions_in_id_order(self):
+        authors = [create_user(f'author{index}') for index in range(5)]
+        Subscription.objects.bulk_create(
+            Subscription(subscriber=self.user, subscribing=author)
+            for author in authors
+        )
+        self.assertEqual(
+            self.walk(
+                '/api/users/subscriptions/?pagination=cursor&limit=2'
+            ),
+            [author.pk for author in authors]
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/recipes/?cursor=invalid')
+        self.assertEqual(response.status_code, 404)
+
+
+class CachedCountTests(APITestCase):
+    """Кэширование общего количества рецептов в пагинации по страницам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for _ in range(3):
+            create_recipe(cls.author, tags=cls.tags[:1])
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_count_is_cached_per_filters(self):
+        url = f'/api/recipes/?tags={self.tags[0].slug}'
+        data = self.get(url)
+        self.assertEqual((data['count'], data['count_is_exact']), (3, True))
+        create_recipe(self.author, tags=self.tags[:1])
+        data = self.get(f'{url}&page=1&limit=2')
+        self.assertEqual((data['count'], data['count_is_exact']), (3, False))
+        data = self.get(f'/api/recipes/?tags={self.tags[1].slug}')
+        self.assertEqual((data['count'], data['count_is_exact']), (0, True))
+
+    def test_user_filters_are_not_cached(self):
+        url = '/api/recipes/?is_favorited=1'
+        self.assertEqual(self.get(url)['count'], 0)
+        self.client.post(
+            f'/api/recipes/{Recipe.objects.first().pk}/favorite/'
+        )
+        data = self.get(url)
+        self.assertEqual((data['count'], data['count_is_exact']), (1, True))
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=0)
+    def test_estimate_for_unfiltered_list(self):
+        if connection.vendor == 'postgresql':
+            # Оценка появляется в pg_class после сбора статистики.
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Recipe._meta.db_table}')
+            data = self.get('/api/recipes/')
+            self.assertEqual(
+                (data['count'], data['count_is_exact']), (3, False)
+            )
+        else:
+            data = self.get('/api/recipes/')
+            self.assertEqual(
+                (data['count'], data['count_is_exact']), (3, True)
+            )
+
+    def test_cursor_pagination_has_no_count(self):
+        data = self.get('/api/recipes/?pagination=cursor')
+        self.assertNotIn('count', data)
+        self.assertNotIn('count_is_exact', data)
@@ -0,0 +1,72 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.utils import APITestCase
+from recipes.models import Favorite, ShoppingCart
+from recipes.tests.utils import create_recipe
+
+
+class RecipeFilterTests(APITestCase):
+    """Фильтры списка рецептов по связанным таблицам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        breakfast, lunch, dinner = cls.tags
+        cls.all_tags = create_recipe(cls.author, tags=cls.tags)
+        cls.breakfast = create_recipe(cls.author, tags=[breakfast])
+        cls.dinner = create_recipe(cls.user, tags=[dinner])
+        cls.untagged = create_recipe(cls.user)
+        Favorite.objects.create(user=cls.user, recipe=cls.breakfast)
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.dinner)
+
+    def filter_ids(self, query, client=None):
+        response = (client or self.client).get(f'/api/recipes/?{query}')
+        self.assertEqual(response.status_code, 200)
+        ids = [recipe['id'] for recipe in response.data['results']]
+        self.assertEqual(response.data['count'], len(ids))
+        return set(ids)
+
+    def test_several_tags_do_not_duplicate_recipes(self):
+        query = '&'.join(f'tags={tag.slug}' for tag in self.tags)
+        with CaptureQueriesContext(connection) as context:
+            ids = self.filter_ids(query)
+        self.assertEqual(
+            ids, {self.all_tags.pk, self.breakfast.pk, self.dinner.pk}
+        )
+        self.assertFalse(
+            any('DISTINCT' in item['sql'] for item in context.captured_queries)
+        )
+
+    def test_single_tag(self):
+        self.assertEqual(
+            self.filter_ids('tags=breakfast'),
+            {self.all_tags.pk, self.breakfast.pk}
+        )
+
+    def test_author(self):
+        self.assertEqual(
+            self.filter_ids(f'author={self.user.pk}'),
+            {self.dinner.pk, self.untagged.pk}
+        )
+
+    def test_user_lists(self):
+        self.assertEqual(
+            self.filter_ids('is_favorited=1'), {self.breakfast.pk}
+        )
+        self.assertEqual(
+            self.filter_ids('is_in_shopping_cart=1&tags=dinner'),
+            {self.dinner.pk}
+        )
+        self.assertEqual(
+            self.filter_ids('is_in_shopping_cart=1&tags=breakfast'), set()
+        )
+
+    def test_user_lists_are_ignored_for_anonymous(self):
+        self.assertEqual(
+            self.filter_ids('is_favorited=1', client=self.anonymous),
+            {
+                self.all_tags.pk, self.breakfast.pk, self.dinner.pk,
+                self.untagged.pk
+            }
+        )
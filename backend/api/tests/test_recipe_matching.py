@@ -0,0 +1,214 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from api import matching
+from api.tests.utils import APITestCase
+from recipes.models import RecipeIngredient
+from recipes.tests.utils import create_recipe, make_base64_image
+
+
+class RecipeMatchingTests(APITestCase):
+    """Подбор рецептов по ингредиентам, которые есть у пользователя."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        milk, flour, eggs, sugar, salt, _ = cls.ingredients
+        cls.pancakes = create_recipe(
+            cls.author, 'Блины', ingredients=[(milk, 1), (flour, 1)]
+        )
+        cls.cake = create_recipe(
+            cls.author, 'Бисквит',
+            ingredients=[(flour, 1), (eggs, 1), (sugar, 1)]
+        )
+        cls.omelette = create_recipe(
+            cls.author, 'Омлет', ingredients=[(milk, 1), (eggs, 1)]
+        )
+        cls.brine = create_recipe(
+            cls.author, 'Рассол', ingredients=[(salt, 1)]
+        )
+
+    def match(self, *ingredients, **params):
+        response = self.client.get(
+            '/api/recipes/match/',
+            {'ingredients': [item.pk for item in ingredients], **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [
+            (recipe['id'], recipe['coverage'], recipe['missing_count'])
+            for recipe in response.data['results']
+        ]
+
+    def test_ranking(self):
+        milk, flour = self.ingredients[:2]
+        self.assertEqual(
+            self.match(milk, flour),
+            [
+                (self.pancakes.pk, 1.0, 0),
+                (self.omelette.pk, 0.5, 1),
+                (self.cake.pk, 0.3333, 2),
+            ]
+        )
+
+    def test_equal_coverage_prefers_newer_recipes(self):
+        milk, flour, eggs = self.ingredients[:3]
+        newer = create_recipe(
+            self.author, ingredients=[(milk, 1), (flour, 1)]
+        )
+        matching.invalidate_recipe_ingredient_index()
+        self.assertEqual(
+            [recipe_id for recipe_id, _, _ in self.match(milk, flour, eggs)],
+            [newer.pk, self.omelette.pk, self.pancakes.pk, self.cake.pk]
+        )
+
+    def test_max_missing(self):
+        milk, flour = self.ingredients[:2]
+        self.assertEqual(
+            [
+                recipe_id
+                for recipe_id, _, _ in self.match(milk, flour, max_missing=1)
+            ],
+            [self.pancakes.pk, self.omelette.pk]
+        )
+
+    def test_pagination(self):
+        response = self.client.get(
+            '/api/recipes/match/',
+            {'ingredients': [self.ingredients[0].pk], 'limit': 1, 'page': 2}
+        )
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.pancakes.pk]
+        )
+
+    def test_invalid_query(self):
+        for params in (
+            {},
+            {'ingredients': 'milk'},
+            {'ingredients': 0},
+            {'ingredients': 1, 'max_missing': -1},
+        ):
+            with self.subTest(**params):
+                response = self.client.get('/api/recipes/match/', params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_index_follows_recipe_changes(self):
+        milk, _, eggs, sugar = self.ingredients[:4]
+        self.match(sugar)
+        with self.captureOnCommitCallbacks(execute=True):
+            created = create_recipe(
+                self.author, ingredients=[(sugar, 1)], image=None
+            )
+        self.assertEqual(
+            [recipe_id for recipe_id, _, _ in self.match(sugar)],
+            [created.pk, self.cake.pk]
+        )
+        self.authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/recipes/{self.omelette.pk}/',
+                {
+                    'ingredients': [
+                        {'id': eggs.pk, 'amount': 2},
+                        {'id': sugar.pk, 'amount': 1},
+                    ],
+                    'tags': [self.tags[0].pk],
+                    'image': make_base64_image(),
+                    'name': 'Омлет',
+                    'text': 'Описание',
+                    'cooking_time': 5,
+                },
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            created.delete()
+        self.assertEqual(
+            self.match(sugar, milk),
+            [
+                (self.omelette.pk, 0.5, 1),
+                (self.pancakes.pk, 0.5, 1),
+                (self.cake.pk, 0.3333, 2),
+            ]
+        )
+
+    def test_ingredient_delete_rebuilds_index(self):
+        milk, flour = self.ingredients[:2]
+        self.match(milk)
+        flour.delete()
+        self.assertEqual(self.match(milk)[0], (self.pancakes.pk, 1.0, 0))
+
+
+class RecipeIngredientIndexRebuildTests(APITestCase):
+    """Перестроение индекса подбора рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = create_recipe(
+            cls.author, ingredients=[(cls.ingredients[0], 1)]
+        )
+
+    def add_ingredient(self):
+        """Добавляет ингредиент в рецепт без сигналов."""
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=self.ingredients[1], amount=1
+        )
+
+    def ingredients_in(self, index):
+        return index.ingredients[self.recipe.pk]
+
+    @override_settings(RECIPE_MATCHING_TTL=0)
+    def test_stale_index_is_rebuilt_in_background(self):
+        stale = matching.get_recipe_ingredient_index()
+        self.add_ingredient()
+        with (
+            mock.patch.object(matching, '_executor') as executor,
+            # Фоновый поток закрывает свои соединения, а здесь он
+            # выполняется в потоке теста.
+            mock.patch.object(matching, 'connections'),
+        ):
+            self.assertIs(matching.get_recipe_ingredient_index(), stale)
+            self.assertIs(matching.get_recipe_ingredient_index(), stale)
+            executor.submit.assert_called_once_with(
+                matching._rebuild_in_background
+            )
+            matching._rebuild_in_background()
+        self.assertEqual(
+            self.ingredients_in(matching._index),
+            {self.ingredients[0].pk, self.ingredients[1].pk}
+        )
+        self.assertFalse(matching._rebuilding)
+
+    def test_changes_during_rebuild_are_applied(self):
+        build = matching.RecipeIngredientIndex
+
+        def build_and_change(pairs):
+            index = build(list(pairs))
+            self.add_ingredient()
+            matching.refresh_recipe(self.recipe.pk)
+            return index
+
+        with mock.patch.object(
+            matching, 'RecipeIngredientIndex', side_effect=build_and_change
+        ):
+            index = matching._rebuild()
+        self.assertEqual(len(self.ingredients_in(index)), 2)
+        self.assertIsNone(matching._pending)
+
+    def test_index_invalidated_during_rebuild_is_discarded(self):
+        build = matching.RecipeIngredientIndex
+
+        def build_and_invalidate(pairs):
+            index = build(pairs)
+            matching.invalidate_recipe_ingredient_index()
+            return index
+
+        with mock.patch.object(
+            matching, 'RecipeIngredientIndex',
+            side_effect=build_and_invalidate
+        ):
+            matching._rebuild()
+        self.assertIsNone(matching._index)
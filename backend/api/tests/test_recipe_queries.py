@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.utils import APITestCase
+from recipes.tests.utils import create_recipe
+
+
+class RecipeEagerLoadingTests(APITestCase):
+    """Связанные данные рецептов загружаются фиксированным числом запросов."""
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context), response
+
+    def test_detail_queries_do_not_depend_on_related_objects(self):
+        small = create_recipe(
+            self.author,
+            ingredients=[(self.ingredients[0], 1)],
+            tags=self.tags[:1]
+        )
+        large = create_recipe(
+            self.author,
+            ingredients=[(ingredient, 5) for ingredient in self.ingredients],
+            tags=self.tags
+        )
+        small_count, _ = self.count_queries(f'/api/recipes/{small.pk}/')
+        large_count, response = self.count_queries(
+            f'/api/recipes/{large.pk}/'
+        )
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(
+            {
+                (item['name'], item['measurement_unit'], item['amount'])
+                for item in response.data['ingredients']
+            },
+            {
+                (ingredient.name, ingredient.measurement_unit, 5)
+                for ingredient in self.ingredients
+            }
+        )
+        self.assertEqual(
+            {tag['slug'] for tag in response.data['tags']},
+            {tag.slug for tag in self.tags}
+        )
+        self.assertEqual(response.data['author']['id'], self.author.pk)
+
+    def test_list_queries_do_not_depend_on_related_objects(self):
+        create_recipe(self.author, ingredients=[(self.ingredients[0], 1)])
+        before, _ = self.count_queries('/api/recipes/')
+        for _ in range(3):
+            create_recipe(
+                self.author,
+                ingredients=[
+                    (ingredient, 1) for ingredient in self.ingredients
+                ],
+                tags=self.tags
+            )
+        after, response = self.count_queries('/api/recipes/')
+        self.assertEqual(before, after)
+        self.assertEqual(response.data['count'], 4)
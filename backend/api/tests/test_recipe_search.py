@@ -0,0 +1,74 @@
+from django.db import connection
+
+from api.tests.utils import APITestCase
+from recipes.models import Recipe
+from recipes.search import update_search_vectors
+from recipes.tests.utils import create_recipe
+
+
+class RecipeSearchTests(APITestCase):
+    """Поиск рецептов по названию, описанию и ингредиентам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        milk, flour, eggs = cls.ingredients[:3]
+        cls.pancakes = create_recipe(
+            cls.author, 'Блины на молоке', text='Тонкие блины к чаю',
+            ingredients=[(milk, 500), (flour, 200)]
+        )
+        cls.omelette = create_recipe(
+            cls.author, 'Омлет', text='Пышный и нежный',
+            ingredients=[(eggs, 3), (milk, 100)]
+        )
+        cls.breakfast = create_recipe(
+            cls.author, 'Завтрак', text='Омлет <вкуснее> каши',
+            ingredients=[(eggs, 2)]
+        )
+        # Действия после коммита в setUpTestData не выполняются.
+        update_search_vectors(Recipe.objects.all())
+
+    def search(self, value):
+        response = self.client.get('/api/recipes/', {'search': value})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def search_ids(self, value):
+        return [recipe['id'] for recipe in self.search(value)]
+
+    def test_name_text_and_ingredients(self):
+        self.assertEqual(self.search_ids('Тонкие'), [self.pancakes.pk])
+        self.assertEqual(self.search_ids('Мука'), [self.pancakes.pk])
+        self.assertEqual(self.search_ids('Яйца'), [
+            self.breakfast.pk, self.omelette.pk
+        ])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.search_ids('Тонкие Мука'), [self.pancakes.pk])
+        self.assertEqual(self.search_ids('Тонкие Яйца'), [])
+
+    def test_name_matches_go_first(self):
+        self.assertEqual(
+            self.search_ids('Омлет'), [self.omelette.pk, self.breakfast.pk]
+        )
+
+    def test_blank_search_returns_all_recipes(self):
+        self.assertEqual(len(self.search_ids('  ')), 3)
+
+    def test_snippet(self):
+        recipe = next(
+            recipe for recipe in self.search('Омлет')
+            if recipe['id'] == self.breakfast.pk
+        )
+        if connection.vendor != 'postgresql':
+            self.assertIsNone(recipe['search_snippet'])
+            return
+        self.assertIn('<mark>Омлет</mark>', recipe['search_snippet'])
+        self.assertIn('&lt;вкуснее&gt;', recipe['search_snippet'])
+
+    def test_renamed_ingredient_is_found(self):
+        flour = self.ingredients[1]
+        flour.name = 'Мука пшеничная'
+        with self.captureOnCommitCallbacks(execute=True):
+            flour.save()
+        self.assertEqual(self.search_ids('пшеничная'), [self.pancakes.pk])
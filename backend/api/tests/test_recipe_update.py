@@ -0,0 +1,105 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.utils import APITestCase
+from recipes.models import RecipeIngredient, ShoppingCart
+from recipes.tests.utils import create_recipe
+
+
+class RecipeIngredientUpdateTests(APITestCase):
+    """Обновление ингредиентов рецепта по разнице с сохраненными."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        milk, flour, eggs = cls.ingredients[:3]
+        cls.recipe = create_recipe(
+            cls.author,
+            ingredients=[(milk, 500), (flour, 200), (eggs, 2)],
+            tags=cls.tags[:2]
+        )
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipe)
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate(self.author)
+
+    def patch(self, ingredients, tags=None):
+        return self.client.patch(
+            f'/api/recipes/{self.recipe.pk}/',
+            {
+                'ingredients': [
+                    {'id': ingredient.pk, 'amount': amount}
+                    for ingredient, amount in ingredients
+                ],
+                'tags': [tag.pk for tag in tags or self.tags[:2]],
+                'name': 'Блины',
+            },
+            format='json'
+        )
+
+    def rows(self):
+        return {
+            row.ingredient_id: (row.pk, row.amount)
+            for row in RecipeIngredient.objects.filter(recipe=self.recipe)
+        }
+
+    def cart_version(self):
+        self.user.refresh_from_db(fields=['shopping_cart_version'])
+        return self.user.shopping_cart_version
+
+    def test_unchanged_ingredients_not_written(self):
+        rows, version = self.rows(), self.cart_version()
+        milk, flour, eggs = self.ingredients[:3]
+        table = RecipeIngredient._meta.db_table
+        with CaptureQueriesContext(connection) as context:
+            response = self.patch([(eggs, 2), (milk, 500), (flour, 200)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Блины')
+        self.assertEqual(
+            [
+                query['sql'] for query in context.captured_queries
+                if f'"{table}"' in query['sql']
+                and not query['sql'].startswith('SELECT')
+            ],
+            []
+        )
+        self.assertEqual(self.rows(), rows)
+        self.assertEqual(self.cart_version(), version)
+
+    def test_changed_ingredients_updated_in_place(self):
+        rows, version = self.rows(), self.cart_version()
+        milk, flour, eggs, sugar = self.ingredients[:4]
+        response = self.patch([(milk, 500), (flour, 250), (sugar, 50)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {
+                item['id']: item['amount']
+                for item in response.data['ingredients']
+            },
+            {milk.pk: 500, flour.pk: 250, sugar.pk: 50}
+        )
+        updated = self.rows()
+        self.assertEqual(updated[milk.pk], rows[milk.pk])
+        self.assertEqual(updated[flour.pk], (rows[flour.pk][0], 250))
+        self.assertNotIn(eggs.pk, updated)
+        self.assertEqual(self.cart_version(), version + 1)
+
+    def test_tags_updated(self):
+        response = self.patch(
+            [(ingredient, 1) for ingredient in self.ingredients[:3]],
+            tags=self.tags[1:]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [tag['id'] for tag in response.data['tags']],
+            [tag.pk for tag in self.tags[1:]]
+        )
+        self.assertCountEqual(self.recipe.tags.all(), self.tags[1:])
+
+    def test_invalid_ingredients_keep_rows(self):
+        rows = self.rows()
+        milk = self.ingredients[0]
+        response = self.patch([(milk, 1), (milk, 2)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.rows(), rows)
@@ -0,0 +1,108 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.utils import APITestCase
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.tests.utils import make_base64_image
+
+
+class RecipeWriteValidationTests(APITestCase):
+    """Проверка ингредиентов и тегов рецепта одним запросом на модель."""
+
+    def post(self, ingredients, tags):
+        return self.client.post(
+            '/api/recipes/',
+            {
+                'ingredients': [
+                    {'id': pk, 'amount': 10} for pk in ingredients
+                ],
+                'tags': tags,
+                'image': make_base64_image(),
+                'name': 'Блины',
+                'text': 'Описание',
+                'cooking_time': 30,
+            },
+            format='json'
+        )
+
+    def test_queries_do_not_depend_on_number_of_ids(self):
+        ingredient_ids = [ingredient.pk for ingredient in self.ingredients]
+        tag_ids = [tag.pk for tag in self.tags]
+        query_counts = []
+        for count in [1, 3]:
+            with CaptureQueriesContext(connection) as context:
+                response = self.post(
+                    ingredient_ids[:count], tag_ids[:count]
+                )
+            self.assertEqual(response.status_code, 201)
+            query_counts.append(
+                sum(
+                    f'"{table}"' in query['sql']
+                    and query['sql'].startswith('SELECT')
+                    for query in context.captured_queries
+                    for table in [
+                        Ingredient._meta.db_table, Tag._meta.db_table
+                    ]
+                )
+            )
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_created_with_validated_objects(self):
+        ingredients = [self.ingredients[2], self.ingredients[0]]
+        response = self.post(
+            [ingredient.pk for ingredient in ingredients],
+            [self.tags[1].pk, self.tags[0].pk]
+        )
+        self.assertEqual(response.status_code, 201)
+        recipe = Recipe.objects.get(pk=response.data['id'])
+        self.assertCountEqual(recipe.ingredients.all(), ingredients)
+        self.assertCountEqual(recipe.tags.all(), self.tags[:2])
+
+    def test_missing_ids_reported_together(self):
+        ingredient = self.ingredients[0].pk
+        tag = self.tags[0].pk
+        response = self.post([ingredient, 10**6 + 1, 10**6], [tag])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data['ingredients'],
+            {
+                'non_field_errors': [
+                    f'Ингредиенты не найдены: {10**6}, {10**6 + 1}.'
+                ]
+            }
+        )
+        response = self.post([ingredient], [tag, 10**6 + 1, 10**6])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data,
+            {'tags': [f'Теги не найдены: {10**6}, {10**6 + 1}.']}
+        )
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_tag_id_types(self):
+        ingredient = self.ingredients[0].pk
+        tag = self.tags[0].pk
+        for tags in [[tag + 0.5], [True], ['abc'], [None], [[tag]]]:
+            with self.subTest(tags=tags):
+                response = self.post([ingredient], tags)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('tags', response.data)
+        for tags in [[str(tag)], [float(tag)]]:
+            with self.subTest(tags=tags):
+                response = self.post([ingredient], tags)
+                self.assertEqual(response.status_code, 201)
+
+    def test_duplicates_and_empty_lists(self):
+        ingredient = self.ingredients[0].pk
+        tag = self.tags[0].pk
+        for ingredients, tags in [
+            ([ingredient, ingredient], [tag]),
+            ([ingredient], [tag, tag]),
+            ([], [tag]),
+            ([ingredient], []),
+            ([ingredient], tag),
+        ]:
+            with self.subTest(ingredients=ingredients, tags=tags):
+                response = self.post(ingredients, tags)
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Recipe.objects.exists())
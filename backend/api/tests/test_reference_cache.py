@@ -0,0 +1,70 @@
+from api.tests.utils import APITestCase
+from recipes.models import Ingredient, Tag
+from recipes.signals import ingredients_loaded
+
+
+class ReferenceDataCacheTests(APITestCase):
+    """Кэширование ответов справочников тегов и ингредиентов с ETag."""
+
+    def test_etag_and_not_modified(self):
+        response = self.anonymous.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        response = self.anonymous.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        response = self.anonymous.get(
+            '/api/tags/', HTTP_IF_NONE_MATCH='"other"'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_cached_response_reads_only_cache_version(self):
+        url = f'/api/ingredients/{self.ingredients[0].pk}/'
+        first = self.anonymous.get(url)
+        with self.assertNumQueries(1):
+            second = self.anonymous.get(url)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_query_params_are_part_of_cache_key(self):
+        milk = self.anonymous.get('/api/ingredients/', {'name': 'Мол'})
+        flour = self.anonymous.get('/api/ingredients/', {'name': 'Мук'})
+        self.assertEqual([item['name'] for item in milk.data], ['Молоко'])
+        self.assertEqual([item['name'] for item in flour.data], ['Мука'])
+        self.assertNotEqual(milk['ETag'], flour['ETag'])
+
+    def test_tag_change_invalidates_cache(self):
+        etag = self.anonymous.get('/api/tags/')['ETag']
+        self.tags[0].delete()
+        response = self.anonymous.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    def test_ingredient_change_invalidates_cache(self):
+        url = f'/api/ingredients/{self.ingredients[0].pk}/'
+        etag = self.anonymous.get(url)['ETag']
+        ingredient = self.ingredients[0]
+        ingredient.measurement_unit = 'л'
+        ingredient.save()
+        response = self.anonymous.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['measurement_unit'], 'л')
+
+    def test_bulk_load_invalidates_cache(self):
+        self.anonymous.get('/api/ingredients/')
+        Ingredient.objects.bulk_create(
+            [Ingredient(name='Перец', measurement_unit='г')]
+        )
+        ingredients_loaded.send(sender=Ingredient)
+        response = self.anonymous.get('/api/ingredients/')
+        self.assertIn('Перец', [item['name'] for item in response.data])
+
+    def test_not_found_is_not_cached(self):
+        url = '/api/tags/999999/'
+        self.assertEqual(self.anonymous.get(url).status_code, 404)
+        Tag.objects.bulk_create(
+            [Tag(pk=999999, name='Десерт', slug='dessert')]
+        )
+        self.assertEqual(self.anonymous.get(url).status_code, 200)
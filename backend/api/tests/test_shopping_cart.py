@@ -0,0 +1,125 @@
+import csv
+import io
+
+from api.tests.utils import APITestCase
+from recipes.models import ShoppingCart
+from recipes.tests.utils import create_recipe, make_base64_image
+
+
+DOWNLOAD_URL = '/api/recipes/download_shopping_cart/'
+
+
+class ShoppingCartDownloadTests(APITestCase):
+    """Выгрузка списка покупок и ее кэширование по версии списка."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        milk, flour, eggs = cls.ingredients[:3]
+        cls.pancakes = create_recipe(
+            cls.author, 'Блины', ingredients=[(milk, 500), (flour, 200)]
+        )
+        cls.omelette = create_recipe(
+            cls.author, 'Омлет', ingredients=[(milk, 100), (eggs, 3)]
+        )
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.pancakes)
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.omelette)
+
+    def download(self, file_format='txt'):
+        response = self.client.get(DOWNLOAD_URL, {'format': file_format})
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        return response.content
+
+    def test_text_sums_amounts_sorted_by_name(self):
+        response = self.client.get(DOWNLOAD_URL, {'format': 'txt'})
+        self.assertEqual(
+            response['Content-Type'], 'text/plain; charset=utf-8'
+        )
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="shopping_cart.txt"'
+        )
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(),
+            '1. Молоко - 600 (мл)\n'
+            '2. Мука - 200 (г)\n'
+            '3. Яйца - 3 (шт.)\n'
+        )
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(self.download('csv').decode())))
+        self.assertEqual(
+            rows,
+            [
+                ['Название', 'Количество', 'Единица измерения'],
+                ['Молоко', '600', 'мл'],
+                ['Мука', '200', 'г'],
+                ['Яйца', '3', 'шт.'],
+            ]
+        )
+
+    def test_pdf(self):
+        self.assertTrue(self.download('pdf').startswith(b'%PDF'))
+
+    def test_empty_shopping_cart(self):
+        ShoppingCart.objects.filter(user=self.user).delete()
+        response = self.client.get(DOWNLOAD_URL)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.content, b'')
+
+    def test_cached_file_is_reused(self):
+        content = self.download()
+        # Только запрос токена с пользователем.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.download(), content)
+
+    def test_cart_change_invalidates_cache(self):
+        self.download()
+        self.client.delete(f'/api/recipes/{self.omelette.pk}/shopping_cart/')
+        self.assertEqual(
+            self.download().decode(),
+            '1. Молоко - 500 (мл)\n2. Мука - 200 (г)\n'
+        )
+
+    def test_recipe_ingredients_change_invalidates_cache(self):
+        self.download()
+        self.authenticate(self.author)
+        response = self.client.patch(
+            f'/api/recipes/{self.omelette.pk}/',
+            {
+                'ingredients': [{'id': self.ingredients[2].pk, 'amount': 5}],
+                'tags': [self.tags[0].pk],
+                'image': make_base64_image(),
+                'name': 'Омлет',
+                'text': 'Описание',
+                'cooking_time': 5,
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.authenticate(self.user)
+        self.assertEqual(
+            self.download().decode(),
+            '1. Молоко - 500 (мл)\n2. Мука - 200 (г)\n3. Яйца - 5 (шт.)\n'
+        )
+
+    def test_ingredient_change_invalidates_cache(self):
+        self.download()
+        eggs = self.ingredients[2]
+        eggs.name = 'Яйца куриные'
+        eggs.save()
+        self.assertEqual(
+            self.download().decode(),
+            '1. Молоко - 600 (мл)\n2. Мука - 200 (г)\n'
+            '3. Яйца куриные - 3 (шт.)\n'
+        )
+
+    def test_ingredient_delete_invalidates_cache(self):
+        self.download()
+        self.ingredients[1].delete()
+        self.assertEqual(
+            self.download().decode(),
+            '1. Молоко - 600 (мл)\n2. Яйца - 3 (шт.)\n'
+        )
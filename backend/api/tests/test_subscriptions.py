@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.tests.utils import APITestCase
+from recipes.models import Recipe, Subscription
+from recipes.tests.utils import create_recipe, create_user
+
+
+class SubscriptionRecipesLimitTests(APITestCase):
+    """Рецепты авторов в списке подписок и параметр recipes_limit."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.authors = [cls.author, create_user('second')]
+        now = timezone.now()
+        cls.recipes = {}
+        for author in cls.authors:
+            recipes = [create_recipe(author) for _ in range(3)]
+            for age, recipe in enumerate(recipes):
+                Recipe.objects.filter(pk=recipe.pk).update(
+                    pub_date=now - timedelta(hours=age)
+                )
+            cls.recipes[author.pk] = [recipe.pk for recipe in recipes]
+            Subscription.objects.create(
+                subscriber=cls.user, subscribing=author
+            )
+
+    def get_subscriptions(self, query=''):
+        response = self.client.get(f'/api/users/subscriptions/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_newest_recipes_are_limited_per_author(self):
+        authors = self.get_subscriptions('recipes_limit=2')
+        self.assertEqual(
+            [author['id'] for author in authors],
+            [author.pk for author in self.authors]
+        )
+        for author in authors:
+            self.assertEqual(
+                [recipe['id'] for recipe in author['recipes']],
+                self.recipes[author['id']][:2]
+            )
+            self.assertEqual(author['recipes_count'], 3)
+            self.assertTrue(author['is_subscribed'])
+
+    def test_without_limit_all_recipes_are_returned(self):
+        for author in self.get_subscriptions():
+            self.assertEqual(
+                [recipe['id'] for recipe in author['recipes']],
+                self.recipes[author['id']]
+            )
+
+    def test_invalid_limit_is_ignored(self):
+        for author in self.get_subscriptions('recipes_limit=-1'):
+            self.assertEqual(len(author['recipes']), 3)
+
+    def test_queries_do_not_depend_on_authors(self):
+        def count_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                self.get_subscriptions('recipes_limit=2')
+            return len(context)
+
+        before = count_queries()
+        for index in range(3):
+            author = create_user(f'extra{index}')
+            create_recipe(author)
+            Subscription.objects.create(
+                subscriber=self.user, subscribing=author
+            )
+        self.assertEqual(count_queries(), before)
+
+    def test_subscribe_respects_limit(self):
+        author = create_user('new')
+        for _ in range(3):
+            create_recipe(author)
+        response = self.client.post(
+            f'/api/users/{author.pk}/subscribe/?recipes_limit=1'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['recipes']), 1)
+        self.assertEqual(response.data['recipes_count'], 3)
@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.utils import APITestCase
+from recipes.models import Favorite, ShoppingCart, Subscription
+from recipes.tests.utils import create_recipe, create_user
+
+
+class RecipeUserFlagsTests(APITestCase):
+    """Флаги текущего пользователя в списке рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = [
+            create_recipe(
+                cls.author,
+                name=f'Рецепт {i}',
+                ingredients=[(cls.ingredients[i % 3], 10)],
+                tags=[cls.tags[0]]
+            )
+            for i in range(8)
+        ]
+        Favorite.objects.create(user=cls.user, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipes[1])
+        Subscription.objects.create(
+            subscriber=cls.user, subscribing=cls.author
+        )
+
+    def get_recipes(self, client, limit=10):
+        response = client.get('/api/recipes/', {'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        return {recipe['id']: recipe for recipe in response.data['results']}
+
+    def test_flags_match_user_lists(self):
+        recipes = self.get_recipes(self.client)
+        favorited = recipes[self.recipes[0].pk]
+        in_cart = recipes[self.recipes[1].pk]
+        other = recipes[self.recipes[2].pk]
+        self.assertTrue(favorited['is_favorited'])
+        self.assertFalse(favorited['is_in_shopping_cart'])
+        self.assertFalse(in_cart['is_favorited'])
+        self.assertTrue(in_cart['is_in_shopping_cart'])
+        self.assertFalse(other['is_favorited'])
+        self.assertFalse(other['is_in_shopping_cart'])
+        self.assertTrue(other['author']['is_subscribed'])
+
+    def test_flags_are_false_for_anonymous(self):
+        for recipe in self.get_recipes(self.anonymous).values():
+            self.assertFalse(recipe['is_favorited'])
+            self.assertFalse(recipe['is_in_shopping_cart'])
+            self.assertFalse(recipe['author']['is_subscribed'])
+
+    def test_flags_of_other_users_are_ignored(self):
+        other = create_user('other')
+        Favorite.objects.create(user=other, recipe=self.recipes[2])
+        recipe = self.get_recipes(self.client)[self.recipes[2].pk]
+        self.assertFalse(recipe['is_favorited'])
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        counts = []
+        for limit in (2, 8):
+            # Общее количество кэшируется, оба запроса должны его считать.
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                self.get_recipes(self.client, limit)
+            counts.append(len(context))
+        self.assertEqual(counts[0], counts[1])
+
+
+class UserSubscribedFlagTests(APITestCase):
+    """Флаг подписки в списке пользователей."""
+
+    def test_is_subscribed(self):
+        Subscription.objects.create(
+            subscriber=self.user, subscribing=self.author
+        )
+        response = self.client.get('/api/users/')
+        self.assertEqual(response.status_code, 200)
+        flags = {
+            user['id']: user['is_subscribed']
+            for user in response.data['results']
+        }
+        self.assertEqual(
+            flags, {self.user.pk: False, self.author.pk: True}
+        )
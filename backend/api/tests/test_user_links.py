@@ -0,0 +1,117 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.utils import APITestCase
+from recipes.models import Favorite, ShoppingCart, Subscription
+from recipes.tests.utils import create_recipe
+
+
+class RecipeLinkTests(APITestCase):
+    """Добавление рецепта в избранное и список покупок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = create_recipe(cls.author, name='Блины')
+
+    def test_add_and_remove(self):
+        for name, model in [
+            ('favorite', Favorite), ('shopping_cart', ShoppingCart)
+        ]:
+            with self.subTest(name=name):
+                url = f'/api/recipes/{self.recipe.pk}/{name}/'
+                response = self.client.post(url)
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(
+                    set(response.data),
+                    {'id', 'name', 'image', 'image_srcset', 'cooking_time'}
+                )
+                self.assertEqual(response.data['name'], 'Блины')
+                self.assertTrue(
+                    model.objects.filter(
+                        user=self.user, recipe=self.recipe
+                    ).exists()
+                )
+                self.assertEqual(self.client.delete(url).status_code, 204)
+                self.assertEqual(self.client.delete(url).status_code, 400)
+                self.assertFalse(model.objects.exists())
+
+    def test_repeated_add(self):
+        url = f'/api/recipes/{self.recipe.pk}/favorite/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data, {'non_field_errors': ['Рецепт уже добавлен.']}
+        )
+        self.recipe.refresh_from_db(fields=['favorites_count'])
+        self.assertEqual(self.recipe.favorites_count, 1)
+
+    def test_added_by_concurrent_request(self):
+        # Запись добавлена другим запросом после проверок прав: ответ 400,
+        # а не ошибка уникальности.
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        response = self.client.post(
+            f'/api/recipes/{self.recipe.pk}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ShoppingCart.objects.count(), 1)
+
+    def test_no_existence_check_before_insert(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                f'/api/recipes/{self.recipe.pk}/favorite/'
+            )
+        self.assertEqual(response.status_code, 201)
+        table = Favorite._meta.db_table
+        self.assertEqual(
+            [
+                query['sql'] for query in context.captured_queries
+                if f'"{table}"' in query['sql']
+            ][0].split()[0],
+            'INSERT'
+        )
+
+    def test_missing_recipe(self):
+        for url in [
+            '/api/recipes/0/favorite/', '/api/recipes/abc/favorite/'
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.post(url).status_code, 404)
+                self.assertEqual(self.client.delete(url).status_code, 404)
+
+    def test_anonymous(self):
+        response = self.anonymous.post(
+            f'/api/recipes/{self.recipe.pk}/favorite/'
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+class SubscribeTests(APITestCase):
+    """Подписка на автора и отписка."""
+
+    def test_subscribe_and_unsubscribe(self):
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['id'], self.author.pk)
+        self.assertTrue(response.data['is_subscribed'])
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data,
+            {'non_field_errors': ['Вы уже подписаны на этого пользователя.']}
+        )
+        self.author.refresh_from_db(fields=['subscribers_count'])
+        self.assertEqual(self.author.subscribers_count, 1)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 400)
+        self.assertFalse(Subscription.objects.exists())
+
+    def test_errors(self):
+        response = self.client.post(f'/api/users/{self.user.pk}/subscribe/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            self.client.post('/api/users/0/subscribe/').status_code, 404
+        )
+        self.assertFalse(Subscription.objects.exists())
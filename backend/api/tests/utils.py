@@ -0,0 +1,38 @@
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.autocomplete import invalidate_ingredient_trie
+from api.matching import invalidate_recipe_ingredient_index
+from recipes.tests.utils import FoodgramTestCase, create_user
+
+
+class APITestCase(FoodgramTestCase):
+    """
+    Базовый класс тестов API.
+
+    self.client авторизован токеном self.user, поэтому пользователь
+    загружается из БД при каждом запросе, как и в работающем приложении.
+    self.anonymous - клиент без авторизации. Индексы ингредиентов в памяти
+    процесса сбрасываются перед каждым тестом, потому что данные тестов
+    откатываются.
+    """
+
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = create_user('reader')
+        cls.author = create_user('author')
+
+    def setUp(self):
+        super().setUp()
+        invalidate_ingredient_trie()
+        invalidate_recipe_ingredient_index()
+        self.authenticate(self.user)
+        self.anonymous = APIClient()
+
+    def authenticate(self, user):
+        """Авторизует self.client токеном пользователя."""
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
@@ -1,22 +1,58 @@
+from functools import partial
+from itertools import chain
+
+from adrf.mixins import get_data
+from adrf.viewsets import ModelViewSet, ReadOnlyModelViewSet
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Count, F, Prefetch, Sum
-from django.http import HttpResponse
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection
+from django.db.models import (
+    Exists,
+    F,
+    OuterRef,
+    Prefetch,
+    Sum,
+    Value,
+)
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.utils.http import int_to_base36
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.serializers import SetPasswordSerializer
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
+from rest_framework.settings import api_settings
 
+from api.autocomplete import get_ingredient_trie
+from api.cache import CachedReadOnlyMixin
 from api.filters import IngredientFilter, RecipeFilter
+from api.matching import match_recipes
+from api.mixins import AsyncReadMixin
+from api.pagination import (
+    FeedCursorPagination,
+    IdPagination,
+    LimitPageNumberPagination,
+    RecipePagination,
+)
 from api.permissions import IsAuthor, ReadOnly
+from api.renderers import (
+    ShoppingCartCSVRenderer,
+    ShoppingCartPDFRenderer,
+    ShoppingCartTextRenderer,
+)
 from api.serializers import (
     FavoriteSerializer,
     IngredientSerializer,
+    RecipeIdsSerializer,
+    RecipeMatchQuerySerializer,
+    RecipeMatchSerializer,
     RecipeReadSerializer,
+    RecipeShortSerializer,
     RecipeWriteSerializer,
     ShoppingCartSerializer,
     SubscribedUserWithRecipesSerializer,
@@ -26,6 +62,7 @@ from api.serializers import (
     UserRegisterSerializer,
     UserSerializer,
 )
+from recipes.feed import get_feed
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -35,12 +72,14 @@ from recipes.models import (
     Subscription,
     Tag,
 )
+from recipes.short_links import get_short_link_code
+from recipes.signals import links_created, links_deleted
 
 
 User = get_user_model()
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(AsyncReadMixin, ModelViewSet):
     """ViewSet для пользователя."""
 
     queryset = User.objects.all()
@@ -94,27 +133,34 @@ class UserViewSet(ModelViewSet):
     @action(
         methods=['get'],
         detail=False,
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        pagination_class=IdPagination
     )
-    def subscriptions(self, request):
+    async def subscriptions(self, request):
         """Подписки текущего пользователя."""
         subscribed_users = User.objects.filter(
             subscribers__subscriber=request.user
-        ).prefetch_related(
-            # Получаем только конкретные значения, чтобы не нагружать БД.
-            Prefetch(
-                'recipes',
-                queryset=Recipe.objects.only(
-                    'id', 'name', 'image', 'cooking_time'
-                )
+        ).annotate(is_subscribed=Value(True)).order_by('id')
+        recipes_limit = self._get_recipes_limit()
+        # Отдельные LIMIT для каждого автора в UNION ALL поддерживает не
+        # каждая СУБД (SQLite - нет).
+        load_separately = (
+            recipes_limit is not None
+            and connection.features.supports_slicing_ordering_in_compound
+        )
+        if not load_separately:
+            subscribed_users = subscribed_users.prefetch_related(
+                self._get_recipes_prefetch()
             )
-        ).annotate(recipes_count=Count('recipes')).order_by('id')
+        page = await self.apaginate_queryset(subscribed_users)
+        if load_separately:
+            await self._aload_short_recipes(page, recipes_limit)
         serializer = SubscribedUserWithRecipesSerializer(
-            self.paginate_queryset(subscribed_users),
+            page,
             many=True,
             context={'request': request}
         )
-        return self.get_paginated_response(serializer.data)
+        return await self.get_apaginated_response(await get_data(serializer))
 
     @action(
         detail=True,
@@ -124,11 +170,12 @@ class UserViewSet(ModelViewSet):
         """Подписка на пользователя/Отписка от пользователя."""
         subscribing_user = self._get_subscribing_user(pk)
         serializer = SubscribeSerializer(
-            data={'subscribing': subscribing_user.pk},
-            context={'request': request}
+            data={},
+            context={'request': request, 'subscribing': subscribing_user}
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        subscribing_user.is_subscribed = True
         user_serializer = SubscribedUserWithRecipesSerializer(
             subscribing_user,
             context={'request': request}
@@ -148,16 +195,85 @@ class UserViewSet(ModelViewSet):
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
-    def _get_subscribing_user(self, pk):
+    def _get_recipes_limit(self):
+        """Возвращает recipes_limit из query-параметров или None."""
+        recipes_limit = self.request.query_params.get('recipes_limit', '')
+        return int(recipes_limit) if recipes_limit.isdigit() else None
+
+    @staticmethod
+    def _get_short_recipes(*fields):
         """
-        Возвращает пользователя для подписки(отписки) с аннотацией количества
-        рецептов.
+        Возвращает рецепты только с полями для краткого представления и
+        дополнительными полями fields.
         """
-        return get_object_or_404(
-            User.objects.annotate(recipes_count=Count('recipes')),
-            pk=pk
+        # author нужен для сопоставления рецептов с пользователями.
+        return Recipe.objects.only(
+            'id', 'author', 'name', 'image', 'image_renditions',
+            'cooking_time', *fields
         )
 
+    def _get_recipes_prefetch(self):
+        """
+        Возвращает Prefetch рецептов пользователей для подписок.
+
+        Если в query-параметрах передан recipes_limit, для каждого автора
+        загружается только указанное количество последних рецептов одним
+        запросом с ROW_NUMBER() OVER (PARTITION BY author_id ...).
+        """
+        recipes = self._get_short_recipes()
+        recipes_limit = self._get_recipes_limit()
+        if recipes_limit is not None:
+            recipes = recipes[:recipes_limit]
+        return Prefetch('recipes', queryset=recipes, to_attr='short_recipes')
+
+    async def _aload_short_recipes(self, users, recipes_limit):
+        """
+        Загружает последние recipes_limit рецептов каждого пользователя в
+        атрибут short_recipes.
+
+        Рецепты всех пользователей загружаются одним запросом UNION ALL, в
+        котором для каждого автора читается не больше recipes_limit строк
+        по индексу (author_id, pub_date, id). ROW_NUMBER() из Prefetch
+        сортирует все рецепты авторов страницы, что дорого для авторов с
+        тысячами рецептов.
+        """
+        recipes = self._get_short_recipes('pub_date')
+        querysets = [
+            recipes.filter(author_id=user.pk)[:recipes_limit]
+            for user in users
+        ]
+        short_recipes = {user.pk: [] for user in users}
+        if recipes_limit and querysets:
+            async for recipe in querysets[0].union(
+                *querysets[1:], all=True
+            ):
+                short_recipes[recipe.author_id].append(recipe)
+        for user in users:
+            user.short_recipes = sorted(
+                short_recipes[user.pk],
+                key=lambda recipe: recipe.pub_date,
+                reverse=True
+            )
+
+    def _get_subscribing_user(self, pk):
+        """Возвращает пользователя для подписки(отписки)."""
+        return get_object_or_404(User, pk=pk)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_authenticated:
+            # Флаг подписки вычисляется одним подзапросом на всю страницу.
+            return queryset.annotate(
+                is_subscribed=Exists(
+                    Subscription.objects.filter(
+                        subscriber=user,
+                        subscribing=OuterRef('pk')
+                    )
+                )
+            )
+        return queryset.annotate(is_subscribed=Value(False))
+
     def get_permissions(self):
         if self.action == 'create':
             return [AllowAny()]
@@ -173,30 +289,72 @@ class UserViewSet(ModelViewSet):
         return UserSerializer
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(CachedReadOnlyMixin, ReadOnlyModelViewSet):
     """ViewSet для тегов рецепта."""
 
+    cache_prefix = 'tags'
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(CachedReadOnlyMixin, ReadOnlyModelViewSet):
     """ViewSet для ингредиентов рецепта."""
 
+    cache_prefix = 'ingredients'
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientFilter
 
+    async def list(self, request, *args, **kwargs):
+        """
+        Список ингредиентов.
 
-class RecipeViewSet(ModelViewSet):
+        При поиске по непустому названию количество результатов
+        ограничивается query-параметром limit. Если включен
+        INGREDIENT_AUTOCOMPLETE_TRIE, поиск выполняется по индексу названий
+        в памяти без запросов к БД.
+        Ответы, в том числе результаты поиска, кэшируются по
+        query-параметрам.
+        """
+        return await self._get_cached_response(
+            self._alist, request, *args, **kwargs
+        )
+
+    async def _alist(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if not name:
+            return await super().alist(request, *args, **kwargs)
+        limit = self._get_limit()
+        if settings.INGREDIENT_AUTOCOMPLETE_TRIE:
+            trie = await sync_to_async(get_ingredient_trie)()
+            ingredients = trie.search(name, limit)
+        else:
+            queryset = await self.afilter_queryset(self.get_queryset())
+            ingredients = [
+                ingredient async for ingredient in queryset[:limit]
+            ]
+        serializer = self.get_serializer(ingredients, many=True)
+        return Response(serializer.data)
+
+    def _get_limit(self):
+        """Возвращает ограничение количества результатов поиска."""
+        limit = self.request.query_params.get('limit', '')
+        if not limit.isdigit() or not int(limit):
+            return settings.INGREDIENT_AUTOCOMPLETE_LIMIT
+        return min(int(limit), settings.INGREDIENT_AUTOCOMPLETE_MAX_LIMIT)
+
+
+class RecipeViewSet(AsyncReadMixin, ModelViewSet):
     """ViewSet для рецепта."""
 
     queryset = Recipe.objects.all()
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
+    pagination_class = RecipePagination
+    lookup_value_regex = r'\d+'
 
     @action(
         methods=['post', 'delete'],
@@ -204,13 +362,7 @@ class RecipeViewSet(ModelViewSet):
     )
     def favorite(self, request, pk=None):
         """Добавление рецепта в избранное пользователя."""
-        recipe = self.get_object()
-        return self._add_or_remove_recipe(
-            request=request,
-            model=Favorite,
-            recipe=recipe,
-            user=request.user
-        )
+        return self._add_or_remove_recipe(request, Favorite, pk)
 
     @action(
         methods=['post', 'delete'],
@@ -218,13 +370,42 @@ class RecipeViewSet(ModelViewSet):
     )
     def shopping_cart(self, request, pk=None):
         """Добавление рецепта в список покупок пользователя."""
-        recipe = self.get_object()
-        return self._add_or_remove_recipe(
-            request=request,
-            model=ShoppingCart,
-            recipe=recipe,
+        return self._add_or_remove_recipe(request, ShoppingCart, pk)
+
+    @action(
+        methods=['post', 'delete'],
+        detail=False,
+        url_path='favorite',
+        permission_classes=[IsAuthenticated]
+    )
+    def favorite_bulk(self, request):
+        """Добавление и удаление нескольких рецептов в избранном."""
+        return self._add_or_remove_recipes(request, Favorite)
+
+    @action(
+        methods=['post', 'delete'],
+        detail=False,
+        url_path='shopping_cart',
+        permission_classes=[IsAuthenticated]
+    )
+    def shopping_cart_bulk(self, request):
+        """Добавление и удаление нескольких рецептов в списке покупок."""
+        return self._add_or_remove_recipes(request, ShoppingCart)
+
+    @action(
+        methods=['delete'],
+        detail=False,
+        url_path='shopping_cart/clear',
+        permission_classes=[IsAuthenticated]
+    )
+    def clear_shopping_cart(self, request):
+        """Очистка списка покупок пользователя."""
+        deleted = ShoppingCart.objects.filter(
             user=request.user
-        )
+        ).delete_and_fetch()
+        if deleted:
+            links_deleted.send(sender=ShoppingCart, instances=deleted)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
         methods=['get'],
@@ -233,11 +414,14 @@ class RecipeViewSet(ModelViewSet):
     )
     def short_link(self, request, pk=None):
         """Получение короткой ссылки на рецепт."""
+        try:
+            code = get_short_link_code(int(pk))
+        except Recipe.DoesNotExist:
+            raise NotFound('Рецепт не найден.')
         return Response(
             {
                 'short-link':
-                f'{request.scheme}://{request.get_host()}/s/'
-                f'{int_to_base36(int(pk))}'
+                f'{request.scheme}://{request.get_host()}/s/{code}'
             },
             status=status.HTTP_200_OK
         )
@@ -245,10 +429,101 @@ class RecipeViewSet(ModelViewSet):
     @action(
         methods=['get'],
         detail=False,
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        pagination_class=FeedCursorPagination
+    )
+    def feed(self, request):
+        """
+        Лента рецептов авторов, на которых подписан пользователь.
+
+        Порядок записей ленты берется из заранее заполненной таблицы лент
+        (см. recipes.feed), из рецептов загружается только текущая
+        страница.
+        """
+        entries = self.paginator.paginate_feed(
+            partial(get_feed, request.user), request
+        )
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for _, recipe_id in entries]
+        )
+        serializer = self.get_serializer(
+            [
+                recipes[recipe_id] for _, recipe_id in entries
+                if recipe_id in recipes
+            ],
+            many=True
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        methods=['get'],
+        detail=False,
+        url_path='match',
+        pagination_class=LimitPageNumberPagination
+    )
+    def match(self, request):
+        """
+        Подбор рецептов по ингредиентам, которые есть у пользователя.
+
+        Ингредиенты передаются query-параметрами ingredients, max_missing
+        ограничивает количество недостающих ингредиентов. Рецепты
+        упорядочены по доле имеющихся ингредиентов и количеству недостающих
+        и подбираются по индексу в памяти, из БД загружается только
+        текущая страница.
+        """
+        query = RecipeMatchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        matches = match_recipes(
+            query.validated_data['ingredients'],
+            query.validated_data.get('max_missing')
+        )
+        page = self.paginate_queryset(matches)
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'image_renditions', 'cooking_time'
+        ).in_bulk([recipe_id for recipe_id, _, _ in page])
+        results = []
+        for recipe_id, coverage, missing_count in page:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                # Рецепт удален в другом процессе до перестроения индекса.
+                continue
+            recipe.coverage = round(coverage, 4)
+            recipe.missing_count = missing_count
+            results.append(recipe)
+        serializer = RecipeMatchSerializer(
+            results, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            ShoppingCartTextRenderer,
+            ShoppingCartCSVRenderer,
+            ShoppingCartPDFRenderer,
+        ]
     )
     def download_shopping_cart(self, request):
-        """Получение списка покупок."""
+        """
+        Получение списка покупок.
+
+        Формат файла выбирается query-параметром format (txt, csv, pdf).
+        Готовый файл кэшируется по версии списка покупок пользователя, которая
+        увеличивается при любом изменении списка.
+        """
+        renderer = request.accepted_renderer
+        cache_key = (
+            f'shopping_cart:{request.user.pk}:'
+            f'{request.user.shopping_cart_version}:{renderer.format}'
+        )
+        content = cache.get(cache_key)
+        if content is not None:
+            return self._shopping_cart_response(
+                HttpResponse(content), renderer
+            )
+
         ingredients = (
             RecipeIngredient.objects
             .filter(recipe__shopping_cart__user=request.user)
@@ -258,49 +533,160 @@ class RecipeViewSet(ModelViewSet):
             )
             .annotate(amount=Sum('amount'))
             .order_by('name')
+            .iterator()
         )
-        if not ingredients.exists():
-            return Response(
-                {
-                    'detail': 'Список покупок пуст.'
-                },
-                status=status.HTTP_204_NO_CONTENT
-            )
-        lines = [
-            f'{i}. {ingredient["name"]} - {ingredient["amount"]} '
-            f'({ingredient["measurement_unit"]})'
-            for i, ingredient in enumerate(ingredients, start=1)
-        ]
-        return HttpResponse(
-            content='\n'.join(lines),
-            content_type='text/plain; charset=utf-8',
-            headers={
-                'Content-Disposition':
-                'attachment; filename="shopping_cart.txt"'
-            }
+        first_ingredient = next(ingredients, None)
+        if first_ingredient is None:
+            # Ответ 204 не может содержать тело.
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        chunks = renderer.stream(chain([first_ingredient], ingredients))
+        cache_chunks = (
+            self._acache_chunks
+            if isinstance(request._request, ASGIRequest)
+            else self._cache_chunks
+        )
+        return self._shopping_cart_response(
+            StreamingHttpResponse(cache_chunks(chunks, cache_key)),
+            renderer
+        )
+
+    @staticmethod
+    def _cache_chunks(chunks, cache_key):
+        """Отдает части файла и сохраняет файл в кэш после отправки."""
+        content = []
+        for chunk in chunks:
+            content.append(chunk)
+            yield chunk
+        cache.set(
+            cache_key, b''.join(content), settings.SHOPPING_CART_CACHE_TIMEOUT
+        )
+
+    @staticmethod
+    async def _acache_chunks(chunks, cache_key):
+        """
+        Асинхронный вариант _cache_chunks для ASGI.
+
+        Под ASGI StreamingHttpResponse собирает синхронный итератор в
+        список целиком до отправки первого байта, поэтому части берутся из
+        генератора рендерера по одной через sync_to_async: в том же потоке,
+        что и представление, где открыт курсор запроса ингредиентов.
+        """
+        content = []
+        next_chunk = sync_to_async(next)
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            content.append(chunk)
+            yield chunk
+        await cache.aset(
+            cache_key, b''.join(content), settings.SHOPPING_CART_CACHE_TIMEOUT
         )
 
-    def _add_or_remove_recipe(self, request, model, recipe, user):
-        """Добавляет или удаляет рецепт для пользователя в указанной модели."""
+    @staticmethod
+    def _shopping_cart_response(response, renderer):
+        """Добавляет заголовки файла списка покупок к ответу."""
+        response['Content-Type'] = renderer.media_type
+        if renderer.charset:
+            response['Content-Type'] += f'; charset={renderer.charset}'
+        response['Content-Disposition'] = (
+            f'attachment; filename="{renderer.get_filename()}"'
+        )
+        return response
+
+    def _add_or_remove_recipe(self, request, model, pk):
+        """
+        Добавляет или удаляет рецепт для пользователя в указанной модели.
+
+        При добавлении загружается только рецепт для ответа, запись
+        добавляется без предварительной проверки (см.
+        UserRecipeSerializer). При удалении рецепт загружается, только если
+        удалять нечего, чтобы отличить 404 от 400.
+        """
         if request.method == 'POST':
             serializer = self.get_serializer(
-                data={'user': user.id, 'recipe': recipe.id},
-                context={'request': request}
+                data={},
+                context={
+                    **self.get_serializer_context(),
+                    'recipe': self.get_object()
+                }
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
-            return Response(
-                self.get_serializer(recipe).data,
-                status=status.HTTP_201_CREATED
-            )
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
         deleted_recipe_count, _ = model.objects.filter(
-            user=user,
-            recipe=recipe
+            user=request.user,
+            recipe_id=pk
         ).delete()
         if deleted_recipe_count:
             return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(Recipe.objects.only('pk'), pk=pk)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
+    def _add_or_remove_recipes(self, request, model):
+        """
+        Добавляет или удаляет несколько рецептов для пользователя в
+        указанной модели.
+
+        Рецепты загружаются одним запросом, записи добавляются одним INSERT
+        и удаляются одним DELETE, а счетчики и версия списка покупок
+        обновляются сигналами links_created и links_deleted для всех
+        записей сразу.
+        """
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        if request.method == 'DELETE':
+            deleted = model.objects.filter(
+                user=request.user,
+                recipe_id__in=recipe_ids
+            ).delete_and_fetch()
+            if not deleted:
+                return Response(status=status.HTTP_400_BAD_REQUEST)
+            links_deleted.send(sender=model, instances=deleted)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'image_renditions', 'cooking_time'
+        ).in_bulk(recipe_ids)
+        missing_ids = sorted(set(recipe_ids) - recipes.keys())
+        if missing_ids:
+            raise ValidationError({
+                'recipes': [
+                    'Рецепты не найдены: '
+                    f'{", ".join(map(str, missing_ids))}.'
+                ]
+            })
+        created = model.objects.create_missing(
+            [
+                model(user=request.user, recipe=recipes[recipe_id])
+                for recipe_id in dict.fromkeys(recipe_ids)
+            ],
+            send_signals=False
+        )
+        if not created:
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: ['Рецепты уже добавлены.']
+            })
+        links_created.send(sender=model, instances=created)
+        return Response(
+            RecipeShortSerializer(
+                [obj.recipe for obj in created],
+                many=True,
+                context=self.get_serializer_context()
+            ).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ['favorite', 'shopping_cart']:
+            # Для ответа нужен только сокращенный рецепт.
+            return queryset.only(
+                'id', 'name', 'image', 'image_renditions', 'cooking_time'
+            )
+        if self.action in ['update', 'partial_update', 'destroy']:
+            # Ответ на изменение строится по перечитанному рецепту (см.
+            # RecipeWriteSerializer.to_representation), подгрузки не нужны.
+            return queryset
+        return queryset.with_related().with_user_flags(self.request.user)
+
     def get_permissions(self):
         if self.action == 'update':
             return [ReadOnly()]
@@ -62,16 +62,24 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('POSTGRES_DB', 'django'),
-        'USER': os.getenv('POSTGRES_USER', 'django'),
-        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
-        'HOST': os.getenv('DB_HOST', 'db'),
-        'PORT': os.getenv('DB_PORT', 5432),
+if os.getenv('USE_SQLITE', '').lower() == 'true':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'django'),
+            'USER': os.getenv('POSTGRES_USER', 'django'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'db'),
+            'PORT': os.getenv('DB_PORT', 5432),
+        }
     }
-}
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -113,10 +121,90 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly'
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.LimitPageNumberPagination',
     'PAGE_SIZE': 6,
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
+    }
+}
+
+REFERENCE_DATA_CACHE_TIMEOUT = 60 * 60 * 24
+
+COUNT_CACHE_TIMEOUT = 60
+COUNT_ESTIMATE_THRESHOLD = 100_000
+
+INGREDIENT_AUTOCOMPLETE_TRIE = (
+    os.getenv('INGREDIENT_AUTOCOMPLETE_TRIE', 'true').lower() == 'true'
+)
+INGREDIENT_AUTOCOMPLETE_LIMIT = 20
+INGREDIENT_AUTOCOMPLETE_MAX_LIMIT = 100
+INGREDIENT_AUTOCOMPLETE_TTL = 5 * 60
+
+# Подбор рецептов по ингредиентам: время жизни индекса в процессе и
+# максимальное количество ингредиентов в запросе.
+RECIPE_MATCHING_TTL = 5 * 60
+RECIPE_MATCHING_MAX_INGREDIENTS = 50
+
+SHOPPING_CART_CACHE_TIMEOUT = 60 * 60
+# Максимальное количество рецептов в одном запросе массового добавления в
+# избранное и список покупок.
+RECIPE_BULK_MAX_IDS = 100
+
+SHOPPING_CART_PDF_FONT = os.getenv(
+    'SHOPPING_CART_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+
+# Уменьшенные копии изображений: наибольшая сторона в пикселях.
+IMAGE_RENDITIONS = {
+    'detail': 1200,
+    'card': 600,
+    'thumbnail': 200,
+}
+# Форматы копий и качество сжатия.
+IMAGE_RENDITION_FORMATS = {
+    'webp': 80,
+    'jpeg': 82,
+}
+# Размер декодированного изображения из Base64, байт.
+IMAGE_MAX_UPLOAD_SIZE = 8 * 1024 * 1024
+IMAGE_MAX_PIXELS = 50_000_000
+# При значении 0 копии создаются в потоке запроса. SQLite не допускает
+# параллельную запись из фоновых потоков, поэтому для нее это значение по
+# умолчанию.
+IMAGE_PROCESSING_WORKERS = int(os.getenv(
+    'IMAGE_PROCESSING_WORKERS',
+    0 if DATABASES['default']['ENGINE'].endswith('sqlite3') else 2
+))
+
+# Лента подписок: рецепты авторов, у которых подписчиков не меньше
+# FEED_FANOUT_MAX_SUBSCRIBERS, не копируются в ленты, а добавляются при
+# чтении. Записи ленты создаются пачками по FEED_FANOUT_BATCH_SIZE в пуле
+# из FEED_FANOUT_WORKERS потоков, при значении 0 - в потоке запроса.
+FEED_FANOUT_MAX_SUBSCRIBERS = int(
+    os.getenv('FEED_FANOUT_MAX_SUBSCRIBERS', 1000)
+)
+FEED_FANOUT_BATCH_SIZE = 1000
+FEED_FANOUT_WORKERS = int(os.getenv(
+    'FEED_FANOUT_WORKERS',
+    0 if DATABASES['default']['ENGINE'].endswith('sqlite3') else 2
+))
+
+SHORT_LINK_RANDOM_CODES = (
+    os.getenv('SHORT_LINK_RANDOM_CODES', 'false').lower() == 'true'
+)
+SHORT_LINK_CODE_LENGTH = 7
+SHORT_LINK_CACHE_SIZE = 10_000
+SHORT_LINK_CACHE_TTL = 10 * 60
+SHORT_LINK_PERMANENT_REDIRECT = False
+SHORT_LINK_HITS_FLUSH_INTERVAL = 60
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
 }
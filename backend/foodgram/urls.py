@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from recipes.views import short_link_redirect
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    path('s/<str:code>', short_link_redirect, name='short-link'),
 ]
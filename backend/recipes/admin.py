@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
 
 from recipes.models import (
     Favorite,
@@ -6,11 +7,15 @@ from recipes.models import (
     Recipe,
     RecipeIngredient,
     ShoppingCart,
+    ShortLink,
     Subscription,
     Tag,
 )
 
 
+User = get_user_model()
+
+
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     """
@@ -54,18 +59,21 @@ class RecipeAdmin(admin.ModelAdmin):
     - Отображает название имя и автора рецепта в списке,
     - Позволяет фильтровать рецепты по тегам,
     - Позволяет редактировать ингредиенты на странице рецепта,
-    - Позволяет увидеть количество добавлений рецепта в избранноое на странице
-      рецепта.
+    - Позволяет увидеть количество добавлений рецепта в избранноое и в списки
+      покупок на странице рецепта.
     """
 
     list_display = ['name', 'author']
     list_filter = ['tags']
-    readonly_fields = ['favorites_count']
+    readonly_fields = ['favorites_count', 'in_carts_count']
     inlines = [RecipeIngredientInline]
 
-    @admin.display(description='Добавлено в избранное')
-    def favorites_count(self, obj):
-        return obj.favorited_by.count()
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if change:
+            ShoppingCart.bump_version(
+                User.objects.filter(shopping_cart__recipe=form.instance)
+            )
 
     @admin.display(description='Ингредиенты')
     def get_ingredients(self, obj):
@@ -107,3 +115,17 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     """
 
     list_display = ['user', 'recipe']
+
+
+@admin.register(ShortLink)
+class ShortLinkAdmin(admin.ModelAdmin):
+    """
+    Админ-панель для коротких ссылок.
+
+    - Отображает код ссылки, рецепт и количество переходов по ней.
+    """
+
+    list_display = ['code', 'recipe', 'hits']
+    list_select_related = ['recipe']
+    search_fields = ['code']
+    readonly_fields = ['hits']
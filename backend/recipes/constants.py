@@ -5,3 +5,7 @@ MAX_INGREDIENT_NAME = 128
 MAX_MEASUREMENT_UNIT = 64
 
 MAX_RECIPE_NAME = 256
+
+MAX_SHORT_LINK_CODE = 16
+
+MAX_CACHE_VERSION_NAME = 32
@@ -0,0 +1,304 @@
+import heapq
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, transaction
+from django.db.models import Q
+
+from recipes.models import FeedEntry, Recipe, Subscription
+
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def is_fanned_out(subscribers_count):
+    """
+    Проверяет, копируются ли рецепты автора в ленты подписчиков.
+
+    Рецепты авторов с большим количеством подписчиков не копируются, а
+    добавляются в ленту при чтении.
+    """
+    return subscribers_count < settings.FEED_FANOUT_MAX_SUBSCRIBERS
+
+
+def _create_in_batches(queryset, field, make_entry):
+    """
+    Создает записи ленты для строк queryset пачками.
+
+    Строки перебираются по возрастанию field без OFFSET, каждая пачка
+    вставляется одним запросом, существующие записи пропускаются.
+    Возвращает количество обработанных строк.
+    """
+    last, processed = 0, 0
+    while batch := list(
+        queryset.filter(**{f'{field}__gt': last}).order_by(field)[
+            :settings.FEED_FANOUT_BATCH_SIZE
+        ]
+    ):
+        FeedEntry.objects.bulk_create(
+            [make_entry(row) for row in batch], ignore_conflicts=True
+        )
+        last = batch[-1][field]
+        processed += len(batch)
+    return processed
+
+
+def fan_out_recipe(recipe_id):
+    """Добавляет рецепт в ленты подписчиков автора."""
+    recipe = Recipe.objects.filter(pk=recipe_id).values(
+        'author_id', 'pub_date', 'author__subscribers_count'
+    ).first()
+    if recipe is None or not is_fanned_out(
+        recipe['author__subscribers_count']
+    ):
+        return 0
+    return _create_in_batches(
+        Subscription.objects.filter(
+            subscribing_id=recipe['author_id']
+        ).values('subscriber_id'),
+        'subscriber_id',
+        lambda row: FeedEntry(
+            user_id=row['subscriber_id'],
+            recipe_id=recipe_id,
+            author_id=recipe['author_id'],
+            pub_date=recipe['pub_date']
+        )
+    )
+
+
+def backfill_feed(user_id, author_id):
+    """Добавляет рецепты автора в ленту нового подписчика."""
+    subscribers_count = Subscription.objects.filter(
+        subscriber_id=user_id, subscribing_id=author_id
+    ).order_by().values_list(
+        'subscribing__subscribers_count', flat=True
+    ).first()
+    if subscribers_count is None or not is_fanned_out(subscribers_count):
+        return 0
+    return _create_in_batches(
+        Recipe.objects.filter(author_id=author_id).values('id', 'pub_date'),
+        'id',
+        lambda row: FeedEntry(
+            user_id=user_id,
+            recipe_id=row['id'],
+            author_id=author_id,
+            pub_date=row['pub_date']
+        )
+    )
+
+
+def backfill_author_feeds(author_id):
+    """
+    Добавляет рецепты автора в ленты всех его подписчиков одним запросом
+    INSERT ... SELECT.
+
+    Нужна, когда у автора становится меньше FEED_FANOUT_MAX_SUBSCRIBERS
+    подписчиков: рецепты, опубликованные раньше, в ленты не копировались, а
+    get_feed перестает добавлять их при чтении. Порог проверяется в том же
+    запросе, существующие записи пропускаются. Возвращает количество
+    добавленных записей.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _insert_feed_entries_sql(
+                'subscription.subscribing_id = %s AND '
+                'author.subscribers_count < %s'
+            ) + ' ON CONFLICT DO NOTHING',
+            [author_id, settings.FEED_FANOUT_MAX_SUBSCRIBERS]
+        )
+        return cursor.rowcount
+
+
+def trim_feed(user_id, author_id):
+    """Удаляет рецепты автора из ленты пользователя."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def _call_logged(function, *args):
+    """Выполняет заполнение лент и записывает ошибку в лог."""
+    try:
+        function(*args)
+    except Exception:
+        logger.exception(
+            'Не удалось обновить ленты подписок: %s%r',
+            function.__name__,
+            args
+        )
+
+
+def _run(function, *args):
+    """Выполняет заполнение лент в фоновом потоке."""
+    try:
+        _call_logged(function, *args)
+    finally:
+        connections.close_all()
+
+
+def get_executor():
+    """Возвращает пул потоков для заполнения лент подписок."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.FEED_FANOUT_WORKERS,
+                thread_name_prefix='feed'
+            )
+        return _executor
+
+
+def _schedule(function, *args):
+    """
+    Ставит заполнение лент в очередь после коммита транзакции.
+
+    Если FEED_FANOUT_WORKERS равен 0, ленты заполняются сразу в текущем
+    потоке.
+    """
+    if not settings.FEED_FANOUT_WORKERS:
+        transaction.on_commit(lambda: _call_logged(function, *args))
+        return
+    transaction.on_commit(lambda: get_executor().submit(_run, function, *args))
+
+
+def schedule_fan_out(recipe):
+    """Ставит в очередь добавление нового рецепта в ленты подписчиков."""
+    _schedule(fan_out_recipe, recipe.pk)
+
+
+def schedule_author_backfill(author_id):
+    """
+    Ставит в очередь копирование рецептов автора в ленты подписчиков, если
+    у автора стало на одного подписчика меньше порога
+    FEED_FANOUT_MAX_SUBSCRIBERS.
+
+    Вызывается после уменьшения счетчика подписчиков в той же транзакции:
+    строка автора заблокирована UPDATE счетчика, поэтому переход через порог
+    видит ровно одно удаление подписки.
+    """
+    subscribers_count = User.objects.filter(pk=author_id).values_list(
+        'subscribers_count', flat=True
+    ).first()
+    if subscribers_count == settings.FEED_FANOUT_MAX_SUBSCRIBERS - 1:
+        _schedule(backfill_author_feeds, author_id)
+
+
+def schedule_backfill(subscription):
+    """Ставит в очередь добавление рецептов автора в ленту подписчика."""
+    _schedule(
+        backfill_feed, subscription.subscriber_id, subscription.subscribing_id
+    )
+
+
+def get_feed(user, position, limit):
+    """
+    Возвращает до limit записей ленты подписок пользователя.
+
+    Записи - кортежи (дата публикации, id рецепта) в порядке ленты
+    рецептов: от новых к старым, при равной дате по возрастанию id.
+    position - такой же кортеж последней записи предыдущей страницы или
+    None для первой страницы.
+
+    Скопированные в ленту записи объединяются с рецептами авторов, рецепты
+    которых не копируются (FEED_FANOUT_MAX_SUBSCRIBERS). Каждый источник
+    читается по индексу и не больше чем на limit строк.
+    """
+    entries = FeedEntry.objects.filter(user=user)
+    authors = list(
+        Subscription.objects.filter(
+            subscriber=user,
+            subscribing__subscribers_count__gte=(
+                settings.FEED_FANOUT_MAX_SUBSCRIBERS
+            )
+        ).order_by().values_list('subscribing_id', flat=True)
+    )
+    recipes = Recipe.objects.filter(author_id__in=authors)
+    if position is not None:
+        pub_date, recipe_id = position
+        entries = entries.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, recipe_id__gt=recipe_id)
+        )
+        recipes = recipes.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__gt=recipe_id)
+        )
+    sources = [
+        entries.order_by('-pub_date', 'recipe_id').values_list(
+            'pub_date', 'recipe_id'
+        )[:limit]
+    ]
+    if authors:
+        sources.append(
+            recipes.order_by('-pub_date', 'id').values_list(
+                'pub_date', 'id'
+            )[:limit]
+        )
+    feed = []
+    for entry in heapq.merge(
+        *sources, key=lambda entry: (entry[0], -entry[1]), reverse=True
+    ):
+        # Рецепт автора, переставшего копировать рецепты в ленты, может
+        # быть в обоих источниках.
+        if feed and feed[-1] == entry:
+            continue
+        feed.append(entry)
+        if len(feed) == limit:
+            break
+    return feed
+
+
+def rebuild_feeds():
+    """
+    Заново заполняет ленты подписок всех пользователей одним запросом
+    INSERT ... SELECT.
+
+    Нужна после загрузки подписок и рецептов без сигналов и после изменения
+    FEED_FANOUT_MAX_SUBSCRIBERS. Возвращает количество записей.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # TRUNCATE невозможен, пока в транзакции есть отложенные проверки
+            # внешних ключей, например после загрузки данных в той же
+            # транзакции: check_constraints() выполняет их сразу.
+            connection.check_constraints()
+            cursor.execute(
+                'TRUNCATE '
+                + connection.ops.quote_name(FeedEntry._meta.db_table)
+            )
+        else:
+            FeedEntry.objects.all().delete()
+        cursor.execute(
+            _insert_feed_entries_sql('author.subscribers_count < %s')
+            # Строки вставляются в порядке индекса ленты.
+            + ' ORDER BY subscription.subscriber_id, recipe.pub_date DESC, '
+            'recipe.id',
+            [settings.FEED_FANOUT_MAX_SUBSCRIBERS]
+        )
+        return cursor.rowcount
+
+
+def _insert_feed_entries_sql(where):
+    """
+    Возвращает INSERT ... SELECT записей ленты для рецептов авторов из
+    подписок, подходящих под условие where.
+
+    В условии доступны таблицы subscription, author и recipe.
+    """
+    quote = connection.ops.quote_name
+    return (
+        f'INSERT INTO {quote(FeedEntry._meta.db_table)} '
+        '(user_id, recipe_id, author_id, pub_date) '
+        'SELECT subscription.subscriber_id, recipe.id, '
+        'recipe.author_id, recipe.pub_date '
+        f'FROM {quote(Subscription._meta.db_table)} AS subscription '
+        f'JOIN {quote(User._meta.db_table)} AS author '
+        'ON author.id = subscription.subscribing_id '
+        f'JOIN {quote(Recipe._meta.db_table)} AS recipe '
+        'ON recipe.author_id = subscription.subscribing_id '
+        f'WHERE {where}'
+    )
@@ -0,0 +1,199 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+
+logger = logging.getLogger(__name__)
+
+# Форматы Pillow для расширений файлов копий.
+FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_renditions_field(image_field):
+    """Возвращает имя поля с копиями для поля изображения."""
+    return f'{image_field}_renditions'
+
+
+def needs_renditions(instance, image_field):
+    """Проверяет, созданы ли копии для текущего файла изображения."""
+    image = getattr(instance, image_field)
+    renditions = getattr(instance, get_renditions_field(image_field))
+    if not image:
+        return bool(renditions)
+    return renditions.get('source') != image.name
+
+
+def render_image(file):
+    """
+    Создает уменьшенные копии изображения во всех форматах.
+
+    Для JPEG используется режим draft: Pillow декодирует изображение сразу в
+    уменьшенном масштабе, поэтому фотографии с телефона не распаковываются
+    целиком. Копии создаются от большей к меньшей, каждая следующая
+    уменьшается из предыдущей. Возвращает словарь
+    {размер: {'width', 'height', 'files': {формат: имя файла}}}.
+    """
+    sizes = sorted(
+        settings.IMAGE_RENDITIONS.items(),
+        key=lambda item: item[1],
+        reverse=True
+    )
+    directory, name = os.path.split(file.name)
+    stem = os.path.splitext(name)[0]
+    with file.open('rb'):
+        image = Image.open(file)
+        image.draft('RGB', (sizes[0][1], sizes[0][1]))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert(
+            'RGBA' if image.has_transparency_data else 'RGB'
+        )
+    renditions = {}
+    previous = None
+    for size_name, side in sizes:
+        if previous is not None and max(image.size) <= side:
+            # Изображение меньше этого размера: используем готовые файлы.
+            renditions[size_name] = previous
+            continue
+        image.thumbnail((side, side), Image.Resampling.LANCZOS)
+        files = {}
+        for extension, quality in settings.IMAGE_RENDITION_FORMATS.items():
+            files[extension] = default_storage.save(
+                os.path.join(
+                    directory,
+                    'renditions',
+                    f'{stem}_{size_name}.{extension}'
+                ),
+                ContentFile(_encode(image, extension, quality))
+            )
+        renditions[size_name] = previous = {
+            'width': image.width,
+            'height': image.height,
+            'files': files,
+        }
+    return renditions
+
+
+def _encode(image, extension, quality):
+    """Кодирует изображение в указанный формат."""
+    if extension == 'jpeg' and image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, FORMATS[extension], quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def delete_renditions(renditions):
+    """Удаляет файлы копий."""
+    names = {
+        name
+        for size in renditions.get('sizes', {}).values()
+        for name in size['files'].values()
+    }
+    for name in names:
+        default_storage.delete(name)
+
+
+def update_renditions(model, pk, image_field, force=False):
+    """
+    Создает копии изображения объекта и сохраняет их описание в БД.
+
+    Если копии текущего изображения уже есть, они пересоздаются только при
+    force=True. Описание сохраняется через update() под блокировкой строки и
+    только если изображение не изменилось во время обработки, поэтому
+    сигналы post_save не отправляются повторно, а параллельные задачи для
+    одного объекта не теряют файлы. Копии предыдущего изображения удаляются.
+    """
+    renditions_field = get_renditions_field(image_field)
+    queryset = model.objects.filter(pk=pk).only(
+        'pk', image_field, renditions_field
+    )
+    instance = queryset.first()
+    if instance is None or not (
+        force or needs_renditions(instance, image_field)
+    ):
+        return False
+    image = getattr(instance, image_field)
+    renditions = {}
+    if image:
+        renditions = {'source': image.name, 'sizes': render_image(image)}
+    with transaction.atomic():
+        current = queryset.select_for_update().first()
+        updated = (
+            current is not None
+            and (getattr(current, image_field).name or '')
+            == (image.name or '')
+        )
+        if updated:
+            stale = getattr(current, renditions_field)
+            queryset.update(**{renditions_field: renditions})
+    delete_renditions(stale if updated else renditions)
+    return updated
+
+
+def _update_renditions_logged(model, pk, image_field):
+    """
+    Выполняет update_renditions и записывает ошибку в лог.
+
+    Копии создаются после коммита, поэтому ошибка обработки изображения не
+    должна доходить до сохранившего объект кода.
+    """
+    try:
+        update_renditions(model, pk, image_field)
+    except Exception:
+        logger.exception(
+            'Не удалось создать копии изображения %s %s', model.__name__, pk
+        )
+
+
+def _run(model, pk, image_field):
+    """Выполняет update_renditions в фоновом потоке."""
+    try:
+        _update_renditions_logged(model, pk, image_field)
+    finally:
+        connections.close_all()
+
+
+def get_executor():
+    """Возвращает пул потоков для обработки изображений."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSING_WORKERS,
+                thread_name_prefix='images'
+            )
+        return _executor
+
+
+def schedule_renditions(instance, image_field):
+    """
+    Ставит создание копий изображения в очередь после коммита транзакции.
+
+    Если IMAGE_PROCESSING_WORKERS равен 0, копии создаются сразу в текущем
+    потоке.
+    """
+    model, pk = type(instance), instance.pk
+    if not settings.IMAGE_PROCESSING_WORKERS:
+        transaction.on_commit(
+            lambda: _update_renditions_logged(model, pk, image_field)
+        )
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(_run, model, pk, image_field)
+    )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import update_renditions
+from recipes.signals import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    """
+    Команда, которая создает уменьшенные копии изображений рецептов и
+    аватаров, для которых их еще нет.
+
+    Нужна после первого развертывания, изменения IMAGE_RENDITIONS (с
+    --force) и перезапуска сервера, при котором задачи фоновой очереди
+    были потеряны.
+    """
+
+    help = 'Создание уменьшенных копий изображений рецептов и аватаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать копии для всех изображений'
+        )
+
+    def handle(self, *args, **options):
+        for model, image_field in IMAGE_FIELDS.items():
+            processed = 0
+            for pk in model.objects.values_list('pk', flat=True).iterator():
+                processed += update_renditions(
+                    model, pk, image_field, force=options['force']
+                )
+            self.stdout.write(
+                f'{model.__name__}.{image_field}: обработано {processed}'
+            )
+        self.stdout.write(self.style.SUCCESS('Копии изображений созданы'))
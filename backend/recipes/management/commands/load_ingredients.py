@@ -1,17 +1,130 @@
+import csv
 import json
 import os
+import re
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
-from recipes.models import Ingredient
+from recipes.constants import MAX_INGREDIENT_NAME, MAX_MEASUREMENT_UNIT
+from recipes.models import Ingredient, ShoppingCart
+from recipes.signals import ingredients_loaded
+
+
+User = get_user_model()
+
+# Размер фрагмента файла, который читается за один раз при разборе JSON.
+JSON_CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r'\s*')
+
+
+def read_json(file):
+    """
+    Читает элементы JSON-массива по одному.
+
+    Файл читается фрагментами, в памяти хранится только текущий фрагмент,
+    поэтому размер файла не ограничен объемом памяти.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = '', 0, False
+    state = 'start'
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if position == len(buffer):
+            if eof:
+                raise ValueError('Неожиданный конец файла')
+            chunk = file.read(JSON_CHUNK_SIZE)
+            buffer, position, eof = chunk, 0, not chunk
+            continue
+        char = buffer[position]
+        if state == 'start':
+            if char != '[':
+                raise ValueError('Файл должен содержать JSON-массив')
+            position += 1
+            state = 'first'
+            continue
+        if char == ']' and state in ('first', 'separator'):
+            return
+        if state == 'separator':
+            if char != ',':
+                raise ValueError(f'Ожидалась запятая, получено: {char!r}')
+            position += 1
+            state = 'item'
+            continue
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Элемент не поместился во фрагмент: дочитываем файл.
+            chunk = file.read(JSON_CHUNK_SIZE)
+            buffer, position, eof = buffer[position:] + chunk, 0, not chunk
+            continue
+        yield item
+        state = 'separator'
+
+
+def read_jsonl(file):
+    """Читает объекты JSON Lines по одному на строку."""
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(file):
+    """
+    Читает строки CSV вида «название,единица измерения».
+
+    Строка заголовка name,measurement_unit, если есть, пропускается.
+    """
+    for row in csv.reader(file):
+        if row == ['name', 'measurement_unit']:
+            continue
+        yield dict(zip(['name', 'measurement_unit'], row))
+
+
+READERS = {
+    'json': read_json,
+    'jsonl': read_jsonl,
+    'csv': read_csv,
+}
+
+
+def clean_item(item):
+    """
+    Возвращает кортеж (название, единица измерения) или None, если запись
+    некорректна.
+    """
+    if not isinstance(item, dict):
+        return None
+    name = item.get('name')
+    unit = item.get('measurement_unit')
+    if not isinstance(name, str) or not isinstance(unit, str):
+        return None
+    name, unit = name.strip(), unit.strip()
+    if not (
+        0 < len(name) <= MAX_INGREDIENT_NAME
+        and 0 < len(unit) <= MAX_MEASUREMENT_UNIT
+    ):
+        return None
+    return name, unit
 
 
 class Command(BaseCommand):
     """
-    Команда, которая позволяет загрузить ингредиенты из JSON файла в базу
-    данных.
+    Команда, которая загружает ингредиенты из файла JSON, JSON Lines или CSV
+    в базу данных.
+
+    Повторный запуск безопасен: новые ингредиенты добавляются, у
+    существующих с тем же названием обновляется единица измерения, записи
+    без изменений пропускаются. Файл читается потоково и обрабатывается
+    пачками, вся загрузка выполняется в одной транзакции.
     """
 
+    help = 'Загрузка и обновление ингредиентов из файла'
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--path',
@@ -19,29 +132,113 @@ class Command(BaseCommand):
             required=True,
             help='Путь к файлу'
         )
+        parser.add_argument(
+            '--format',
+            choices=READERS,
+            help='Формат файла, по умолчанию определяется по расширению'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество записей в одном запросе к БД'
+        )
 
     def handle(self, *args, **options):
         file_path = options['path']
         if not os.path.exists(file_path):
-            self.stdout.write(
-                self.style.ERROR(f'Файл не найден: {file_path}')
+            raise CommandError(f'Файл не найден: {file_path}')
+        file_format = (
+            options['format']
+            or os.path.splitext(file_path)[1].lstrip('.').lower()
+        )
+        if file_format not in READERS:
+            raise CommandError(
+                f'Неизвестный формат файла: {file_format}, укажите --format'
             )
-            return
-
-        if Ingredient.objects.exists():
-            self.stdout.write(self.style.WARNING('Ингредиенты уже загружены'))
-            return
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше 0')
 
-        with open(file_path, encoding='utf-8') as file:
-            data = json.load(file)
-        ingredients = [
-            Ingredient(
-                name=item['name'],
-                measurement_unit=item['measurement_unit']
+        self.verbosity = options['verbosity']
+        self.counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        processed = 0
+        try:
+            with (
+                open(file_path, encoding='utf-8', newline='') as file,
+                transaction.atomic()
+            ):
+                items = READERS[file_format](file)
+                while batch := list(islice(items, options['batch_size'])):
+                    self._load_batch(batch)
+                    processed += len(batch)
+                    self.stdout.write(f'Обработано записей: {processed}')
+        except (ValueError, csv.Error) as error:
+            raise CommandError(
+                f'Ошибка чтения файла после {processed} записей: {error}'
             )
-            for item in data
-        ]
-        Ingredient.objects.bulk_create(ingredients)
+
+        if self.counts['inserted'] or self.counts['updated']:
+            ingredients_loaded.send(sender=self.__class__)
         self.stdout.write(
-            self.style.SUCCESS(f'Загружено {len(ingredients)} ингредиентов')
+            self.style.SUCCESS(
+                f'Добавлено: {self.counts["inserted"]}, '
+                f'обновлено: {self.counts["updated"]}, '
+                f'пропущено: {self.counts["skipped"]}'
+            )
         )
+
+    def _load_batch(self, batch):
+        """
+        Добавляет и обновляет ингредиенты пачки одним запросом.
+
+        Существующие ингредиенты выбираются одним запросом, чтобы отделить
+        новые записи от измененных и пропустить записи без изменений.
+        Пропускаются также некорректные записи и повторы названия внутри
+        пачки.
+        """
+        ingredients = {}
+        for item in batch:
+            cleaned = clean_item(item)
+            if cleaned is None:
+                if self.verbosity > 1:
+                    self.stderr.write(f'Некорректная запись: {item!r}')
+                self.counts['skipped'] += 1
+                continue
+            name, unit = cleaned
+            if name in ingredients:
+                self.counts['skipped'] += 1
+            ingredients[name] = unit
+        existing = {
+            name: (pk, unit)
+            for pk, name, unit in Ingredient.objects.filter(
+                name__in=ingredients
+            ).values_list('pk', 'name', 'measurement_unit')
+        }
+        changed = []
+        updated_ids = []
+        for name, unit in ingredients.items():
+            if name not in existing:
+                self.counts['inserted'] += 1
+            elif existing[name][1] != unit:
+                self.counts['updated'] += 1
+                updated_ids.append(existing[name][0])
+            else:
+                self.counts['skipped'] += 1
+                continue
+            changed.append(Ingredient(name=name, measurement_unit=unit))
+        Ingredient.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=['name'],
+            update_fields=['measurement_unit']
+        )
+        if updated_ids:
+            # Сигналы post_save не отправляются, поэтому версии списков
+            # покупок с измененными ингредиентами обновляются здесь.
+            ShoppingCart.bump_version(
+                User.objects.filter(
+                    shopping_cart__recipe__recipe_ingredients__ingredient__in=(
+                        updated_ids
+                    )
+                )
+            )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from recipes.feed import rebuild_feeds
+
+
+class Command(BaseCommand):
+    """
+    Команда, которая заново заполняет ленты подписок всех пользователей.
+
+    Нужна после массовой загрузки подписок и рецептов, при которой сигналы
+    не отправляются, и после изменения FEED_FANOUT_MAX_SUBSCRIBERS.
+    """
+
+    help = 'Перестроение лент подписок'
+
+    def handle(self, *args, **options):
+        count = rebuild_feeds()
+        self.stdout.write(
+            self.style.SUCCESS(f'Ленты подписок перестроены, записей: {count}')
+        )
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingCart, Subscription
+
+
+User = get_user_model()
+
+
+def count_subquery(model, field):
+    """Возвращает подзапрос количества строк model по внешнему ключу field."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count')
+        ),
+        0
+    )
+
+
+def recount_counters():
+    """
+    Пересчитывает счетчики одним UPDATE на каждый счетчик.
+
+    Обновляются только строки, в которых значение разошлось с фактическим.
+    Возвращает словарь с количеством исправленных строк для каждого счетчика.
+    """
+    counters = [
+        (Recipe, 'favorites_count', count_subquery(Favorite, 'recipe')),
+        (Recipe, 'in_carts_count', count_subquery(ShoppingCart, 'recipe')),
+        (User, 'recipes_count', count_subquery(Recipe, 'author')),
+        (
+            User,
+            'subscribers_count',
+            count_subquery(Subscription, 'subscribing')
+        ),
+    ]
+    result = {}
+    with transaction.atomic():
+        for model, field, subquery in counters:
+            result[f'{model.__name__}.{field}'] = (
+                model.objects.exclude(**{field: subquery})
+                .update(**{field: subquery})
+            )
+    return result
+
+
+class Command(BaseCommand):
+    """
+    Команда, которая пересчитывает денормализованные счетчики рецептов и
+    пользователей и исправляет расхождения с фактическими данными.
+    """
+
+    help = 'Пересчет счетчиков избранного, покупок, рецептов и подписчиков'
+
+    def handle(self, *args, **options):
+        result = recount_counters()
+        for counter, fixed in result.items():
+            self.stdout.write(f'{counter}: исправлено {fixed}')
+        self.stdout.write(self.style.SUCCESS('Счетчики пересчитаны'))
@@ -0,0 +1,450 @@
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Subscription,
+    Tag,
+)
+from recipes.search import update_search_vectors
+
+
+User = get_user_model()
+
+SEED_IMAGE = 'recipes/images/seed.jpg'
+TAGS = [
+    ('Завтрак', 'breakfast'),
+    ('Обед', 'lunch'),
+    ('Ужин', 'dinner'),
+    ('Десерт', 'dessert'),
+    ('Выпечка', 'bakery'),
+    ('Салаты', 'salads'),
+    ('Супы', 'soups'),
+    ('Напитки', 'drinks'),
+]
+FIRST_NAMES = [
+    'Анна', 'Иван', 'Мария', 'Петр', 'Ольга', 'Сергей', 'Елена', 'Дмитрий',
+]
+LAST_NAMES = [
+    'Иванова', 'Петров', 'Смирнова', 'Кузнецов', 'Попова', 'Соколов',
+]
+DISH_ADJECTIVES = [
+    'Домашний', 'Быстрый', 'Праздничный', 'Летний', 'Пряный', 'Нежный',
+    'Деревенский', 'Острый',
+]
+DISHES = [
+    'пирог', 'суп', 'салат', 'плов', 'омлет', 'рагу', 'десерт', 'соус',
+    'паштет', 'кекс',
+]
+SENTENCES = [
+    'Нарежьте ингредиенты небольшими кусочками.',
+    'Разогрейте сковороду и добавьте немного масла.',
+    'Тушите на медленном огне до готовности.',
+    'Перемешайте и оставьте на несколько минут.',
+    'Подавайте горячим, украсив зеленью.',
+    'Выпекайте в разогретой духовке до золотистой корочки.',
+]
+
+
+def cumulative_weights(size, exponent):
+    """
+    Возвращает накопленные веса распределения Ципфа для size элементов.
+
+    Элемент с номером k выбирается с вероятностью, пропорциональной
+    1 / k ** exponent: несколько первых элементов выбираются часто,
+    остальные редко.
+    """
+    return list(
+        accumulate(1 / rank ** exponent for rank in range(1, size + 1))
+    )
+
+
+def copy_value(value):
+    """Возвращает значение в текстовом формате COPY PostgreSQL."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+class Command(BaseCommand):
+    """
+    Команда, которая заполняет базу данных синтетическими пользователями,
+    рецептами, подписками, избранным и списками покупок для нагрузочного
+    тестирования.
+
+    Активность распределена по степенному закону: немного авторов пишут
+    большую часть рецептов и собирают большую часть подписчиков, а
+    небольшая доля рецептов попадает в большую часть избранного и списков
+    покупок. При одинаковом --seed создаются одинаковые данные.
+
+    В PostgreSQL строки загружаются через COPY, в остальных СУБД пачками
+    INSERT. Идентификаторы пользователей и рецептов назначаются командой,
+    поэтому во время ее работы другие записи в эти таблицы добавлять нельзя.
+    Сигналы моделей не отправляются, счетчики, ленты подписок и поисковые
+    векторы пересчитываются в конце.
+    """
+
+    help = 'Генерация синтетических данных для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=10000,
+            help='Количество пользователей'
+        )
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            default=100000,
+            help='Количество рецептов'
+        )
+        parser.add_argument(
+            '--subscriptions',
+            type=float,
+            default=20,
+            help='Среднее количество подписок пользователя'
+        )
+        parser.add_argument(
+            '--favorites',
+            type=float,
+            default=30,
+            help='Среднее количество рецептов в избранном пользователя'
+        )
+        parser.add_argument(
+            '--carts',
+            type=float,
+            default=5,
+            help='Среднее количество рецептов в списке покупок пользователя'
+        )
+        parser.add_argument(
+            '--ingredients-per-recipe',
+            type=int,
+            nargs=2,
+            default=[3, 12],
+            help='Минимальное и максимальное количество ингредиентов рецепта'
+        )
+        parser.add_argument(
+            '--exponent',
+            type=float,
+            default=1.1,
+            help='Показатель степенного распределения популярности'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='За сколько последних дней распределить даты рецептов'
+        )
+        parser.add_argument(
+            '--password',
+            type=str,
+            help='Пароль пользователей, по умолчанию вход по паролю запрещен'
+        )
+        parser.add_argument(
+            '--ingredients-path',
+            type=str,
+            default=str(settings.BASE_DIR / 'data' / 'ingredients.json'),
+            help='Путь к файлу с ингредиентами, если их нет в БД'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Начальное значение генератора случайных чисел'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Количество строк в одной пачке'
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Загружать строки через INSERT и в PostgreSQL'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь')
+        low, high = options['ingredients_per_recipe']
+        if not 1 <= low <= high:
+            raise CommandError('Некорректное количество ингредиентов рецепта')
+        self.options = options
+        self.random = random.Random(options['seed'])
+        self.use_copy = (
+            connection.vendor == 'postgresql' and not options['no_copy']
+        )
+        self.now = timezone.now()
+        started = time.monotonic()
+
+        if not Ingredient.objects.exists():
+            call_command(
+                'load_ingredients',
+                path=options['ingredients_path'],
+                stdout=io.StringIO()
+            )
+        if not default_storage.exists(SEED_IMAGE):
+            buffer = io.BytesIO()
+            Image.new('RGB', (600, 400), (230, 160, 90)).save(buffer, 'JPEG')
+            default_storage.save(SEED_IMAGE, ContentFile(buffer.getvalue()))
+
+        with transaction.atomic():
+            for name, slug in TAGS:
+                Tag.objects.get_or_create(slug=slug, defaults={'name': name})
+            self.tag_ids = list(
+                Tag.objects.order_by('pk').values_list('pk', flat=True)
+            )
+            self.ingredient_ids = list(
+                Ingredient.objects.order_by('pk').values_list('pk', flat=True)
+            )
+            # Популярность задается случайным порядком, чтобы популярными
+            # были не первые по идентификатору записи.
+            self.random.shuffle(self.ingredient_ids)
+            self.user_ids = self._next_ids(User, options['users'])
+            self.recipe_ids = self._next_ids(Recipe, options['recipes'])
+            self.authors = self._popular(self.user_ids)
+            self.popular_recipes = self._popular(self.recipe_ids)
+
+            self._write(User, self._users(), with_pk=True)
+            self._write(Recipe, self._recipes(), with_pk=True)
+            self._write(RecipeIngredient, self._recipe_ingredients())
+            self._write(Recipe.tags.through, self._recipe_tags())
+            self._write(
+                Subscription,
+                self._pairs(
+                    'subscriber_id',
+                    'subscribing_id',
+                    self.authors,
+                    options['subscriptions']
+                )
+            )
+            self._write(
+                Favorite,
+                self._pairs(
+                    'user_id',
+                    'recipe_id',
+                    self.popular_recipes,
+                    options['favorites']
+                )
+            )
+            self._write(
+                ShoppingCart,
+                self._pairs(
+                    'user_id',
+                    'recipe_id',
+                    self.popular_recipes,
+                    options['carts']
+                )
+            )
+            if self.use_copy:
+                with connection.cursor() as cursor:
+                    for sql in connection.ops.sequence_reset_sql(
+                        no_style(), [User, Recipe]
+                    ):
+                        cursor.execute(sql)
+            call_command('recount_counters', stdout=io.StringIO())
+            call_command('rebuild_feed', stdout=io.StringIO())
+            if self.recipe_ids:
+                update_search_vectors(
+                    Recipe.objects.filter(pk__gte=self.recipe_ids[0])
+                )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Данные созданы за {time.monotonic() - started:.1f} с'
+            )
+        )
+
+    def _next_ids(self, model, count):
+        """Возвращает идентификаторы для новых записей модели."""
+        start = (model.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0) + 1
+        return list(range(start, start + count))
+
+    def _popular(self, ids):
+        """
+        Возвращает перемешанные идентификаторы и накопленные веса для выбора
+        с учетом популярности.
+        """
+        ids = list(ids)
+        self.random.shuffle(ids)
+        return ids, cumulative_weights(len(ids), self.options['exponent'])
+
+    def _choose(self, popular, count):
+        """Выбирает до count различных записей с учетом популярности."""
+        ids, weights = popular
+        if not ids:
+            return set()
+        return set(self.random.choices(ids, cum_weights=weights, k=count))
+
+    def _activity(self, mean):
+        """
+        Возвращает количество действий пользователя.
+
+        Количество распределено по закону Парето со средним около mean:
+        большинство пользователей почти неактивны, немногие очень активны.
+        """
+        # Среднее paretovariate(1.5) равно 3.
+        return int(self.random.paretovariate(1.5) * mean / 3)
+
+    def _date(self):
+        """Возвращает случайную дату за последние --days дней."""
+        return self.now - timedelta(
+            seconds=self.random.random() * self.options['days'] * 86400
+        )
+
+    def _users(self):
+        password = make_password(self.options['password'])
+        for user_id in self.user_ids:
+            yield {
+                'id': user_id,
+                'email': f'seed{user_id}@example.com',
+                'username': f'seed{user_id}',
+                'first_name': self.random.choice(FIRST_NAMES),
+                'last_name': self.random.choice(LAST_NAMES),
+                'password': password,
+                'date_joined': self._date(),
+            }
+
+    def _recipes(self):
+        author_ids = self.random.choices(
+            self.authors[0],
+            cum_weights=self.authors[1],
+            k=len(self.recipe_ids)
+        )
+        for recipe_id, author_id in zip(self.recipe_ids, author_ids):
+            yield {
+                'id': recipe_id,
+                'author_id': author_id,
+                'name': (
+                    f'{self.random.choice(DISH_ADJECTIVES)} '
+                    f'{self.random.choice(DISHES)} №{recipe_id}'
+                ),
+                'image': SEED_IMAGE,
+                'text': ' '.join(
+                    self.random.choices(SENTENCES, k=self.random.randint(2, 8))
+                ),
+                'cooking_time': self.random.randint(1, 180),
+                'pub_date': self._date(),
+            }
+
+    def _recipe_ingredients(self):
+        popular = (
+            self.ingredient_ids,
+            cumulative_weights(
+                len(self.ingredient_ids), self.options['exponent']
+            )
+        )
+        low, high = self.options['ingredients_per_recipe']
+        for recipe_id in self.recipe_ids:
+            for ingredient_id in self._choose(
+                popular, self.random.randint(low, high)
+            ):
+                yield {
+                    'recipe_id': recipe_id,
+                    'ingredient_id': ingredient_id,
+                    'amount': self.random.randint(1, 500),
+                }
+
+    def _recipe_tags(self):
+        popular = (
+            self.tag_ids, cumulative_weights(len(self.tag_ids), 1)
+        )
+        for recipe_id in self.recipe_ids:
+            for tag_id in self._choose(popular, self.random.randint(1, 3)):
+                yield {'recipe_id': recipe_id, 'tag_id': tag_id}
+
+    def _pairs(self, user_field, target_field, popular, mean):
+        """Создает связи пользователей с популярными записями."""
+        for user_id in self.user_ids:
+            for target_id in self._choose(popular, self._activity(mean)):
+                if target_id != user_id or target_field == 'recipe_id':
+                    yield {user_field: user_id, target_field: target_id}
+
+    def _write(self, model, rows, with_pk=False):
+        """
+        Записывает строки в таблицу модели пачками по --batch-size.
+
+        Незаданные поля получают значения по умолчанию.
+        """
+        fields = [
+            field for field in model._meta.concrete_fields
+            if with_pk or not field.primary_key
+        ]
+        defaults = {
+            field.attname: field.get_default() for field in fields
+        }
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        total = 0
+        started = time.monotonic()
+        with connection.cursor() as cursor:
+            while batch := list(islice(rows, self.options['batch_size'])):
+                values = [
+                    [
+                        row.get(field.attname, defaults[field.attname])
+                        for field in fields
+                    ]
+                    for row in batch
+                ]
+                if self.use_copy:
+                    data = io.StringIO(''.join(
+                        '\t'.join(map(copy_value, row)) + '\n'
+                        for row in values
+                    ))
+                    cursor.copy_expert(
+                        f'COPY {table} ({columns}) FROM STDIN', data
+                    )
+                else:
+                    cursor.executemany(
+                        f'INSERT INTO {table} ({columns}) VALUES '
+                        f'({", ".join(["%s"] * len(fields))})',
+                        [
+                            [
+                                field.get_db_prep_save(value, connection)
+                                for field, value in zip(fields, row)
+                            ]
+                            for row in values
+                        ]
+                    )
+                total += len(batch)
+                if self.stdout.isatty():
+                    self.stdout.write(
+                        f'{model.__name__}: {total}', ending='\r'
+                    )
+        self.stdout.write(
+            f'{model.__name__}: {total} '
+            f'за {time.monotonic() - started:.1f} с'
+        )
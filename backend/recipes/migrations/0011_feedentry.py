@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-17 07:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Запрос совпадает с recipes.feed.rebuild_feeds.
+FILL_FEED = """
+INSERT INTO recipes_feedentry (user_id, recipe_id, author_id, pub_date)
+SELECT subscription.subscriber_id, recipe.id, recipe.author_id,
+    recipe.pub_date
+FROM recipes_subscription AS subscription
+JOIN users_user AS author ON author.id = subscription.subscribing_id
+JOIN recipes_recipe AS recipe ON recipe.author_id = subscription.subscribing_id
+WHERE author.subscribers_count < %s
+"""
+
+
+def fill_feed(apps, schema_editor):
+    """Заполняет ленты подписок по существующим подпискам."""
+    schema_editor.execute(FILL_FEED, [settings.FEED_FANOUT_MAX_SUBSCRIBERS])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Добавлен')),
+                ('author', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Лента подписок',
+                'ordering': ['-pub_date', 'recipe'],
+                'indexes': [models.Index(fields=['user', '-pub_date', 'recipe'], name='feed_user_pub_date_recipe_idx'), models.Index(fields=['author', 'user'], name='feed_author_user_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry_user_recipe')],
+            },
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,16 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import NotSupportedError, connections, models, transaction
+from django.db.models import Exists, F, OuterRef, Prefetch, Value
+from django.db.models.signals import post_save
 
 from recipes.constants import (
+    MAX_CACHE_VERSION_NAME,
     MAX_INGREDIENT_NAME,
     MAX_MEASUREMENT_UNIT,
     MAX_RECIPE_NAME,
+    MAX_SHORT_LINK_CODE,
     MAX_TAG_NAME,
     MAX_TAG_SLUG,
 )
@@ -14,6 +19,111 @@ from recipes.constants import (
 User = get_user_model()
 
 
+class LinkQuerySet(models.QuerySet):
+    """
+    QuerySet связей с ограничением уникальности.
+
+    Добавление и удаление без гонок выполняются явными запросами INSERT ...
+    ON CONFLICT DO NOTHING RETURNING и DELETE через connection.cursor(), без
+    закрытых методов ORM. Нужна СУБД с поддержкой RETURNING: PostgreSQL или
+    SQLite 3.35+.
+    """
+
+    # Количество первичных ключей в одном запросе DELETE, меньше лимита
+    # параметров SQLite.
+    delete_batch_size = 500
+
+    def create_missing(self, objs, send_signals=True):
+        """
+        Добавляет объекты одним запросом INSERT ... ON CONFLICT DO NOTHING.
+
+        Объекты, которые нарушили бы ограничение уникальности, пропускаются
+        без предварительной проверки и без IntegrityError, поэтому
+        одновременные добавления не конфликтуют. Возвращает добавленные
+        объекты и отправляет для них post_save, как save(), чтобы
+        обновились счетчики и связанные данные. При send_signals=False
+        связанные данные обновляет вызывающий код, например сигналом
+        links_created.
+        """
+        if not objs:
+            return []
+        connection = connections[self.db]
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise NotSupportedError(
+                'Для добавления связей СУБД должна поддерживать RETURNING.'
+            )
+        quote = connection.ops.quote_name
+        opts = self.model._meta
+        fields = [
+            field for field in opts.concrete_fields if not field.primary_key
+        ]
+        # Поля связи - внешние ключи, поэтому значения из RETURNING
+        # совпадают со значениями, переданными в запрос.
+        objs_by_values = {
+            tuple(
+                field.get_db_prep_save(getattr(obj, field.attname), connection)
+                for field in fields
+            ): obj
+            for obj in objs
+        }
+        columns = ', '.join(quote(field.column) for field in fields)
+        row = f'({", ".join(["%s"] * len(fields))})'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(opts.db_table)} ({columns}) '
+                f'VALUES {", ".join([row] * len(objs_by_values))} '
+                'ON CONFLICT DO NOTHING '
+                f'RETURNING {quote(opts.pk.column)}, {columns}',
+                [value for values in objs_by_values for value in values]
+            )
+            rows = cursor.fetchall()
+        created = []
+        for pk, *values in rows:
+            obj = objs_by_values[tuple(values)]
+            obj.pk = pk
+            obj._state.adding = False
+            obj._state.db = self.db
+            created.append(obj)
+            if not send_signals:
+                continue
+            post_save.send(
+                sender=self.model,
+                instance=obj,
+                created=True,
+                update_fields=None,
+                raw=False,
+                using=self.db
+            )
+        return created
+
+    def delete_and_fetch(self):
+        """
+        Удаляет объекты запросами DELETE без отправки post_delete.
+
+        Возвращает удаленные объекты: строки блокируются до удаления,
+        поэтому при одновременном удалении каждый объект возвращается
+        только одним вызовом.
+        """
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        opts = self.model._meta
+        with transaction.atomic(using=self.db):
+            objs = list(self.order_by().select_for_update())
+            with connection.cursor() as cursor:
+                for start in range(0, len(objs), self.delete_batch_size):
+                    pks = [
+                        obj.pk
+                        for obj in objs[start:start + self.delete_batch_size]
+                    ]
+                    cursor.execute(
+                        f'DELETE FROM {quote(opts.db_table)} '
+                        f'WHERE {quote(opts.pk.column)} IN '
+                        f'({", ".join(["%s"] * len(pks))})',
+                        pks
+                    )
+        return objs
+
+
 class UserRecipeBase(models.Model):
     """
     Абстрактная модель для связи пользователя с рецептом.
@@ -32,6 +142,8 @@ class UserRecipeBase(models.Model):
         verbose_name='Рецепт'
     )
 
+    objects = LinkQuerySet.as_manager()
+
     class Meta:
         abstract = True
         ordering = ['user']
@@ -49,6 +161,62 @@ class UserRecipeBase(models.Model):
         return f'{self.user} {self.recipe}'
 
 
+class RecipeQuerySet(models.QuerySet):
+    """QuerySet рецептов с дополнительными выборками для API."""
+
+    def with_related(self):
+        """
+        Подгружает связанные данные, необходимые для чтения рецепта.
+
+        Автор присоединяется через JOIN, теги и ингредиенты загружаются
+        отдельными запросами на всю выборку, поэтому число запросов не зависит
+        от количества рецептов и ингредиентов.
+        """
+        return self.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                ).only(
+                    'recipe',
+                    'amount',
+                    'ingredient__name',
+                    'ingredient__measurement_unit'
+                )
+            )
+        )
+
+    def with_user_flags(self, user):
+        """
+        Аннотирует рецепты флагами текущего пользователя.
+
+        Добавляет is_favorited, is_in_shopping_cart и is_author_subscribed
+        подзапросами EXISTS, чтобы флаги вычислялись одним запросом на всю
+        страницу, а не отдельным запросом на каждый рецепт.
+        """
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+                is_author_subscribed=Value(False)
+            )
+        return self.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_author_subscribed=Exists(
+                Subscription.objects.filter(
+                    subscriber=user,
+                    subscribing=OuterRef('author')
+                )
+            )
+        )
+
+
 class Tag(models.Model):
     """
     Модель тега для рецептов.
@@ -134,6 +302,11 @@ class Recipe(models.Model):
         'Фотография',
         upload_to='recipes/images/',
     )
+    image_renditions = models.JSONField(
+        'Уменьшенные копии фотографии',
+        default=dict,
+        editable=False
+    )
     text = models.TextField('Описание')
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -146,12 +319,42 @@ class Recipe(models.Model):
         validators=[MinValueValidator(1)]
     )
     pub_date = models.DateTimeField('Добавлен', auto_now_add=True)
+    favorites_count = models.PositiveIntegerField(
+        'Добавлено в избранное',
+        default=0,
+        editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        'Добавлено в списки покупок',
+        default=0,
+        editable=False
+    )
+    # Заполняется только в PostgreSQL, см. recipes.search.
+    search_vector = SearchVectorField(
+        'Поисковый вектор',
+        null=True,
+        editable=False
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         default_related_name = 'recipes'
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', 'id'],
+                name='recipe_pub_date_id_idx'
+            ),
+            # Рецепты автора в порядке ленты: фильтр по автору и последние
+            # рецепты авторов в подписках.
+            models.Index(
+                fields=['author', '-pub_date', 'id'],
+                name='recipe_author_pub_date_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -222,6 +425,8 @@ class Subscription(models.Model):
         related_name='subscribers'
     )
 
+    objects = LinkQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
@@ -264,3 +469,132 @@ class ShoppingCart(UserRecipeBase):
         default_related_name = 'shopping_cart'
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
+
+    @staticmethod
+    def bump_version(users):
+        """
+        Увеличивает версию списка покупок у переданных пользователей.
+
+        Версия входит в ключ кэша выгрузки списка покупок, поэтому ее нужно
+        увеличивать при любом изменении состава списка или ингредиентов
+        рецептов в нем.
+        """
+        users.update(shopping_cart_version=F('shopping_cart_version') + 1)
+
+
+class FeedEntry(models.Model):
+    """
+    Модель записи ленты подписок.
+
+    Хранит рецепт в ленте подписчика его автора. Записи добавляются при
+    публикации рецепта и при подписке (см. recipes.feed), дата публикации
+    и автор копируются из рецепта, чтобы лента читалась по индексу без
+    соединения с рецептами.
+    """
+
+    # Индексы по пользователю и автору - составные, см. Meta.indexes.
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='feed_entries',
+        db_index=False
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+        related_name='feed_entries'
+    )
+    # Копия автора рецепта: целостность обеспечивает внешний ключ рецепта,
+    # поэтому отдельное ограничение в БД не проверяется при каждой вставке.
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='+',
+        db_index=False,
+        db_constraint=False
+    )
+    pub_date = models.DateTimeField('Добавлен')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        ordering = ['-pub_date', 'recipe']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry_user_recipe'
+            )
+        ]
+        indexes = [
+            # Лента пользователя в порядке ленты рецептов.
+            models.Index(
+                fields=['user', '-pub_date', 'recipe'],
+                name='feed_user_pub_date_recipe_idx'
+            ),
+            # Удаление рецептов автора из ленты при отписке и вместе с
+            # автором.
+            models.Index(
+                fields=['author', 'user'],
+                name='feed_author_user_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.recipe}'
+
+
+class ShortLink(models.Model):
+    """
+    Модель короткой ссылки на рецепт.
+
+    Хранит код ссылки и количество переходов по ней. Для рецептов без
+    записи кодом служит идентификатор рецепта в base36.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+        related_name='short_link'
+    )
+    code = models.CharField(
+        'Код',
+        max_length=MAX_SHORT_LINK_CODE,
+        unique=True
+    )
+    hits = models.PositiveIntegerField('Переходы', default=0)
+
+    class Meta:
+        verbose_name = 'Короткая ссылка'
+        verbose_name_plural = 'Короткие ссылки'
+        ordering = ['recipe']
+
+    def __str__(self):
+        return self.code
+
+
+class CacheVersion(models.Model):
+    """
+    Модель версии кэша справочника.
+
+    Версия входит в ключи кэша справочника и хранится в БД, поэтому ее
+    изменение видят все процессы, в том числе изменения из команд
+    управления и админки.
+    """
+
+    name = models.CharField(
+        'Название',
+        max_length=MAX_CACHE_VERSION_NAME,
+        primary_key=True
+    )
+    version = models.PositiveBigIntegerField('Версия', default=0)
+
+    class Meta:
+        verbose_name = 'Версия кэша'
+        verbose_name_plural = 'Версии кэша'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
@@ -0,0 +1,142 @@
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection, transaction
+from django.db.models import (
+    Aggregate,
+    Case,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    TextField,
+    Value,
+    When,
+)
+from django.utils.html import escape
+
+from recipes.models import RecipeIngredient
+
+
+# Конфигурация полнотекстового поиска PostgreSQL для LANGUAGE_CODE ru-BY.
+SEARCH_CONFIG = 'russian'
+# Количество слов запроса, которые учитываются в поиске без PostgreSQL.
+MAX_FALLBACK_WORDS = 5
+# Границы найденных слов во фрагменте: управляющие символы не встречаются в
+# тексте рецептов и не меняются при экранировании HTML.
+SNIPPET_START = '\x02'
+SNIPPET_STOP = '\x03'
+
+
+class IngredientNames(Aggregate):
+    """Названия ингредиентов рецепта через пробел (STRING_AGG)."""
+
+    function = 'STRING_AGG'
+    template = "%(function)s(%(expressions)s, ' ')"
+    output_field = TextField()
+
+
+def get_search_vector():
+    """
+    Возвращает выражение поискового вектора рецепта.
+
+    Название рецепта имеет наибольший вес, затем названия ингредиентов и
+    описание.
+    """
+    ingredient_names = RecipeIngredient.objects.filter(
+        recipe=OuterRef('pk')
+    ).order_by().values('recipe').annotate(
+        names=IngredientNames('ingredient__name')
+    ).values('names')
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(
+            Subquery(ingredient_names),
+            weight='B',
+            config=SEARCH_CONFIG
+        )
+        + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(recipes):
+    """
+    Пересчитывает поисковый вектор рецептов одним запросом UPDATE.
+
+    recipes - QuerySet рецептов. Без PostgreSQL вектор не хранится.
+    """
+    if connection.vendor != 'postgresql':
+        return 0
+    return recipes.update(search_vector=get_search_vector())
+
+
+def schedule_search_vector_update(recipes):
+    """Пересчитывает поисковый вектор рецептов после коммита транзакции."""
+    if connection.vendor != 'postgresql':
+        return
+    transaction.on_commit(lambda: update_search_vectors(recipes))
+
+
+def render_snippet(snippet):
+    """
+    Возвращает фрагмент описания в виде HTML, в котором найденные слова
+    выделены тегом <mark>, а остальной текст экранирован.
+    """
+    return escape(snippet).replace(SNIPPET_START, '<mark>').replace(
+        SNIPPET_STOP, '</mark>'
+    )
+
+
+def search_recipes(queryset, value):
+    """
+    Оставляет рецепты, подходящие под поисковый запрос, и сортирует их по
+    релевантности.
+
+    В PostgreSQL используется полнотекстовый поиск по хранимому вектору с
+    индексом GIN. Запрос разбирается как в поисковых системах (кавычки,
+    OR, минус), у рецептов появляется фрагмент описания search_snippet с
+    найденными словами. В остальных СУБД рецепт должен
+    содержать каждое слово запроса в названии, описании или названиях
+    ингредиентов, а выше показываются рецепты с запросом в названии.
+    """
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(
+            value, search_type='websearch', config=SEARCH_CONFIG
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query),
+            search_snippet=SearchHeadline(
+                'text',
+                query,
+                config=SEARCH_CONFIG,
+                start_sel=SNIPPET_START,
+                stop_sel=SNIPPET_STOP,
+                max_words=30,
+                min_words=10,
+                max_fragments=2
+            )
+        ).order_by('-search_rank', '-pub_date', 'id')
+
+    for word in value.split()[:MAX_FALLBACK_WORDS]:
+        queryset = queryset.filter(
+            Q(name__icontains=word)
+            | Q(text__icontains=word)
+            | Exists(
+                RecipeIngredient.objects.filter(
+                    recipe=OuterRef('pk'),
+                    ingredient__name__icontains=word
+                )
+            )
+        )
+    return queryset.annotate(
+        search_rank=Case(
+            When(name__icontains=value.strip(), then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField()
+        )
+    ).order_by('-search_rank', '-pub_date', 'id')
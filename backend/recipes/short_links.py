@@ -0,0 +1,228 @@
+import atexit
+import logging
+import secrets
+import string
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import (
+    Case,
+    F,
+    PositiveIntegerField,
+    Value,
+    When,
+)
+from django.utils.http import base36_to_int, int_to_base36
+
+from recipes.models import Recipe, ShortLink
+
+
+logger = logging.getLogger(__name__)
+
+CODE_ALPHABET = string.ascii_letters + string.digits
+
+
+class LRUCache:
+    """
+    Потокобезопасный LRU-кэш с ограничением количества записей и временем
+    жизни записи.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Результаты разрешения кодов текущего процесса, включая ненайденные.
+_codes = LRUCache(
+    settings.SHORT_LINK_CACHE_SIZE, settings.SHORT_LINK_CACHE_TTL
+)
+_hits = Counter()
+_flushed_at = time.monotonic()
+_hits_lock = threading.Lock()
+
+
+def generate_code():
+    """
+    Возвращает случайный код ссылки.
+
+    Код содержит хотя бы одну заглавную букву, поэтому не совпадает с
+    кодом рецепта в base36, который записывается строчными буквами.
+    """
+    while True:
+        code = ''.join(
+            secrets.choice(CODE_ALPHABET)
+            for _ in range(settings.SHORT_LINK_CODE_LENGTH)
+        )
+        if code != code.lower():
+            return code
+
+
+def new_code(recipe_id):
+    """
+    Возвращает код новой ссылки рецепта: случайный, если включен
+    SHORT_LINK_RANDOM_CODES, иначе идентификатор рецепта в base36.
+    """
+    if settings.SHORT_LINK_RANDOM_CODES:
+        return generate_code()
+    return int_to_base36(recipe_id)
+
+
+def get_short_link_code(recipe_id):
+    """
+    Возвращает код короткой ссылки рецепта.
+
+    По умолчанию код - идентификатор рецепта в base36, и он не сохраняется
+    в БД. Если включен SHORT_LINK_RANDOM_CODES, рецепту назначается
+    случайный код, ранее выданные коды сохраняются. Для несуществующего
+    рецепта выбрасывается Recipe.DoesNotExist.
+    """
+    if not settings.SHORT_LINK_RANDOM_CODES:
+        if not Recipe.objects.filter(pk=recipe_id).exists():
+            raise Recipe.DoesNotExist
+        return int_to_base36(recipe_id)
+    code = ShortLink.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('code', flat=True).first()
+    while code is None:
+        try:
+            with transaction.atomic():
+                code = ShortLink.objects.create(
+                    recipe_id=recipe_id, code=generate_code()
+                ).code
+        except IntegrityError:
+            # Код уже занят, ссылку создал параллельный запрос или рецепта
+            # нет.
+            code = ShortLink.objects.filter(
+                recipe_id=recipe_id
+            ).values_list('code', flat=True).first()
+            if code is None and not Recipe.objects.filter(
+                pk=recipe_id
+            ).exists():
+                raise Recipe.DoesNotExist
+    return code
+
+
+def resolve_short_link(code):
+    """
+    Возвращает идентификатор рецепта по коду ссылки или None.
+
+    Результат, в том числе отрицательный, хранится в LRU-кэше процесса на
+    SHORT_LINK_CACHE_TTL секунд, поэтому повторные переходы по ссылке не
+    обращаются к БД. Код в base36 без сохраненной ссылки принимается
+    только без SHORT_LINK_RANDOM_CODES, иначе ссылки можно было бы
+    перебрать по идентификаторам рецептов.
+    """
+    recipe_id = _codes.get(code, default=False)
+    if recipe_id is not False:
+        return recipe_id
+    recipe_id = ShortLink.objects.filter(
+        code=code
+    ).values_list('recipe_id', flat=True).first()
+    if recipe_id is None and not settings.SHORT_LINK_RANDOM_CODES:
+        try:
+            pk = base36_to_int(code)
+        except ValueError:
+            pk = None
+        if pk is not None and Recipe.objects.filter(pk=pk).exists():
+            recipe_id = pk
+    _codes.set(code, recipe_id)
+    return recipe_id
+
+
+def clear_short_link_cache():
+    """Сбрасывает кэш кодов ссылок текущего процесса."""
+    _codes.clear()
+
+
+def record_hit(recipe_id):
+    """
+    Учитывает переход по ссылке.
+
+    Переходы накапливаются в памяти процесса и записываются в БД не чаще
+    раза в SHORT_LINK_HITS_FLUSH_INTERVAL секунд.
+    """
+    global _flushed_at
+    with _hits_lock:
+        _hits[recipe_id] += 1
+        if (
+            time.monotonic() - _flushed_at
+            < settings.SHORT_LINK_HITS_FLUSH_INTERVAL
+        ):
+            return
+        _flushed_at = time.monotonic()
+    try:
+        flush_hits()
+    except DatabaseError:
+        logger.exception('Не удалось записать переходы по коротким ссылкам')
+
+
+@atexit.register
+def flush_hits():
+    """Записывает накопленные переходы в БД."""
+    with _hits_lock:
+        hits = dict(_hits)
+        _hits.clear()
+    if not hits:
+        return
+    with transaction.atomic():
+        # Для рецептов без записи создается ссылка с таким же кодом, какой
+        # выдал бы get_short_link_code. Случайный код может оказаться
+        # занят, тогда ссылка создается с другим кодом. Рецепты, удаленные
+        # после перехода, пропускаются.
+        missing = set(
+            Recipe.objects.filter(
+                pk__in=hits, short_link__isnull=True
+            ).values_list('pk', flat=True)
+        )
+        while missing:
+            ShortLink.objects.bulk_create(
+                [
+                    ShortLink(recipe_id=recipe_id, code=new_code(recipe_id))
+                    for recipe_id in missing
+                ],
+                ignore_conflicts=True
+            )
+            missing -= set(
+                ShortLink.objects.filter(
+                    recipe_id__in=missing
+                ).values_list('recipe_id', flat=True)
+            )
+        ShortLink.objects.filter(recipe_id__in=hits).update(
+            hits=F('hits') + Case(
+                *[
+                    When(recipe_id=recipe_id, then=Value(count))
+                    for recipe_id, count in hits.items()
+                ],
+                default=Value(0),
+                output_field=PositiveIntegerField()
+            )
+        )
@@ -0,0 +1,213 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from recipes.feed import (
+    schedule_author_backfill,
+    schedule_backfill,
+    schedule_fan_out,
+    trim_feed,
+)
+from recipes.images import (
+    get_renditions_field,
+    needs_renditions,
+    schedule_renditions,
+)
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Subscription,
+)
+from recipes.search import schedule_search_vector_update
+from recipes.short_links import clear_short_link_cache
+
+
+User = get_user_model()
+
+# Отправляется после массовой загрузки ингредиентов, при которой сигналы
+# post_save не отправляются.
+ingredients_loaded = Signal()
+# Отправляются после массового добавления и удаления связей (см.
+# LinkQuerySet) без сигналов post_save и post_delete, аргумент instances -
+# добавленные или удаленные объекты.
+links_created = Signal()
+links_deleted = Signal()
+
+
+@receiver([post_save, post_delete], sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    """Обновляет версию списка покупок при изменении его состава."""
+    ShoppingCart.bump_version(User.objects.filter(pk=instance.user_id))
+
+
+@receiver([links_created, links_deleted], sender=ShoppingCart)
+def shopping_cart_bulk_changed(sender, instances, **kwargs):
+    """Обновляет версию списков покупок после массового изменения."""
+    ShoppingCart.bump_version(
+        User.objects.filter(
+            pk__in={instance.user_id for instance in instances}
+        )
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    """
+    Обновляет версию списков покупок, в которых есть рецепты с измененным
+    ингредиентом.
+    """
+    if not created:
+        ShoppingCart.bump_version(
+            User.objects.filter(
+                shopping_cart__recipe__recipe_ingredients__ingredient=instance
+            )
+        )
+        schedule_search_vector_update(
+            Recipe.objects.filter(recipe_ingredients__ingredient=instance)
+        )
+
+
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_deleted(sender, instance, **kwargs):
+    """
+    Обновляет поисковый вектор рецептов, из которых удаляется ингредиент,
+    и версию списков покупок с этими рецептами.
+
+    Рецепты выбираются до удаления, пока связи с ингредиентом еще есть.
+    """
+    recipe_ids = list(
+        instance.ingredient_recipes.values_list('recipe_id', flat=True)
+    )
+    if recipe_ids:
+        ShoppingCart.bump_version(
+            User.objects.filter(shopping_cart__recipe_id__in=recipe_ids)
+        )
+        schedule_search_vector_update(Recipe.objects.filter(pk__in=recipe_ids))
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, update_fields, **kwargs):
+    """
+    Обновляет поисковый вектор рецепта после коммита транзакции, в которой
+    записаны и его ингредиенты.
+    """
+    if update_fields is not None and not {'name', 'text'} & set(update_fields):
+        return
+    schedule_search_vector_update(Recipe.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, **kwargs):
+    """Добавляет новый рецепт в ленты подписчиков автора."""
+    if created:
+        schedule_fan_out(instance)
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_created(sender, instance, created, **kwargs):
+    """Добавляет рецепты автора в ленту нового подписчика."""
+    if created:
+        schedule_backfill(instance)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    """Удаляет рецепты автора из ленты бывшего подписчика."""
+    trim_feed(instance.subscriber_id, instance.subscribing_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """Сбрасывает кэш коротких ссылок, чтобы не вести на удаленный рецепт."""
+    clear_short_link_cache()
+
+
+# Модель, при создании и удалении объектов которой меняется счетчик:
+# (модель со счетчиком, внешний ключ на нее, поле счетчика).
+COUNTERS = {
+    Favorite: (Recipe, 'recipe_id', 'favorites_count'),
+    ShoppingCart: (Recipe, 'recipe_id', 'in_carts_count'),
+    Recipe: (User, 'author_id', 'recipes_count'),
+    Subscription: (User, 'subscribing_id', 'subscribers_count'),
+}
+
+
+def update_counter(sender, instances, delta):
+    """
+    Атомарно изменяет денормализованный счетчик через F().
+
+    Счетчики всех объектов instances изменяются одним UPDATE на каждое
+    различное изменение. Счетчик не опускается ниже нуля, даже если
+    разошелся с данными после массовых операций без сигналов (исправляется
+    командой recount_counters).
+    """
+    model, foreign_key, field = COUNTERS[sender]
+    changes = Counter(getattr(instance, foreign_key) for instance in instances)
+    for count in set(changes.values()):
+        model.objects.filter(
+            pk__in=[pk for pk, changed in changes.items() if changed == count]
+        ).update(**{field: Greatest(F(field) + delta * count, 0)})
+
+
+def counted_object_saved(sender, instance, created, **kwargs):
+    if created:
+        update_counter(sender, [instance], 1)
+
+
+def counted_object_deleted(sender, instance, **kwargs):
+    update_counter(sender, [instance], -1)
+
+
+def counted_objects_created(sender, instances, **kwargs):
+    update_counter(sender, instances, 1)
+
+
+def counted_objects_deleted(sender, instances, **kwargs):
+    update_counter(sender, instances, -1)
+
+
+for counted_model in COUNTERS:
+    post_save.connect(counted_object_saved, sender=counted_model)
+    post_delete.connect(counted_object_deleted, sender=counted_model)
+    links_created.connect(counted_objects_created, sender=counted_model)
+    links_deleted.connect(counted_objects_deleted, sender=counted_model)
+
+
+# Подключается после счетчиков: проверяет уже уменьшенный счетчик.
+@receiver(post_delete, sender=Subscription)
+def author_subscriber_removed(sender, instance, **kwargs):
+    """
+    Копирует рецепты автора в ленты подписчиков, когда у автора становится
+    меньше FEED_FANOUT_MAX_SUBSCRIBERS подписчиков.
+    """
+    schedule_author_backfill(instance.subscribing_id)
+
+
+# Модели с изображениями, для которых создаются уменьшенные копии.
+IMAGE_FIELDS = {
+    Recipe: 'image',
+    User: 'avatar',
+}
+
+
+def image_saved(sender, instance, update_fields=None, **kwargs):
+    """Ставит в очередь создание копий, если изображение изменилось."""
+    image_field = IMAGE_FIELDS[sender]
+    if update_fields is not None and image_field not in update_fields:
+        return
+    if {
+        image_field, get_renditions_field(image_field)
+    } & instance.get_deferred_fields():
+        return
+    if needs_renditions(instance, image_field):
+        schedule_renditions(instance, image_field)
+
+
+for image_model in IMAGE_FIELDS:
+    post_save.connect(image_saved, sender=image_model)
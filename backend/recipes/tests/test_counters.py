@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+
+from recipes.management.commands.recount_counters import recount_counters
+from recipes.models import Favorite, Recipe, ShoppingCart, Subscription
+from recipes.signals import links_created, links_deleted
+from recipes.tests.utils import FoodgramTestCase, create_recipe, create_user
+
+
+User = get_user_model()
+
+
+class CounterTests(FoodgramTestCase):
+    """Денормализованные счетчики рецептов и пользователей."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.author = create_user('author')
+        cls.readers = [create_user(f'reader{index}') for index in range(3)]
+        cls.recipes = [create_recipe(cls.author) for _ in range(2)]
+
+    def assertCounters(self, obj, **expected):
+        obj.refresh_from_db(fields=list(expected))
+        self.assertEqual(
+            {field: getattr(obj, field) for field in expected}, expected
+        )
+
+    def test_recipes_and_subscribers(self):
+        self.assertCounters(self.author, recipes_count=2)
+        subscription = Subscription.objects.create(
+            subscriber=self.readers[0], subscribing=self.author
+        )
+        self.assertCounters(self.author, subscribers_count=1)
+        subscription.delete()
+        self.recipes[0].delete()
+        self.assertCounters(
+            self.author, recipes_count=1, subscribers_count=0
+        )
+
+    def test_favorites_and_shopping_cart(self):
+        recipe = self.recipes[0]
+        favorite = Favorite.objects.create(user=self.readers[0], recipe=recipe)
+        ShoppingCart.objects.create(user=self.readers[0], recipe=recipe)
+        ShoppingCart.objects.create(user=self.readers[1], recipe=recipe)
+        self.assertCounters(recipe, favorites_count=1, in_carts_count=2)
+        favorite.delete()
+        ShoppingCart.objects.filter(recipe=recipe).delete()
+        self.assertCounters(recipe, favorites_count=0, in_carts_count=0)
+
+    def test_bulk_changes(self):
+        first, second = self.recipes
+        created = Favorite.objects.create_missing(
+            [
+                Favorite(user=reader, recipe=first) for reader in self.readers
+            ] + [Favorite(user=self.readers[0], recipe=second)],
+            send_signals=False
+        )
+        links_created.send(sender=Favorite, instances=created)
+        self.assertCounters(first, favorites_count=3)
+        self.assertCounters(second, favorites_count=1)
+        deleted = Favorite.objects.filter(
+            user__in=self.readers[:2]
+        ).delete_and_fetch()
+        links_deleted.send(sender=Favorite, instances=deleted)
+        self.assertCounters(first, favorites_count=1)
+        self.assertCounters(second, favorites_count=0)
+
+    def test_counter_does_not_go_below_zero(self):
+        favorite = Favorite.objects.create(
+            user=self.readers[0], recipe=self.recipes[0]
+        )
+        Recipe.objects.filter(pk=self.recipes[0].pk).update(favorites_count=0)
+        favorite.delete()
+        self.assertCounters(self.recipes[0], favorites_count=0)
+
+    def test_recount_fixes_only_drifted_rows(self):
+        Favorite.objects.create(user=self.readers[0], recipe=self.recipes[0])
+        Recipe.objects.update(favorites_count=5)
+        User.objects.filter(pk=self.author.pk).update(recipes_count=0)
+        self.assertEqual(
+            recount_counters(),
+            {
+                'Recipe.favorites_count': 2,
+                'Recipe.in_carts_count': 0,
+                'User.recipes_count': 1,
+                'User.subscribers_count': 0,
+            }
+        )
+        self.assertCounters(self.recipes[0], favorites_count=1)
+        self.assertCounters(self.recipes[1], favorites_count=0)
+        self.assertCounters(self.author, recipes_count=2)
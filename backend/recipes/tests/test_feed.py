@@ -0,0 +1,164 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+
+from recipes.feed import get_feed, rebuild_feeds
+from recipes.models import FeedEntry, Recipe, Subscription
+from recipes.tests.utils import FoodgramTestCase, create_recipe, create_user
+
+
+User = get_user_model()
+
+
+class FeedTests(FoodgramTestCase):
+    """Заполнение и чтение лент подписок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.reader = create_user('reader')
+        cls.author = create_user('author')
+        cls.other_author = create_user('other_author')
+
+    def subscribe(self, subscriber, author):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Subscription.objects.create(
+                subscriber=subscriber, subscribing=author
+            )
+
+    def publish(self, author):
+        # Без изображения: копии изображений после коммита не создаются.
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_recipe(author, image=None)
+
+    def feed_recipe_ids(self, user):
+        return list(
+            FeedEntry.objects.filter(user=user).values_list(
+                'recipe_id', flat=True
+            )
+        )
+
+    def read_feed(self, user, limit):
+        """Читает ленту страницами по limit записей и возвращает id."""
+        ids, position = [], None
+        while entries := get_feed(user, position, limit):
+            ids.extend(recipe_id for _, recipe_id in entries)
+            position = entries[-1]
+        return ids
+
+    def set_pub_dates(self, recipes):
+        """Задает рецептам даты публикации, по три рецепта на дату."""
+        now = timezone.now()
+        for index, recipe in enumerate(recipes):
+            Recipe.objects.filter(pk=recipe.pk).update(
+                pub_date=now - timedelta(days=index // 3)
+            )
+
+    def test_new_recipe_added_to_subscriber_feeds(self):
+        self.subscribe(self.reader, self.author)
+        recipe = self.publish(self.author)
+        self.publish(self.other_author)
+        self.assertEqual(self.feed_recipe_ids(self.reader), [recipe.pk])
+        entry = FeedEntry.objects.get(user=self.reader)
+        self.assertEqual(entry.author, self.author)
+        self.assertEqual(entry.pub_date, recipe.pub_date)
+
+    def test_subscription_backfills_and_unsubscription_trims_feed(self):
+        recipes = [create_recipe(self.author) for _ in range(3)]
+        other = create_recipe(self.other_author)
+        subscription = self.subscribe(self.reader, self.author)
+        self.subscribe(self.reader, self.other_author)
+        self.assertCountEqual(
+            self.feed_recipe_ids(self.reader),
+            [recipe.pk for recipe in recipes] + [other.pk]
+        )
+        subscription.delete()
+        self.assertEqual(self.feed_recipe_ids(self.reader), [other.pk])
+
+    def test_feed_order_and_pages(self):
+        recipes = [create_recipe(self.author) for _ in range(7)]
+        self.set_pub_dates(recipes)
+        self.subscribe(self.reader, self.author)
+        expected = list(
+            Recipe.objects.order_by('-pub_date', 'id').values_list(
+                'id', flat=True
+            )
+        )
+        for limit in (1, 2, 3, 10):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.read_feed(self.reader, limit), expected)
+
+    @override_settings(FEED_FANOUT_MAX_SUBSCRIBERS=2)
+    def test_popular_author_recipes_read_on_request(self):
+        recipes = [
+            create_recipe(author)
+            for author in [self.author, self.other_author] * 3
+        ]
+        self.set_pub_dates(recipes)
+        self.subscribe(create_user('fan'), self.author)
+        self.subscribe(self.reader, self.author)
+        self.subscribe(self.reader, self.other_author)
+        # Рецепты популярного автора не копируются в ленты.
+        self.assertCountEqual(
+            self.feed_recipe_ids(self.reader),
+            [recipe.pk for recipe in recipes[1::2]]
+        )
+        expected = list(
+            Recipe.objects.order_by('-pub_date', 'id').values_list(
+                'id', flat=True
+            )
+        )
+        for limit in (1, 2, 4, 10):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.read_feed(self.reader, limit), expected)
+
+    @override_settings(FEED_FANOUT_MAX_SUBSCRIBERS=2)
+    def test_author_below_threshold_backfilled(self):
+        fan = create_user('fan')
+        self.subscribe(fan, self.author)
+        subscription = self.subscribe(self.reader, self.author)
+        recipes = [self.publish(self.author) for _ in range(2)]
+        self.assertEqual(self.feed_recipe_ids(self.reader), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.filter(subscriber=fan).delete()
+        self.assertCountEqual(
+            self.feed_recipe_ids(self.reader),
+            [recipe.pk for recipe in recipes]
+        )
+        # Рецепт в обоих источниках ленты возвращается один раз.
+        self.assertEqual(
+            self.read_feed(self.reader, 10),
+            [recipe.pk for recipe in reversed(recipes)]
+        )
+        subscription.delete()
+        self.assertEqual(self.feed_recipe_ids(self.reader), [])
+
+    @override_settings(FEED_FANOUT_MAX_SUBSCRIBERS=2)
+    def test_rebuild_feeds(self):
+        fan = create_user('fan')
+        recipes = [create_recipe(self.author) for _ in range(2)]
+        popular = create_recipe(self.other_author)
+        # Подписки без сигналов: ленты не заполнены.
+        Subscription.objects.bulk_create([
+            Subscription(subscriber=self.reader, subscribing=self.author),
+            Subscription(
+                subscriber=self.reader, subscribing=self.other_author
+            ),
+            Subscription(subscriber=fan, subscribing=self.other_author),
+        ])
+        User.objects.filter(pk=self.other_author.pk).update(
+            subscribers_count=2
+        )
+        self.subscribe(fan, self.author)
+        self.assertEqual(FeedEntry.objects.count(), 2)
+        self.assertEqual(rebuild_feeds(), 4)
+        self.assertCountEqual(
+            self.feed_recipe_ids(self.reader),
+            [recipe.pk for recipe in recipes]
+        )
+        self.assertCountEqual(
+            self.feed_recipe_ids(fan), [recipe.pk for recipe in recipes]
+        )
+        self.assertIn(popular.pk, self.read_feed(self.reader, 10))
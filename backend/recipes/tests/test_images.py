@@ -0,0 +1,116 @@
+import io
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image
+
+from api.serializers import ImageSrcsetField
+from recipes.images import update_renditions
+from recipes.models import Recipe
+from recipes.tests.utils import (
+    FoodgramTestCase,
+    create_recipe,
+    create_user,
+    make_image,
+)
+
+
+class ImageRenditionsTests(FoodgramTestCase):
+    """Уменьшенные копии изображений рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.author = create_user('author')
+
+    def create_recipe(self, size=(1500, 1000), image_format='JPEG'):
+        """Создает рецепт с изображением и копии после коммита."""
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = create_recipe(self.author, image=None)
+            recipe.image.save(
+                f'photo.{image_format.lower()}',
+                ContentFile(make_image(size, image_format))
+            )
+        recipe.refresh_from_db()
+        return recipe
+
+    def test_renditions_are_created_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            recipe = create_recipe(self.author, image=None)
+            recipe.image.save('photo.jpeg', ContentFile(make_image()))
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_renditions, {})
+        for callback in callbacks:
+            callback()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_renditions['source'], recipe.image.name)
+
+    def test_sizes_and_formats(self):
+        recipe = self.create_recipe()
+        renditions = recipe.image_renditions
+        self.assertEqual(renditions['source'], recipe.image.name)
+        expected = {
+            'detail': (1200, 800), 'card': (600, 400), 'thumbnail': (200, 133)
+        }
+        for size_name, (width, height) in expected.items():
+            size = renditions['sizes'][size_name]
+            self.assertEqual((size['width'], size['height']), (width, height))
+            self.assertEqual(set(size['files']), {'webp', 'jpeg'})
+            for extension, name in size['files'].items():
+                with default_storage.open(name) as file:
+                    image = Image.open(io.BytesIO(file.read()))
+                    self.assertEqual(image.size, (width, height))
+                    self.assertEqual(image.format, extension.upper())
+
+    def test_small_image_reuses_files(self):
+        sizes = self.create_recipe(size=(150, 100)).image_renditions['sizes']
+        self.assertEqual(sizes['detail'], sizes['thumbnail'])
+        self.assertEqual(
+            (sizes['detail']['width'], sizes['detail']['height']), (150, 100)
+        )
+
+    def test_transparent_png(self):
+        recipe = self.create_recipe(size=(300, 300), image_format='PNG')
+        self.assertEqual(
+            recipe.image_renditions['sizes']['thumbnail']['width'], 200
+        )
+
+    def test_changed_image_replaces_renditions(self):
+        recipe = self.create_recipe()
+        old_files = recipe.image_renditions['sizes']['card']['files'].values()
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.image.save(
+                'other.jpeg', ContentFile(make_image((400, 400)))
+            )
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_renditions['source'], recipe.image.name)
+        for name in old_files:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_update_is_skipped_for_current_image(self):
+        recipe = self.create_recipe()
+        self.assertFalse(update_renditions(Recipe, recipe.pk, 'image'))
+        self.assertTrue(
+            update_renditions(Recipe, recipe.pk, 'image', force=True)
+        )
+
+    def test_command_creates_missing_renditions(self):
+        recipe = self.create_recipe()
+        Recipe.objects.filter(pk=recipe.pk).update(image_renditions={})
+        call_command('generate_renditions', stdout=io.StringIO())
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_renditions['source'], recipe.image.name)
+
+    def test_srcset(self):
+        field = ImageSrcsetField('image')
+        recipe = self.create_recipe()
+        srcset = field.to_representation(recipe)
+        self.assertEqual(set(srcset), {'webp', 'jpeg'})
+        self.assertRegex(
+            srcset['webp'],
+            r'^\S+_thumbnail\.webp 200w, \S+_card\.webp 600w, '
+            r'\S+_detail\.webp 1200w$'
+        )
+        recipe.image.name = 'recipes/images/new.png'
+        self.assertIsNone(field.to_representation(recipe))
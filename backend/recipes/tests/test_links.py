@@ -0,0 +1,63 @@
+from unittest import mock
+
+from recipes.models import Favorite, LinkQuerySet
+from recipes.tests.utils import FoodgramTestCase, create_recipe, create_user
+
+
+class LinkQuerySetTests(FoodgramTestCase):
+    """Добавление и удаление связей без гонок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = create_user('reader')
+        author = create_user('author')
+        cls.recipes = [create_recipe(author) for _ in range(5)]
+
+    def test_create_missing_skips_existing(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipes[0])
+        with self.assertNumQueries(1):
+            created = Favorite.objects.create_missing(
+                [
+                    Favorite(user=self.user, recipe=recipe)
+                    for recipe in self.recipes[:3] + self.recipes[1:2]
+                ],
+                send_signals=False
+            )
+        self.assertEqual(
+            [obj.recipe for obj in created], self.recipes[1:3]
+        )
+        self.assertCountEqual(
+            [obj.pk for obj in created],
+            Favorite.objects.filter(
+                recipe__in=self.recipes[1:3]
+            ).values_list('pk', flat=True)
+        )
+        self.assertFalse(created[0]._state.adding)
+        self.assertEqual(Favorite.objects.create_missing([]), [])
+
+    def test_create_missing_sends_post_save(self):
+        created = Favorite.objects.create_missing(
+            [Favorite(user=self.user, recipe=self.recipes[0])]
+        )
+        self.assertEqual(len(created), 1)
+        self.recipes[0].refresh_from_db(fields=['favorites_count'])
+        self.assertEqual(self.recipes[0].favorites_count, 1)
+
+    def test_delete_and_fetch(self):
+        Favorite.objects.bulk_create(
+            Favorite(user=self.user, recipe=recipe) for recipe in self.recipes
+        )
+        with mock.patch.object(LinkQuerySet, 'delete_batch_size', 2):
+            deleted = Favorite.objects.filter(
+                recipe__in=self.recipes[:4]
+            ).delete_and_fetch()
+        self.assertCountEqual(
+            [obj.recipe_id for obj in deleted],
+            [recipe.pk for recipe in self.recipes[:4]]
+        )
+        self.assertEqual(
+            list(Favorite.objects.values_list('recipe_id', flat=True)),
+            [self.recipes[4].pk]
+        )
+        self.assertEqual(Favorite.objects.filter(pk=0).delete_and_fetch(), [])
@@ -0,0 +1,110 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+
+from recipes.management.commands.load_ingredients import read_json
+from recipes.models import Ingredient, ShoppingCart
+from recipes.tests.utils import FoodgramTestCase, create_recipe, create_user
+
+
+class LoadIngredientsTests(FoodgramTestCase):
+    """Загрузка и обновление ингредиентов из файла."""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def load(self, path, **options):
+        stdout = io.StringIO()
+        call_command('load_ingredients', path=path, stdout=stdout, **options)
+        return stdout.getvalue().splitlines()[-1]
+
+    def units(self):
+        return dict(Ingredient.objects.values_list('name', 'measurement_unit'))
+
+    def test_formats(self):
+        items = [
+            {'name': 'Перец', 'measurement_unit': 'г'},
+            {'name': 'Лук', 'measurement_unit': 'шт.'},
+        ]
+        files = {
+            'items.json': json.dumps(items, ensure_ascii=False),
+            'items.jsonl': '\n'.join(
+                json.dumps(item, ensure_ascii=False) for item in items
+            ),
+            'items.csv': 'name,measurement_unit\nПерец,г\nЛук,шт.\n',
+        }
+        for name, content in files.items():
+            with self.subTest(name=name):
+                Ingredient.objects.filter(name__in=['Перец', 'Лук']).delete()
+                self.assertEqual(
+                    self.load(self.write(name, content)),
+                    'Добавлено: 2, обновлено: 0, пропущено: 0'
+                )
+                self.assertEqual(self.units()['Лук'], 'шт.')
+
+    def test_upsert_is_idempotent(self):
+        path = self.write(
+            'items.csv', 'Молоко,л\nПерец,г\nПерец,кг\nБез единицы,\n'
+        )
+        milk_id = Ingredient.objects.get(name='Молоко').pk
+        self.assertEqual(
+            self.load(path),
+            'Добавлено: 1, обновлено: 1, пропущено: 2'
+        )
+        units = self.units()
+        self.assertEqual((units['Молоко'], units['Перец']), ('л', 'кг'))
+        self.assertEqual(Ingredient.objects.get(name='Молоко').pk, milk_id)
+        self.assertEqual(
+            self.load(path),
+            'Добавлено: 0, обновлено: 0, пропущено: 4'
+        )
+
+    def test_update_bumps_shopping_cart_versions(self):
+        user, other = create_user('buyer'), create_user('other')
+        recipe = create_recipe(user, ingredients=[(self.ingredients[0], 1)])
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+        ShoppingCart.objects.create(
+            user=other, recipe=create_recipe(other)
+        )
+        self.load(self.write('items.csv', 'Молоко,л\n'))
+        user.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(
+            (user.shopping_cart_version, other.shopping_cart_version), (2, 1)
+        )
+
+    def test_json_is_read_in_chunks(self):
+        items = [{'name': f'Ингредиент {index}'} for index in range(20)]
+        content = json.dumps(items, ensure_ascii=False, indent=2)
+        with mock.patch(
+            'recipes.management.commands.load_ingredients.JSON_CHUNK_SIZE', 7
+        ):
+            self.assertEqual(list(read_json(io.StringIO(content))), items)
+            self.assertEqual(list(read_json(io.StringIO(' [ ] '))), [])
+
+    def test_errors(self):
+        cases = [
+            (self.write('bad.json', '[{"name": "Перец"} {}]'), {}),
+            (self.write('cut.json', '[{"name": "Перец"}'), {}),
+            (self.write('object.json', '{}'), {}),
+            (self.write('items.txt', ''), {}),
+            (self.write('items.csv', ''), {'batch_size': 0}),
+            (os.path.join(self.directory.name, 'missing.json'), {}),
+        ]
+        for path, options in cases:
+            with self.subTest(path=os.path.basename(path), **options):
+                with self.assertRaises(CommandError):
+                    self.load(path, **options)
+        self.assertEqual(Ingredient.objects.count(), len(self.ingredients))
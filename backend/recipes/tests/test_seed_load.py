@@ -0,0 +1,107 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.db.models import Count, F
+
+from recipes.management.commands.recount_counters import recount_counters
+from recipes.models import (
+    FeedEntry,
+    Recipe,
+    RecipeIngredient,
+    Subscription,
+    Tag,
+)
+from recipes.tests.utils import FoodgramTestCase
+
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    """Исключение для отката созданных данных."""
+
+
+class SeedLoadTests(FoodgramTestCase):
+    """Генерация синтетических данных командой seed_load."""
+
+    def seed(self, **options):
+        options = {'users': 30, 'recipes': 60, **options}
+        call_command('seed_load', stdout=io.StringIO(), **options)
+
+    def snapshot(self):
+        """Возвращает созданные данные без учета идентификаторов."""
+        first_user = User.objects.order_by('pk').first().pk
+        first_recipe = Recipe.objects.order_by('pk').first().pk
+        return {
+            'recipes': [
+                (author_id - first_user, name.split(' №')[0], cooking_time)
+                for author_id, name, cooking_time
+                in Recipe.objects.order_by('pk').values_list(
+                    'author_id', 'name', 'cooking_time'
+                )
+            ],
+            'ingredients': sorted(
+                (recipe_id - first_recipe, ingredient_id, amount)
+                for recipe_id, ingredient_id, amount
+                in RecipeIngredient.objects.values_list(
+                    'recipe_id', 'ingredient_id', 'amount'
+                )
+            ),
+            'subscriptions': sorted(
+                (subscriber_id - first_user, subscribing_id - first_user)
+                for subscriber_id, subscribing_id
+                in Subscription.objects.values_list(
+                    'subscriber_id', 'subscribing_id'
+                )
+            ),
+        }
+
+    def test_created_data(self):
+        self.seed(ingredients_per_recipe=[2, 4], days=30)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Recipe.objects.count(), 60)
+        self.assertEqual(Tag.objects.count(), 8)
+        ingredient_counts = Recipe.objects.annotate(
+            count=Count('recipe_ingredients')
+        ).values_list('count', flat=True)
+        self.assertTrue(all(1 <= count <= 4 for count in ingredient_counts))
+        self.assertFalse(Recipe.objects.filter(tags__isnull=True).exists())
+        self.assertFalse(
+            Subscription.objects.filter(
+                subscriber_id=F('subscribing_id')
+            ).exists()
+        )
+        self.assertGreater(
+            Recipe.objects.values('pub_date').distinct().count(), 50
+        )
+        # Счетчики и ленты подписок пересчитаны после загрузки.
+        self.assertEqual(set(recount_counters().values()), {0})
+        self.assertTrue(FeedEntry.objects.exists())
+
+    def test_same_seed_creates_same_data(self):
+        try:
+            with transaction.atomic():
+                self.seed(seed=7)
+                first = self.snapshot()
+                raise Rollback
+        except Rollback:
+            pass
+        self.seed(seed=7)
+        second = self.snapshot()
+        self.assertEqual(first, second)
+
+    def test_password(self):
+        self.seed(users=1, recipes=0, password='secret')
+        self.assertTrue(User.objects.get().check_password('secret'))
+
+    def test_invalid_options(self):
+        for options in (
+            {'users': 0},
+            {'ingredients_per_recipe': [0, 3]},
+            {'ingredients_per_recipe': [5, 3]},
+        ):
+            with self.subTest(**options):
+                with self.assertRaises(CommandError):
+                    self.seed(**options)
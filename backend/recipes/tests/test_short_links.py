@@ -0,0 +1,106 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import int_to_base36
+
+from recipes.models import ShortLink
+from recipes.short_links import flush_hits
+from recipes.tests.utils import FoodgramTestCase, create_recipe, create_user
+
+
+@override_settings(SHORT_LINK_HITS_FLUSH_INTERVAL=60 * 60)
+class ShortLinkTests(FoodgramTestCase):
+    """Короткие ссылки на рецепты и учет переходов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        author = create_user('author')
+        cls.recipe = create_recipe(author)
+        cls.other = create_recipe(author)
+
+    def get_link(self, recipe_id):
+        response = self.client.get(f'/api/recipes/{recipe_id}/get-link/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['short-link']
+
+    def test_base36_link_redirects_to_recipe(self):
+        link = self.get_link(self.recipe.pk)
+        self.assertEqual(
+            link, f'http://testserver/s/{int_to_base36(self.recipe.pk)}'
+        )
+        self.assertFalse(ShortLink.objects.exists())
+        response = self.client.get(link)
+        self.assertRedirects(
+            response, f'/recipes/{self.recipe.pk}',
+            fetch_redirect_response=False
+        )
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_resolved_code_is_cached(self):
+        link = self.get_link(self.recipe.pk)
+        self.client.get(link)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(link).status_code, 302)
+
+    def test_unknown_code_and_recipe(self):
+        self.assertEqual(self.client.get('/s/zzzzzz').status_code, 404)
+        self.assertEqual(self.client.get('/s/Not-a-code').status_code, 404)
+        self.assertEqual(
+            self.client.get('/api/recipes/999999/get-link/').status_code, 404
+        )
+
+    def test_only_safe_methods(self):
+        link = self.get_link(self.recipe.pk)
+        self.assertEqual(self.client.post(link).status_code, 405)
+
+    def test_deleted_recipe_link_is_not_found(self):
+        link = self.get_link(self.other.pk)
+        self.client.get(link)
+        self.other.delete()
+        self.assertEqual(self.client.get(link).status_code, 404)
+
+    def test_hits_are_flushed_in_one_update(self):
+        recipe_link = self.get_link(self.recipe.pk)
+        other_link = self.get_link(self.other.pk)
+        for link in [recipe_link] * 3 + [other_link]:
+            self.client.get(link)
+        ShortLink.objects.create(
+            recipe=self.other, code=int_to_base36(self.other.pk), hits=10
+        )
+        with CaptureQueriesContext(connection) as context:
+            flush_hits()
+        updates = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            dict(ShortLink.objects.values_list('code', 'hits')),
+            {
+                int_to_base36(self.recipe.pk): 3,
+                int_to_base36(self.other.pk): 11,
+            }
+        )
+
+    @override_settings(SHORT_LINK_RANDOM_CODES=True)
+    def test_random_codes(self):
+        link = self.get_link(self.recipe.pk)
+        code = link.rsplit('/', 1)[1]
+        self.assertEqual(len(code), 7)
+        self.assertNotEqual(code, code.lower())
+        self.assertEqual(self.get_link(self.recipe.pk), link)
+        self.assertEqual(self.client.get(link).status_code, 302)
+        # Ссылки нельзя перебрать по идентификаторам рецептов.
+        base36_link = f'/s/{int_to_base36(self.other.pk)}'
+        self.assertEqual(self.client.get(base36_link).status_code, 404)
+
+    @override_settings(SHORT_LINK_RANDOM_CODES=True)
+    def test_flush_creates_missing_random_links(self):
+        # Переход по ссылке, выданной до включения случайных кодов.
+        with self.settings(SHORT_LINK_RANDOM_CODES=False):
+            self.client.get(f'/s/{int_to_base36(self.other.pk)}')
+        flush_hits()
+        link = ShortLink.objects.get()
+        self.assertEqual((link.recipe_id, link.hits), (self.other.pk, 1))
+        self.assertNotEqual(link.code, link.code.lower())
@@ -0,0 +1,115 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.short_links import clear_short_link_cache, flush_hits
+
+
+User = get_user_model()
+
+
+def make_image(size=(10, 10), image_format='PNG'):
+    """Возвращает изображение заданного размера в байтах."""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 100, 50)).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def make_base64_image(size=(10, 10), image_format='PNG'):
+    """Возвращает изображение в формате 'data:image/...;base64,...'."""
+    content = base64.b64encode(make_image(size, image_format)).decode()
+    return f'data:image/{image_format.lower()};base64,{content}'
+
+
+def create_user(username, **kwargs):
+    """Создает пользователя с адресом почты по имени."""
+    return User.objects.create_user(
+        email=f'{username}@example.com',
+        username=username,
+        first_name='Имя',
+        last_name='Фамилия',
+        password='password',
+        **kwargs
+    )
+
+
+def create_recipe(author, name='Рецепт', ingredients=(), tags=(), **kwargs):
+    """
+    Создает рецепт с ингредиентами и тегами.
+
+    ingredients - пары (ингредиент, количество).
+    """
+    kwargs.setdefault('text', 'Описание')
+    kwargs.setdefault('cooking_time', 10)
+    kwargs.setdefault('image', 'recipes/images/test.png')
+    recipe = Recipe.objects.create(author=author, name=name, **kwargs)
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=amount)
+        for ingredient, amount in ingredients
+    )
+    recipe.tags.set(tags)
+    return recipe
+
+
+class FoodgramTestCase(TestCase):
+    """
+    Базовый класс тестов.
+
+    Файлы сохраняются во временный каталог, ленты подписок и копии
+    изображений обрабатываются в потоке теста, кэш и состояние процесса
+    сбрасываются перед каждым тестом. Действия после коммита выполняются
+    только внутри captureOnCommitCallbacks(execute=True).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            MEDIA_ROOT=cls.media_root,
+            FEED_FANOUT_WORKERS=0,
+            IMAGE_PROCESSING_WORKERS=0
+        )
+        cls.settings_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = [
+            Tag.objects.create(name='Завтрак', slug='breakfast'),
+            Tag.objects.create(name='Обед', slug='lunch'),
+            Tag.objects.create(name='Ужин', slug='dinner'),
+        ]
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in [
+                ('Молоко', 'мл'),
+                ('Мука', 'г'),
+                ('Яйца', 'шт.'),
+                ('Сахар', 'г'),
+                ('Соль', 'г'),
+                ('Масло сливочное', 'г'),
+            ]
+        )
+
+    def setUp(self):
+        cache.clear()
+        clear_short_link_cache()
+
+    def tearDown(self):
+        # Переходы по коротким ссылкам записываются в транзакции теста,
+        # иначе они будут записаны при выходе, когда тестовой БД уже нет.
+        flush_hits()
+        super().tearDown()
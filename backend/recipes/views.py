@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.http import (
+    Http404,
+    HttpResponsePermanentRedirect,
+    HttpResponseRedirect,
+)
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+
+from recipes.short_links import record_hit, resolve_short_link
+
+
+@require_safe
+def short_link_redirect(request, code):
+    """
+    Перенаправляет с короткой ссылки на страницу рецепта.
+
+    Ответ запрещено кэшировать без проверки: каждый переход должен дойти
+    до представления, чтобы его учесть. Сам код разрешается без запросов
+    к БД через кэш процесса (см. resolve_short_link).
+    """
+    recipe_id = resolve_short_link(code)
+    if recipe_id is None:
+        raise Http404('Рецепт не найден.')
+    record_hit(recipe_id)
+    redirect_class = (
+        HttpResponsePermanentRedirect
+        if settings.SHORT_LINK_PERMANENT_REDIRECT
+        else HttpResponseRedirect
+    )
+    response = redirect_class(f'/recipes/{recipe_id}')
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -25,11 +25,3 @@ class UserAdmin(BaseUserAdmin):
         'recipes_count'
     ]
     search_fields = ['username', 'email']
-
-    @admin.display(description='Количество подписчиков')
-    def subscribers_count(self, obj):
-        return obj.subscribers.count()
-
-    @admin.display(description='Количество рецептов')
-    def recipes_count(self, obj):
-        return obj.recipes.count()
@@ -44,6 +44,26 @@ class User(AbstractUser):
         upload_to='users/',
         null=True
     )
+    avatar_renditions = models.JSONField(
+        'Уменьшенные копии аватара',
+        default=dict,
+        editable=False
+    )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+        editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+        editable=False
+    )
+    shopping_cart_version = models.PositiveIntegerField(
+        'Версия списка покупок',
+        default=0,
+        editable=False
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']